@@ -3,33 +3,21 @@ from django.views import View
 from django.db import transaction
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-import jwt
+from Login.middleware import token_requerido
+from Login.roles import rol_permitido
 from .models import *
-from django.conf import settings
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class CrearCicloView(View):
     def post(self, request, *args, **kwargs):
         try:
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
+            id_usuario = request.usuario.id_usuario
 
-            token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
-
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                id_usuario = payload.get('id_usuario')
-                rol = payload.get('rol')
-
-                # Verificación adicional para el rol
-                if rol != "Pastor":
-                    return JsonResponse({'error': 'Acceso no autorizado, solo pastores pueden crear ciclos'}, status=403)
-
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            # Verificación adicional para el rol
+            if not rol_permitido(request.usuario, [1]):
+                return JsonResponse({'error': 'Acceso no autorizado, solo pastores pueden crear ciclos'}, status=403)
 
             required_fields = ['nombre', 'descripcion']
             for field in required_fields:
@@ -52,28 +40,16 @@ class CrearCicloView(View):
             return JsonResponse({'error': str(e)}, status=500)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class EditarCicloView(View):
     def post(self, request, *args, **kwargs):
         try:
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-
-            token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+            id_usuario = request.usuario.id_usuario
 
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                id_usuario = payload.get('id_usuario')
-                rol = payload.get('rol')
-
-                # Verificación adicional para el rol
-                if rol != "Pastor":
-                    return JsonResponse({'error': 'Acceso no autorizado, solo pastores pueden editar ciclos'}, status=403)
-
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            # Verificación adicional para el rol
+            if not rol_permitido(request.usuario, [1]):
+                return JsonResponse({'error': 'Acceso no autorizado, solo pastores pueden editar ciclos'}, status=403)
 
             ciclo_id = kwargs.get('id_ciclo')
             try:
@@ -101,6 +77,7 @@ class EditarCicloView(View):
             return JsonResponse({'error': str(e)}, status=500)
         
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
 class ListarCiclosView(View):
     def get(self, request, *args, **kwargs):
         try:
@@ -119,24 +96,12 @@ class ListarCiclosView(View):
             return JsonResponse({'error': str(e)}, status=500)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class VerCicloView(View):
     def get(self, request, *args, **kwargs):
         try:
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-
-            token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
-
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                id_usuario = payload.get('id_usuario')
-                rol = payload.get('rol')
-
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            id_usuario = request.usuario.id_usuario
 
             ciclo_id = kwargs.get('id_ciclo')
             try:
@@ -1,3 +1,52 @@
-from django.test import TestCase
+from datetime import date, time
+from decimal import Decimal
 
-# Create your tests here.
+from backend.pruebas import PruebaAPI, crear_usuario, crear_usuarios
+from .models import Calificacion, Curso, CursoParticipante, Rubrica, Tarea
+
+
+class ConsultasListadosCursosTests(PruebaAPI):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        docente = crear_usuario()
+        cls.curso = Curso.objects.create(
+            nombre='Discipulado', fecha_inicio=date(2025, 1, 6), fecha_fin=date(2025, 6, 30),
+            hora_inicio=time(19, 0), hora_fin=time(21, 0), id_usuario=docente
+        )
+        # bulk_create no llama a Rubrica.save(), que valida la suma contra la base
+        cls.criterios = Rubrica.objects.bulk_create([
+            Rubrica(id_curso=cls.curso, nombre_criterio='Tareas', porcentaje=Decimal('60')),
+            Rubrica(id_curso=cls.curso, nombre_criterio='Examen', porcentaje=Decimal('40')),
+        ])
+        cls.tareas = Tarea.objects.bulk_create([
+            Tarea(id_curso=cls.curso, id_criterio=criterio, titulo=f'Tarea {criterio.nombre_criterio}',
+                  fecha_entrega=date(2025, 3, 1))
+            for criterio in cls.criterios
+        ])
+
+    def sembrar_participantes(self, cantidad):
+        personas = [usuario.id_persona for usuario in crear_usuarios(cantidad)]
+        CursoParticipante.objects.bulk_create([
+            CursoParticipante(id_curso=self.curso, id_persona=persona) for persona in personas
+        ])
+        Calificacion.objects.bulk_create([
+            Calificacion(id_tarea=tarea, id_persona=persona, nota=Decimal('8'))
+            for tarea in self.tareas for persona in personas
+        ])
+
+    def test_listar_participantes_curso(self):
+        # Participantes + criterios de la rúbrica + promedios por persona y criterio
+        url = f'/Cursos/listar_participantes/{self.curso.id_curso}/'
+        respuestas = self.assertConsultasConstantes(3, url, self.sembrar_participantes)
+        participantes = respuestas[-1].json()
+        self.assertEqual(len(participantes), 43)
+        self.assertEqual(participantes[0]['calificacion_final'], 8.0)
+
+    def test_listar_calificaciones_tarea(self):
+        # Tarea + curso + calificaciones de la tarea + participantes
+        url = f'/Cursos/listar_calificaciones_tarea/{self.tareas[0].id_tarea}/'
+        respuestas = self.assertConsultasConstantes(4, url, self.sembrar_participantes)
+        participantes = respuestas[-1].json()['participantes']
+        self.assertEqual(len(participantes), 43)
+        self.assertEqual(participantes[0]['nota'], '8.00')
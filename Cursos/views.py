@@ -3,30 +3,20 @@ from django.views import View
 from django.db import transaction
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-import jwt
 import json
 from datetime import datetime 
+from backend.replica import usar_replica
+from Login.middleware import token_requerido
 from .models import *
-from django.conf import settings
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class CrearCursoView(View):
     def post(self, request, *args, **kwargs):
         try:
             # 1. Autenticación y validación de token
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-
-            token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
-
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                id_usuario = payload.get('id_usuario')
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            id_usuario = request.usuario.id_usuario
 
             # 2. Validación de campos obligatorios
             required_fields = ['nombre', 'descripcion', 'id_ciclo', 'fecha_inicio', 
@@ -137,23 +127,11 @@ class CrearCursoView(View):
             return JsonResponse({'error': str(e)}, status=500)
         
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class EditarCriteriosCursoView(View):
     def put(self, request, id_curso):
         try:
-            # Verificar autenticación
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-                
-            token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
-            
-            try:
-                jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
-
             # Obtener datos del request
             data = json.loads(request.body)
             
@@ -225,6 +203,7 @@ class EditarCriteriosCursoView(View):
             return JsonResponse({'error': str(e)}, status=500)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
 class ListarCriteriosCursoView(View):
     def get(self, request, id_curso):
         try:
@@ -236,25 +215,11 @@ class ListarCriteriosCursoView(View):
             return JsonResponse({'error': str(e)}, status=500)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class EditarCursoView(View):
     def post(self, request, id_curso, *args, **kwargs):
         try:
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-
-            token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
-
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                id_usuario = payload.get('id_usuario')
-                rol = payload.get('rol')
-                rol_id = 1 if rol == "Pastor" else 2
-
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            id_usuario = request.usuario.id_usuario
 
             # Buscar el curso
             try:
@@ -286,6 +251,7 @@ class EditarCursoView(View):
             return JsonResponse({'error': str(e)}, status=500)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
 class ListarCursosView(View):
     def get(self, request, *args, **kwargs):
         try:
@@ -317,6 +283,7 @@ class ListarCursosView(View):
             return JsonResponse({'error': str(e)}, status=500)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
 class VerCursoView(View):
     def get(self, request, id_curso, *args, **kwargs):
         try:
@@ -340,22 +307,12 @@ class VerCursoView(View):
             return JsonResponse({'error': str(e)}, status=500)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class RegistrarParticipantesCursoView(View):
     def post(self, request, *args, **kwargs):
         try:
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-
-            token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
-
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                id_usuario = payload.get('id_usuario')
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            id_usuario = request.usuario.id_usuario
 
             data = json.loads(request.body.decode('utf-8'))
 
@@ -407,24 +364,48 @@ class RegistrarParticipantesCursoView(View):
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
 
+def calcular_calificaciones_finales(id_curso):
+    """
+    Calificación final de todos los participantes del curso con dos consultas:
+    los criterios de la rúbrica y el promedio de notas por persona y criterio.
+    Usa el mismo cálculo que CalcularCalificacionAlumnoView.
+    """
+    criterios = dict(
+        Rubrica.objects.filter(id_curso_id=id_curso).values_list('id_rubrica', 'porcentaje')
+    )
+    total_porcentaje = sum(float(p) for p in criterios.values())
+    if not total_porcentaje:
+        return {}
+    factor_ajuste = 100.0 / total_porcentaje
+
+    promedios = Calificacion.objects.filter(
+        id_tarea__id_criterio_id__in=list(criterios)
+    ).values('id_persona', 'id_tarea__id_criterio').annotate(promedio=models.Avg('nota'))
+
+    calificaciones = {}
+    for fila in promedios:
+        porcentaje_efectivo = float(criterios[fila['id_tarea__id_criterio']]) * factor_ajuste
+        puntos = float(fila['promedio'] or 0) * porcentaje_efectivo / 100
+        calificaciones[fila['id_persona']] = calificaciones.get(fila['id_persona'], 0) + puntos
+
+    return {id_persona: round(total, 2) for id_persona, total in calificaciones.items()}
+
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(usar_replica, name='dispatch')
 class ListarParticipantesCursoView(View):
     def get(self, request, id_curso):
         try:
             participantes = CursoParticipante.objects.filter(id_curso_id=id_curso).select_related('id_persona')
+            calificaciones_finales = calcular_calificaciones_finales(id_curso)
             
             participantes_data = []
             for participante in participantes:
-                calificacion_response = CalcularCalificacionAlumnoView().get(
-                    request, id_curso, participante.id_persona.id_persona
-                )
-                calificacion_data = json.loads(calificacion_response.content)
-                
                 participantes_data.append({
                     'id_persona': participante.id_persona.id_persona,
                     'nombre': participante.id_persona.nombres,
                     'apellido': participante.id_persona.apellidos,
-                    'calificacion_final': calificacion_data.get('calificacion_final', 0)
+                    'calificacion_final': calificaciones_finales.get(participante.id_persona_id, 0)
                 })
             
             return JsonResponse(participantes_data, safe=False)
@@ -433,6 +414,7 @@ class ListarParticipantesCursoView(View):
             return JsonResponse({'error': str(e)}, status=500)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
 class CalcularCalificacionAlumnoView(View):
     def get(self, request, id_curso, id_persona):
         try:
@@ -445,7 +427,7 @@ class CalcularCalificacionAlumnoView(View):
             
             total_porcentaje = sum(c['porcentaje'] for c in criterios)
             if total_porcentaje != 100:
-                factor_ajuste = 100.0 / total_porcentaje if total_porcentaje != 0 else 0
+                factor_ajuste = 100.0 / float(total_porcentaje) if total_porcentaje != 0 else 0
             else:
                 factor_ajuste = 1.0
             
@@ -455,7 +437,7 @@ class CalcularCalificacionAlumnoView(View):
             for criterio in criterios:
                 calificaciones = Calificacion.objects.filter(
                     id_persona_id=id_persona,
-                    id_criterio_id=criterio['id_rubrica']
+                    id_tarea__id_criterio_id=criterio['id_rubrica']
                 ).select_related('id_tarea')
                 
                 if calificaciones.exists():
@@ -463,8 +445,8 @@ class CalcularCalificacionAlumnoView(View):
                         promedio=models.Avg('nota')
                     )['promedio'] or 0
                     
-                    porcentaje_efectivo = criterio['porcentaje'] * factor_ajuste
-                    puntos_criterio = (promedio_criterio * porcentaje_efectivo) / 100
+                    porcentaje_efectivo = float(criterio['porcentaje']) * factor_ajuste
+                    puntos_criterio = (float(promedio_criterio) * porcentaje_efectivo) / 100
                     calificacion_total += puntos_criterio
                     
                     detalles_por_criterio.append({
@@ -482,7 +464,7 @@ class CalcularCalificacionAlumnoView(View):
                     detalles_por_criterio.append({
                         'criterio': criterio['nombre_criterio'],
                         'porcentaje': criterio['porcentaje'],
-                        'porcentaje_efectivo': round(criterio['porcentaje'] * factor_ajuste, 2),
+                        'porcentaje_efectivo': round(float(criterio['porcentaje']) * factor_ajuste, 2),
                         'promedio': 0,
                         'puntos_obtenidos': 0,
                         'tareas': []
@@ -499,22 +481,12 @@ class CalcularCalificacionAlumnoView(View):
             return JsonResponse({'error': str(e)}, status=500)
         
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class RegistrarAsistenciaCursoView(View):
     def post(self, request, *args, **kwargs):
         try:
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-
-            token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
-
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                id_usuario = payload.get('id_usuario')
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            id_usuario = request.usuario.id_usuario
 
             data = json.loads(request.body.decode('utf-8'))
 
@@ -643,6 +615,7 @@ class EditarTareaView(View):
             return JsonResponse({'error': str(e)}, status=500)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
 class VerTareaView(View):
     def get(self, request, *args, **kwargs):
         try:
@@ -675,6 +648,7 @@ class VerTareaView(View):
             return JsonResponse({'error': str(e)}, status=500)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
 class ListarTareasCursoView(View):
     def get(self, request, *args, **kwargs):
         try:
@@ -699,6 +673,7 @@ class ListarTareasCursoView(View):
             return JsonResponse({'error': str(e)}, status=500)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
 class RegistrarCalificacionesView(View):
     def post(self, request, *args, **kwargs):
         try:
@@ -735,6 +710,7 @@ class RegistrarCalificacionesView(View):
             return JsonResponse({'error': str(e)}, status=500)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
 class ListarCalificacionesTareaView(View):
     def get(self, request, id_tarea, *args, **kwargs):
         try:
@@ -776,6 +752,7 @@ class ListarCalificacionesTareaView(View):
             return JsonResponse({'error': str(e)}, status=500)   
            
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
 class VerCalificacionesAlumnoView(View):
     def get(self, request, *args, **kwargs):
         try:
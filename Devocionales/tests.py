@@ -0,0 +1,21 @@
+from backend.pruebas import PruebaAPI, crear_usuario
+from .models import Devocionales
+
+
+class ConsultasListadosDevocionalesTests(PruebaAPI):
+    def test_historial_devocionales(self):
+        usuario = crear_usuario()
+
+        def sembrar(cantidad):
+            Devocionales.objects.bulk_create([
+                Devocionales(
+                    id_usuario=usuario, mes='enero', año=2025, titulo=f'Devocional {i}',
+                    texto_biblico='Salmo 23', reflexion='Reflexión', contenido_calendario='{}'
+                )
+                for i in range(cantidad)
+            ])
+
+        # COUNT + página con el usuario en el mismo SELECT
+        respuestas = self.assertConsultasConstantes(2, '/Devocionales/historial/', sembrar, usuario, page_size=50)
+        self.assertEqual(respuestas[-1].json()['count'], 43)
+        self.assertEqual(len(respuestas[-1].json()['results']), 43)
@@ -4,10 +4,11 @@ from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
 from django.shortcuts import render
-import jwt
 import json
 from datetime import datetime
 from Devocionales.models import Devocionales
+from backend.replica import usar_replica
+from Login.middleware import token_requerido
 from django.utils import timezone
 from django.db import transaction
 
@@ -21,22 +22,15 @@ def verificar_rol_admin(usuario_id):
     usuario = Usuario.objects.get(id_usuario=usuario_id)
     return usuario.id_rol.id_rol == 1  # Verifica si es rol 1 (admin)
 
-def obtener_usuario_id(request):
-    auth_header = request.headers.get('Authorization')
-    if not auth_header:
-        raise Exception('Token no proporcionado')
-    
-    token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
-    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-    return payload.get('id_usuario')
-
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class DevocionalesView(View):
     def post(self, request, *args, **kwargs):
         try:
             # Iniciamos una transacción atómica
             with transaction.atomic():
-                usuario_id = obtener_usuario_id(request)
+                usuario_id = request.usuario.id_usuario
                 
                 if not verificar_rol_admin(usuario_id):
                     return JsonResponse({'error': 'No autorizado'}, status=403)
@@ -83,11 +77,14 @@ import json
 from .models import Devocionales
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
+@method_decorator(usar_replica, name='dispatch')
 class HistorialDevocionalesView(View):
     def get(self, request):
         try:
             # Verificar token de autenticación
-            usuario_id = obtener_usuario_id(request)
+            usuario_id = request.usuario.id_usuario
             if not usuario_id:
                 return JsonResponse({'error': 'No autorizado'}, status=401)
             
@@ -100,7 +97,7 @@ class HistorialDevocionalesView(View):
             fecha_fin = request.GET.get('fecha_fin')
 
             # Construir el queryset base
-            devocionales = Devocionales.objects.all().order_by('-fecha_creacion')
+            devocionales = Devocionales.objects.select_related('id_usuario').order_by('-fecha_creacion')
 
             # Aplicar filtros
             if mes:
@@ -169,6 +166,7 @@ MESES_ESPANOL = {
 }
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
 class GenerarPDFDevocional(View):
     def get(self, request, id_devocional):
 
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class EventosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Eventos'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from .catalogos import registrar_cambio_catalogo
+        from .models import EstadoEvento, TipoEvento
+
+        # Cualquier cambio en estado_evento o tipo_evento invalida el registro en memoria de todos los procesos
+        for modelo in (EstadoEvento, TipoEvento):
+            post_save.connect(lambda **kwargs: registrar_cambio_catalogo(), sender=modelo, weak=False)
+            post_delete.connect(lambda **kwargs: registrar_cambio_catalogo(), sender=modelo, weak=False)
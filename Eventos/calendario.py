@@ -0,0 +1,101 @@
+"""
+Calendario mensual de eventos con caché por mes.
+
+Cada mes tiene una versión en ``versiones_catalogo`` (``calendario:AAAA-MM``).
+Las vistas que crean o modifican un evento llaman a ``invalidar_meses`` dentro
+de su transacción, lo que incrementa la versión de los meses afectados junto
+con el cambio. El mes se guarda en la caché de Django bajo una clave que lleva
+la versión, así que cada worker (con su propia LocMemCache) deja de usar la
+copia vieja en cuanto se confirma el cambio, y una copia armada antes de la
+confirmación queda bajo la versión anterior, donde ya nadie la busca.
+"""
+import calendar
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from .catalogos import nombre_estado
+from .models import Evento
+
+
+def _clave(anio, mes, version):
+    return f'calendario:{anio}:{mes:02d}:{version}'
+
+
+def _nombre_version(anio, mes):
+    return f'calendario:{anio}-{mes:02d}'
+
+
+def versiones_meses(meses):
+    """Versión de cada ``(anio, mes)``; 0 si el mes nunca cambió."""
+    nombres = {_nombre_version(anio, mes): (anio, mes) for anio, mes in meses}
+    # Siempre contra la base principal, como la versión de los catálogos
+    with connections['default'].cursor() as cursor:
+        cursor.execute(
+            'SELECT nombre, version FROM versiones_catalogo WHERE nombre = ANY(%s)', [list(nombres)]
+        )
+        versiones = dict(cursor.fetchall())
+    return {mes: versiones.get(nombre, 0) for nombre, mes in nombres.items()}
+
+
+def _como_fecha(fecha):
+    # Recién creado, Evento.fecha todavía es el texto recibido en el POST
+    if isinstance(fecha, str):
+        return datetime.strptime(fecha[:10], '%Y-%m-%d').date()
+    return fecha
+
+
+def _construir_mes(anio, mes):
+    inicio = date(anio, mes, 1)
+    fin = date(anio, mes, calendar.monthrange(anio, mes)[1])
+
+    eventos = Evento.objects.filter(fecha__range=(inicio, fin)).order_by(
+        'fecha', 'hora', 'id_evento'
+    ).values_list(
+        'id_evento', 'nombre', 'fecha', 'hora', 'id_estado', 'id_ministerio__nombre'
+    )
+
+    dias = {}
+    for id_evento, nombre, fecha, hora, id_estado, ministerio in eventos:
+        dias.setdefault(fecha.day, []).append({
+            'id_evento': id_evento,
+            'nombre': nombre,
+            'hora': hora.strftime('%H:%M'),
+            'id_estado': id_estado,
+            'estado': nombre_estado(id_estado),
+            'ministerio': ministerio,
+        })
+    return dias
+
+
+def obtener_mes(anio, mes):
+    """Eventos del mes agrupados por día: ``{dia: [eventos]}``."""
+    clave = _clave(anio, mes, versiones_meses([(anio, mes)])[anio, mes])
+    dias = cache.get(clave)
+    if dias is None:
+        dias = _construir_mes(anio, mes)
+        cache.set(clave, dias, settings.CALENDARIO_TIMEOUT)
+    return dias
+
+
+def invalidar_meses(*fechas):
+    """
+    Incrementa la versión de los meses de ``fechas`` en la transacción en curso;
+    debe llamarse después de escribir el evento. La misma versión invalida los
+    índices de ``horarios.disponibilidad``.
+    """
+    meses = sorted({(f.year, f.month) for f in map(_como_fecha, fechas) if f})
+    if not meses:
+        return
+    # En orden, para que dos transacciones bloqueen las filas en el mismo orden
+    with connections['default'].cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO versiones_catalogo (nombre, version)
+            SELECT unnest(%s::varchar[]), 1
+            ON CONFLICT (nombre) DO UPDATE SET version = versiones_catalogo.version + 1
+            """,
+            [[_nombre_version(anio, mes) for anio, mes in meses]],
+        )
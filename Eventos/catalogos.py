@@ -0,0 +1,107 @@
+"""
+Registro en memoria de las tablas ``estado_evento`` y ``tipo_evento``.
+
+Como los roles (ver ``Login/roles.py``), son tablas de pocas filas que casi nunca
+cambian: se cargan una vez por proceso y las consultas de eventos traen solo
+``id_estado``/``id_tipo_evento``, sin unir con ellas.
+
+Para que los demás procesos se enteren de los cambios, cada escritura en estas
+tablas (señales ``post_save``/``post_delete``) incrementa la versión guardada en
+``versiones_catalogo`` dentro de la misma transacción. El proceso que escribe
+descarta su copia al confirmar; los demás comparan la versión como máximo cada
+CATALOGOS_REVALIDAR segundos y recargan si cambió.
+"""
+import threading
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .models import EstadoEvento, TipoEvento
+
+CATALOGO = 'eventos'
+
+
+class _Catalogo(NamedTuple):
+    version: int
+    estados: dict
+    ids_estado: dict
+    tipos: dict
+
+
+_lock = threading.Lock()
+_catalogo = None
+_revisado_en = 0.0
+
+
+def _version_actual():
+    # Siempre contra la base principal: una réplica atrasada devolvería una versión vieja
+    with connections['default'].cursor() as cursor:
+        cursor.execute('SELECT version FROM versiones_catalogo WHERE nombre = %s', [CATALOGO])
+        fila = cursor.fetchone()
+    return fila[0] if fila else 0
+
+
+def _cargar(version):
+    # La versión se leyó antes que las tablas: si cambian en medio, la próxima revisión recarga
+    estados = dict(EstadoEvento.objects.using('default').values_list('id_estado', 'nombre'))
+    tipos = {
+        tipo['id_tipo_evento']: tipo
+        for tipo in TipoEvento.objects.using('default').order_by('id_tipo_evento').values(
+            'id_tipo_evento', 'nombre', 'descripcion', 'activo'
+        )
+    }
+    return _Catalogo(version, estados, {nombre: id_estado for id_estado, nombre in estados.items()}, tipos)
+
+
+def _vigente():
+    global _catalogo, _revisado_en
+    catalogo = _catalogo
+    if catalogo is not None and time.monotonic() - _revisado_en < settings.CATALOGOS_REVALIDAR:
+        return catalogo
+    with _lock:
+        if _catalogo is None or time.monotonic() - _revisado_en >= settings.CATALOGOS_REVALIDAR:
+            version = _version_actual()
+            if _catalogo is None or version != _catalogo.version:
+                _catalogo = _cargar(version)
+            _revisado_en = time.monotonic()
+        return _catalogo
+
+
+def obtener_id_estado(nombre):
+    """Devuelve el id_estado para el nombre, o None si no existe."""
+    return _vigente().ids_estado.get(nombre)
+
+
+def nombre_estado(id_estado):
+    return _vigente().estados.get(id_estado)
+
+
+def obtener_tipo_evento(id_tipo_evento):
+    """Dict con id_tipo_evento, nombre, descripcion y activo, o None."""
+    return _vigente().tipos.get(id_tipo_evento)
+
+
+def listar_tipos_evento():
+    """Todos los tipos (activos e inactivos) ordenados por id."""
+    return list(_vigente().tipos.values())
+
+
+def invalidar_catalogos():
+    global _catalogo
+    with _lock:
+        _catalogo = None
+
+
+def registrar_cambio_catalogo():
+    """Incrementa la versión compartida y descarta la copia local al confirmar la transacción."""
+    with connections['default'].cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO versiones_catalogo (nombre, version) VALUES (%s, 1)
+            ON CONFLICT (nombre) DO UPDATE SET version = versiones_catalogo.version + 1
+            """,
+            [CATALOGO],
+        )
+    transaction.on_commit(invalidar_catalogos)
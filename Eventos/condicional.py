@@ -0,0 +1,68 @@
+"""
+Validadores ETag para las vistas de eventos.
+
+El detalle de un evento usa ``condition``: el ETag resume max(fecha_actualizacion)
+y la cantidad de filas, y si el cliente ya lo tiene Django responde 304 sin
+ejecutar la vista. Los listados no pueden pagar un agregado sobre todo el
+conjunto en cada página, así que arman el ETag con las filas que ya leyeron
+(``etag_filas``: ids de la página y su última modificación) y
+``respuesta_condicional`` responde 304 antes de serializarlas.
+
+Solo cubre las filas de ``eventos``: cambios en tablas relacionadas (nombre del
+ministerio, de la persona, etc.) no cambian el ETag.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.db.models.functions import Coalesce
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from .models import Evento
+
+
+# Columnas que ``etag_filas`` necesita en las filas del listado
+COLUMNAS_ETAG = ('id_evento', 'fecha_creacion', 'fecha_actualizacion')
+
+
+def etag_filas(filas, *extra):
+    """ETag de una página ya leída (dicts con ``COLUMNAS_ETAG``): sin consultas."""
+    ultima = max((fila['fecha_actualizacion'] or fila['fecha_creacion'] for fila in filas), default=None)
+    clave = repr(([fila['id_evento'] for fila in filas], ultima) + extra)
+    return hashlib.md5(clave.encode()).hexdigest()
+
+
+def respuesta_condicional(request, etag, construir):
+    """304 si el cliente ya tiene ``etag``; si no, la respuesta de ``construir()`` con el ETag."""
+    etag = quote_etag(etag)
+    respuesta = get_conditional_response(request, etag=etag) or construir()
+    if respuesta.status_code in (200, 304):
+        respuesta['ETag'] = etag
+    return respuesta
+
+
+def etag_eventos(queryset, *extra):
+    resumen = queryset.aggregate(
+        ultima=Max(Coalesce('fecha_actualizacion', 'fecha_creacion')),
+        total=Count('id_evento'),
+    )
+    clave = repr((resumen['ultima'], resumen['total']) + extra)
+    return hashlib.md5(clave.encode()).hexdigest()
+
+
+def etag_todos_eventos(request, *args, **kwargs):
+    from .views import ListarTodosEventosView
+
+    if request.GET.get('orden', '-fecha') not in ListarTodosEventosView.ORDENES:
+        return None  # La vista responde el 400
+    try:
+        eventos = ListarTodosEventosView.filtrar(Evento.objects.all(), request.GET)
+    except ValueError:
+        return None
+    # es_mio depende del usuario, y la página del query string
+    usuario = request.usuario.id_usuario if request.usuario else None
+    return etag_eventos(eventos, request.GET.urlencode(), usuario)
+
+
+def etag_evento(request, id_evento, *args, **kwargs):
+    return etag_eventos(Evento.objects.filter(id_evento=id_evento), id_evento)
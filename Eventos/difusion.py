@@ -0,0 +1,220 @@
+"""
+Canal de notificaciones en tiempo real (Server-Sent Events).
+
+Cada conexión SSE abierta se suscribe con una cola asyncio acotada para su
+usuario. Las vistas llaman a ``publicar_notificacion`` al crear una notificación
+y el mensaje se entrega cuando se confirma la transacción, a través del broker
+configurado en NOTIFICACIONES_BROKER:
+
+* ``BrokerMemoria``: reparte dentro del mismo proceso. Sirve con un solo proceso
+  ASGI (desarrollo, pruebas).
+* ``BrokerPostgres``: publica con ``pg_notify`` y cada proceso escucha el canal
+  con LISTEN en un hilo propio, de modo que llega a las conexiones de cualquier
+  proceso o servidor.
+
+Si un cliente no consume y su cola se llena, se vacía y se le envía un evento
+``resincronizar`` para que vuelva a pedir el listado de notificaciones.
+
+EventSource no permite enviar encabezados. En lugar del JWT (que no expira) en
+la URL, el cliente pide un ticket firmado que vale SSE_TICKET_SEGUNDOS y lo
+envía como ``?ticket=`` al abrir el flujo.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+RESINCRONIZAR = {'evento': 'resincronizar'}
+_SAL_TICKET = 'Eventos.difusion.ticket'
+
+
+def emitir_ticket(id_usuario):
+    """Ticket firmado para abrir el flujo SSE del usuario."""
+    return signing.dumps(id_usuario, salt=_SAL_TICKET)
+
+
+def leer_ticket(ticket):
+    """id_usuario del ticket; lanza ``signing.BadSignature`` (o ``SignatureExpired``) si no es válido."""
+    return signing.loads(ticket, salt=_SAL_TICKET, max_age=settings.SSE_TICKET_SEGUNDOS)
+
+
+def _encolar(cola, datos):
+    # Se ejecuta en el hilo del event loop dueño de la cola
+    if cola.full():
+        while not cola.empty():
+            cola.get_nowait()
+        datos = RESINCRONIZAR
+    cola.put_nowait(datos)
+
+
+class BrokerMemoria:
+    """Reparte los mensajes a las suscripciones del proceso actual."""
+
+    def __init__(self):
+        self._suscripciones = {}
+        self._lock = threading.Lock()
+
+    def suscribir(self, id_usuario):
+        """Registra una cola para el usuario; debe llamarse desde el event loop."""
+        cola = asyncio.Queue(maxsize=settings.SSE_COLA_MAX)
+        with self._lock:
+            self._suscripciones.setdefault(id_usuario, set()).add((asyncio.get_running_loop(), cola))
+        return cola
+
+    def desuscribir(self, id_usuario, cola):
+        with self._lock:
+            colas = self._suscripciones.get(id_usuario, set())
+            colas.difference_update({s for s in colas if s[1] is cola})
+            if not colas:
+                self._suscripciones.pop(id_usuario, None)
+
+    def publicar(self, id_usuario, datos):
+        self._repartir(id_usuario, datos)
+
+    def _repartir(self, id_usuario, datos):
+        # Puede llamarse desde cualquier hilo: la cola se toca en su propio loop
+        with self._lock:
+            destinos = list(self._suscripciones.get(id_usuario, ()))
+        for loop, cola in destinos:
+            try:
+                loop.call_soon_threadsafe(_encolar, cola, datos)
+            except RuntimeError:
+                # El loop ya se cerró; la suscripción se limpia al terminar el flujo
+                pass
+
+
+class BrokerPostgres(BrokerMemoria):
+    """Reparte entre procesos con LISTEN/NOTIFY sobre la base de datos ``default``."""
+
+    CANAL = 'notificaciones_sse'
+    # pg_notify rechaza payloads de 8000 bytes o más
+    MAX_PAYLOAD = 7500
+
+    def __init__(self):
+        super().__init__()
+        self._escucha = None
+        self._lock_escucha = threading.Lock()
+
+    def suscribir(self, id_usuario):
+        self._iniciar_escucha()
+        return super().suscribir(id_usuario)
+
+    def publicar(self, id_usuario, datos):
+        mensaje = json.dumps({'id_usuario': id_usuario, 'datos': datos}, cls=DjangoJSONEncoder)
+        if len(mensaje.encode()) > self.MAX_PAYLOAD:
+            # El cliente completa el mensaje desde el listado de notificaciones
+            datos = {k: v for k, v in datos.items() if k != 'mensaje'}
+            mensaje = json.dumps({'id_usuario': id_usuario, 'datos': datos}, cls=DjangoJSONEncoder)
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.CANAL, mensaje])
+
+    def _iniciar_escucha(self):
+        with self._lock_escucha:
+            if self._escucha is None or not self._escucha.is_alive():
+                self._escucha = threading.Thread(target=self._escuchar, name='sse-listen', daemon=True)
+                self._escucha.start()
+
+    def _conectar(self):
+        import psycopg
+
+        parametros = connections['default'].get_connection_params()
+        # Opciones propias de los cursores del ORM, no de la conexión
+        for clave in ('cursor_factory', 'context', 'prepare_threshold'):
+            parametros.pop(clave, None)
+        conexion = psycopg.connect(**parametros, autocommit=True)
+        conexion.execute(f'LISTEN {self.CANAL}')
+        return conexion
+
+    def _escuchar(self):
+        # Conexión propia, fuera del ORM y del pool: queda abierta mientras viva el proceso
+        while True:
+            try:
+                with self._conectar() as conexion:
+                    for aviso in conexion.notifies():
+                        mensaje = json.loads(aviso.payload)
+                        self._repartir(mensaje['id_usuario'], mensaje['datos'])
+            except Exception:
+                logger.exception('Se perdió la escucha de notificaciones; reintentando')
+                time.sleep(5)
+
+
+_broker = None
+_lock_broker = threading.Lock()
+
+
+def obtener_broker():
+    global _broker
+    if _broker is None:
+        with _lock_broker:
+            if _broker is None:
+                _broker = import_string(settings.NOTIFICACIONES_BROKER)()
+    return _broker
+
+
+def datos_notificacion(notificacion):
+    return {
+        'evento': 'notificacion',
+        'id_notificacion': notificacion.id_notificacion,
+        'id_evento': notificacion.id_evento_id,
+        'tipo': notificacion.tipo,
+        'mensaje': notificacion.mensaje,
+        'fecha_creacion': notificacion.fecha_creacion.strftime('%Y-%m-%d %H:%M') if notificacion.fecha_creacion else None,
+    }
+
+
+def publicar_notificaciones(notificaciones):
+    """Envía cada notificación a su destinatario cuando se confirme la transacción."""
+    mensajes = [(n.id_usuario_destino_id, datos_notificacion(n)) for n in notificaciones]
+
+    def _publicar():
+        broker = obtener_broker()
+        for id_usuario, datos in mensajes:
+            try:
+                broker.publicar(id_usuario, datos)
+            except Exception:
+                # La notificación ya quedó guardada; el cliente la verá al refrescar
+                logger.exception('No se pudo publicar la notificación %s', datos['id_notificacion'])
+
+    transaction.on_commit(_publicar)
+
+
+def publicar_notificacion(notificacion):
+    publicar_notificaciones([notificacion])
+
+
+def _formatear(datos):
+    datos = dict(datos)
+    evento = datos.pop('evento')
+    lineas = []
+    if 'id_notificacion' in datos:
+        lineas.append(f"id: {datos['id_notificacion']}")
+    lineas.append(f'event: {evento}')
+    lineas.append(f'data: {json.dumps(datos, cls=DjangoJSONEncoder)}')
+    return '\n'.join(lineas) + '\n\n'
+
+
+async def flujo_notificaciones(id_usuario):
+    """Generador SSE: notificaciones nuevas del usuario y un comentario cada SSE_HEARTBEAT segundos."""
+    broker = obtener_broker()
+    cola = broker.suscribir(id_usuario)
+    try:
+        yield f'retry: {settings.SSE_REINTENTO_MS}\n\n'
+        while True:
+            try:
+                datos = await asyncio.wait_for(cola.get(), timeout=settings.SSE_HEARTBEAT)
+            except asyncio.TimeoutError:
+                # Mantiene viva la conexión a través de proxies y detecta clientes caídos
+                yield ': ping\n\n'
+                continue
+            yield _formatear(datos)
+    finally:
+        broker.desuscribir(id_usuario, cola)
@@ -0,0 +1,345 @@
+"""
+Detección de cruces de horario entre eventos.
+
+Cada evento ocupa la ventana ``[fecha + hora, fecha + hora + duracion)``. Dos
+eventos se cruzan si sus ventanas se solapan y comparten lugar (sin distinguir
+mayúsculas ni espacios) o ministerio. Solo ocupan horario los eventos en
+ESTADOS_OCUPAN; los cancelados, rechazados o pospuestos no bloquean a nadie.
+
+* Al crear o editar, ``comprobar_horario`` consulta la columna generada
+  ``horario`` (tsrange) con los índices GiST de la migración 0007, así que el
+  costo crece con el logaritmo del número de eventos y no con la tabla. Antes
+  de consultar toma los advisory locks de la ventana (``bloquear_horarios``):
+  uno por día y lugar y otro por día y ministerio. Dos eventos que se cruzan
+  comparten al menos uno, así que no pasan ambos la comprobación, y los de
+  otros lugares y ministerios del mismo día no se esperan entre sí.
+* Orden de los locks: primero las filas de ``eventos`` que se van a modificar
+  (``select_for_update``, por id) y después los advisory locks, siempre
+  ordenados por su llave.
+* La aprobación en lote usa ``comprobar_horarios``: bloquea todas las ventanas
+  juntas, las busca en una sola consulta y compara entre sí las del lote en
+  memoria, sin escribir nada hasta el UPDATE final.
+* La consulta de disponibilidad (sin escribir) usa ``disponibilidad``: un árbol
+  de intervalos por lugar y por ministerio para cada mes, guardado en memoria
+  del proceso bajo la versión del mes del calendario (``versiones_meses``). Un
+  ``invalidar_meses`` confirmado cambia la versión y el índice se vuelve a armar
+  en todos los procesos; los árboles no se serializan en ninguna caché.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import connection
+
+from .calendario import versiones_meses
+from .catalogos import obtener_id_estado
+from .models import Evento
+
+ESTADOS_OCUPAN = ('Pendiente', 'Aprobado')
+DURACION_DEFECTO = Evento._meta.get_field('duracion').default
+DURACION_MAX = 24 * 60
+
+_CAMPOS = ('id_evento', 'nombre', 'fecha', 'hora', 'duracion', 'lugar', 'id_ministerio')
+
+
+def ids_estados_ocupan():
+    return [id_estado for id_estado in map(obtener_id_estado, ESTADOS_OCUPAN) if id_estado is not None]
+
+
+def entra_a_ocupar(id_estado, nuevo_id_estado):
+    """Si pasar de ``id_estado`` a ``nuevo_id_estado`` hace que el evento vuelva a ocupar su horario."""
+    ocupan = ids_estados_ocupan()
+    return id_estado not in ocupan and nuevo_id_estado in ocupan
+
+
+def normalizar_lugar(lugar):
+    """Lugar comparable (minúsculas, sin espacios a los lados); None si está vacío."""
+    return (lugar or '').strip().lower() or None
+
+
+def leer_duracion(valor):
+    """Duración en minutos enviada en el formulario; vacío es la duración por defecto."""
+    if valor in ('', None):
+        return DURACION_DEFECTO
+    duracion = int(valor)
+    if not 1 <= duracion <= DURACION_MAX:
+        raise ValueError(f'duracion debe estar entre 1 y {DURACION_MAX} minutos')
+    return duracion
+
+
+def ventana(fecha, hora, duracion=None):
+    """``(inicio, fin)`` del evento; ``fecha`` y ``hora`` pueden llegar como texto del formulario."""
+    if isinstance(fecha, str):
+        fecha = datetime.strptime(fecha[:10], '%Y-%m-%d').date()
+    if isinstance(hora, str):
+        hora = time.fromisoformat(hora)
+    inicio = datetime.combine(fecha, hora)
+    return inicio, inicio + timedelta(minutes=duracion or DURACION_DEFECTO)
+
+
+def _dias(inicio, fin):
+    # La duración máxima es de un día: la ventana toca a lo sumo dos fechas
+    return sorted({inicio.date(), (fin - timedelta(microseconds=1)).date()})
+
+
+def _agregar_conflicto(conflictos, evento, motivo):
+    conflicto = conflictos.get(evento['id_evento'])
+    if conflicto is None:
+        conflicto = conflictos[evento['id_evento']] = {**evento, 'motivos': []}
+    conflicto['motivos'].append(motivo)
+
+
+def _llave(clave):
+    # Entero de 64 bits para pg_advisory_xact_lock(bigint): ordenar por la llave
+    # es ordenar por el lock mismo, aunque dos claves coincidan en el hash
+    return int.from_bytes(hashlib.blake2b(clave.encode(), digest_size=8).digest(), 'big', signed=True)
+
+
+def _llaves_ventana(inicio, fin, lugar, id_ministerio):
+    llaves = set()
+    for dia in _dias(inicio, fin):
+        if lugar:
+            llaves.add(_llave(f'horario_eventos:{dia.isoformat()}:lugar:{lugar}'))
+        llaves.add(_llave(f'horario_eventos:{dia.isoformat()}:ministerio:{id_ministerio}'))
+    return llaves
+
+
+def bloquear_horarios(ventanas):
+    """
+    Toma en orden los advisory locks de cada ``(inicio, fin, lugar, id_ministerio)``.
+    Deben estar ya bloqueadas las filas de los eventos que se modifican; los locks
+    se liberan al confirmar la transacción.
+    """
+    llaves = set()
+    for inicio, fin, lugar, id_ministerio in ventanas:
+        llaves |= _llaves_ventana(inicio, fin, normalizar_lugar(lugar), id_ministerio)
+    with connection.cursor() as cursor:
+        for llave in sorted(llaves):
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [llave])
+
+
+def comprobar_horario(inicio, fin, lugar, id_ministerio, excluir=None):
+    """
+    Eventos que ocupan el mismo lugar o ministerio en la ventana, con ``motivos``
+    (``'lugar'``, ``'ministerio'``). Debe llamarse dentro de la transacción que
+    guarda el evento, con su fila ya bloqueada si existe.
+    """
+    bloquear_horarios([(inicio, fin, lugar, id_ministerio)])
+    lugar = normalizar_lugar(lugar)
+    estados = ids_estados_ocupan()
+    with connection.cursor() as cursor:
+        # Cada rama usa su índice GiST (lugar + horario, ministerio + horario)
+        cursor.execute(
+            f"""
+            SELECT {', '.join(_CAMPOS)}, 'lugar' FROM eventos
+            WHERE btrim(lugar) <> '' AND lower(btrim(lugar)) = %s
+              AND horario && tsrange(%s, %s, '[)') AND id_estado = ANY(%s) AND id_evento <> %s
+            UNION ALL
+            SELECT {', '.join(_CAMPOS)}, 'ministerio' FROM eventos
+            WHERE id_ministerio = %s
+              AND horario && tsrange(%s, %s, '[)') AND id_estado = ANY(%s) AND id_evento <> %s
+            ORDER BY fecha, hora, id_evento
+            """,
+            [
+                lugar, inicio, fin, estados, excluir or 0,
+                id_ministerio, inicio, fin, estados, excluir or 0,
+            ],
+        )
+        filas = cursor.fetchall()
+
+    conflictos = {}
+    for *valores, motivo in filas:
+        _agregar_conflicto(conflictos, dict(zip(_CAMPOS, valores)), motivo)
+    return list(conflictos.values())
+
+
+def comprobar_horarios(eventos):
+    """
+    ``comprobar_horario`` de varios eventos que pasan a ocupar su horario en la
+    misma transacción (instancias con los campos de ``_CAMPOS`` y sus filas ya
+    bloqueadas). Cada uno choca con los eventos guardados y con los anteriores de
+    la lista que no tuvieron conflictos. Devuelve ``{id_evento: conflictos}`` de
+    los que chocan.
+    """
+    if not eventos:
+        return {}
+    datos = [
+        {campo: getattr(evento, 'id_ministerio_id' if campo == 'id_ministerio' else campo) for campo in _CAMPOS}
+        for evento in eventos
+    ]
+    ventanas = [ventana(dato['fecha'], dato['hora'], dato['duracion']) for dato in datos]
+    lugares = [normalizar_lugar(dato['lugar']) for dato in datos]
+    bloquear_horarios([
+        (inicio, fin, dato['lugar'], dato['id_ministerio']) for dato, (inicio, fin) in zip(datos, ventanas)
+    ])
+
+    campos = ', '.join(f'e.{campo}' for campo in _CAMPOS)
+    with connection.cursor() as cursor:
+        # Cada rama recorre las ventanas del lote con su índice GiST
+        cursor.execute(
+            f"""
+            WITH lote AS (
+                SELECT * FROM unnest(%s::int[], %s::timestamp[], %s::timestamp[], %s::text[], %s::int[])
+                    AS lote(id_lote, inicio, fin, lugar, id_ministerio)
+            )
+            SELECT lote.id_lote, {campos}, 'lugar' FROM lote JOIN eventos e
+              ON btrim(e.lugar) <> '' AND lower(btrim(e.lugar)) = lote.lugar
+             AND e.horario && tsrange(lote.inicio, lote.fin, '[)')
+            WHERE e.id_estado = ANY(%s) AND e.id_evento <> lote.id_lote
+            UNION ALL
+            SELECT lote.id_lote, {campos}, 'ministerio' FROM lote JOIN eventos e
+              ON e.id_ministerio = lote.id_ministerio
+             AND e.horario && tsrange(lote.inicio, lote.fin, '[)')
+            WHERE e.id_estado = ANY(%s) AND e.id_evento <> lote.id_lote
+            ORDER BY fecha, hora, id_evento
+            """,
+            [
+                [dato['id_evento'] for dato in datos],
+                [inicio for inicio, _ in ventanas],
+                [fin for _, fin in ventanas],
+                lugares,
+                [dato['id_ministerio'] for dato in datos],
+                ids_estados_ocupan(),
+                ids_estados_ocupan(),
+            ],
+        )
+        filas = cursor.fetchall()
+
+    conflictos = {dato['id_evento']: {} for dato in datos}
+    for id_lote, *valores, motivo in filas:
+        _agregar_conflicto(conflictos[id_lote], dict(zip(_CAMPOS, valores)), motivo)
+
+    resultado = {}
+    aceptados = []
+    for dato, (inicio, fin), lugar in zip(datos, ventanas, lugares):
+        propios = conflictos[dato['id_evento']]
+        for otro, (otro_inicio, otro_fin), otro_lugar in aceptados:
+            if otro_inicio < fin and inicio < otro_fin:
+                if lugar and lugar == otro_lugar:
+                    _agregar_conflicto(propios, otro, 'lugar')
+                if dato['id_ministerio'] == otro['id_ministerio']:
+                    _agregar_conflicto(propios, otro, 'ministerio')
+        if propios:
+            resultado[dato['id_evento']] = sorted(
+                propios.values(), key=itemgetter('fecha', 'hora', 'id_evento')
+            )
+        else:
+            aceptados.append((dato, (inicio, fin), lugar))
+    return resultado
+
+
+class ArbolIntervalos:
+    """
+    Árbol de intervalos ``[inicio, fin)`` estático: los intervalos ordenados por
+    inicio forman un árbol binario balanceado implícito (la raíz de cada tramo es
+    su elemento central) y cada nodo guarda el mayor fin de su subárbol.
+    ``solapados`` descarta subárboles completos y cuesta O(log n + k).
+    """
+
+    def __init__(self, intervalos):
+        intervalos = sorted(intervalos, key=itemgetter(0))
+        self.inicios = [intervalo[0] for intervalo in intervalos]
+        self.fines = [intervalo[1] for intervalo in intervalos]
+        self.datos = [intervalo[2] for intervalo in intervalos]
+        self.max_fin = list(self.fines)
+        self._aumentar(0, len(intervalos))
+
+    def _aumentar(self, desde, hasta):
+        if desde >= hasta:
+            return None
+        medio = (desde + hasta) // 2
+        for fin in (self._aumentar(desde, medio), self._aumentar(medio + 1, hasta)):
+            if fin is not None and fin > self.max_fin[medio]:
+                self.max_fin[medio] = fin
+        return self.max_fin[medio]
+
+    def __len__(self):
+        return len(self.inicios)
+
+    def solapados(self, inicio, fin):
+        resultado = []
+        pendientes = [(0, len(self.inicios))]
+        while pendientes:
+            desde, hasta = pendientes.pop()
+            if desde >= hasta:
+                continue
+            medio = (desde + hasta) // 2
+            if self.max_fin[medio] <= inicio:
+                # Nada en este subárbol termina después del inicio
+                continue
+            pendientes.append((desde, medio))
+            if self.inicios[medio] < fin:
+                if self.fines[medio] > inicio:
+                    resultado.append(self.datos[medio])
+                # A la derecha todos empiezan después de este nodo
+                pendientes.append((medio + 1, hasta))
+        return resultado
+
+
+def _construir_mes(anio, mes):
+    inicio = date(anio, mes, 1)
+    fin = date(anio + mes // 12, mes % 12 + 1, 1)
+    por_lugar, por_ministerio = {}, {}
+    eventos = Evento.objects.filter(
+        fecha__gte=inicio, fecha__lt=fin, id_estado__in=ids_estados_ocupan()
+    ).values(*_CAMPOS)
+    for evento in eventos:
+        intervalo = (*ventana(evento['fecha'], evento['hora'], evento['duracion']), evento)
+        lugar = normalizar_lugar(evento['lugar'])
+        if lugar:
+            por_lugar.setdefault(lugar, []).append(intervalo)
+        por_ministerio.setdefault(evento['id_ministerio'], []).append(intervalo)
+    return {
+        'lugares': {lugar: ArbolIntervalos(intervalos) for lugar, intervalos in por_lugar.items()},
+        'ministerios': {id_min: ArbolIntervalos(intervalos) for id_min, intervalos in por_ministerio.items()},
+    }
+
+
+# Índices del proceso por (anio, mes, version), del menos al más usado recientemente
+_indices = OrderedDict()
+_lock_indices = threading.Lock()
+
+
+def _indice_mes(anio, mes, version):
+    clave = (anio, mes, version)
+    with _lock_indices:
+        indice = _indices.get(clave)
+        if indice is not None:
+            _indices.move_to_end(clave)
+            return indice
+    # Se arma fuera del lock; la versión se leyó antes, así que los datos son al menos de esa versión
+    indice = _construir_mes(anio, mes)
+    with _lock_indices:
+        for vieja in [c for c in _indices if c[:2] == (anio, mes) and c[2] < version]:
+            del _indices[vieja]
+        _indices[clave] = indice
+        while len(_indices) > settings.HORARIOS_MESES_EN_MEMORIA:
+            _indices.popitem(last=False)
+    return indice
+
+
+def disponibilidad(inicio, fin, lugar=None, id_ministerio=None, excluir=None):
+    """
+    Como ``comprobar_horario`` pero sin bloquear: una consulta de versiones y,
+    solo si algún mes cambió, la que vuelve a armar su índice.
+    """
+    lugar = normalizar_lugar(lugar)
+    # Un evento que se cruza empieza como muy pronto el día anterior al inicio
+    meses = sorted({(dia.year, dia.month) for dia in (inicio.date() - timedelta(days=1), *_dias(inicio, fin))})
+    versiones = versiones_meses(meses)
+    conflictos = {}
+    for anio, mes in meses:
+        indice = _indice_mes(anio, mes, versiones[anio, mes])
+        arboles = []
+        if lugar and lugar in indice['lugares']:
+            arboles.append(('lugar', indice['lugares'][lugar]))
+        if id_ministerio is not None and id_ministerio in indice['ministerios']:
+            arboles.append(('ministerio', indice['ministerios'][id_ministerio]))
+        for motivo, arbol in arboles:
+            for evento in arbol.solapados(inicio, fin):
+                if evento['id_evento'] != excluir:
+                    _agregar_conflicto(conflictos, evento, motivo)
+    return sorted(conflictos.values(), key=itemgetter('fecha', 'hora', 'id_evento'))
@@ -0,0 +1,65 @@
+"""Datos temporales para los comandos de medición de Eventos."""
+import time
+from contextlib import contextmanager
+from datetime import date, time as hora, timedelta
+
+from django.db import transaction
+
+from Eventos.catalogos import obtener_id_estado
+from Eventos.models import Evento, TipoEvento
+from Login.middleware import UsuarioToken
+from Login.models import Persona, Rol, Usuario
+from Ministerio.models import Ministerio
+
+
+class _Revertir(Exception):
+    pass
+
+
+@contextmanager
+def datos_temporales():
+    """Transacción que siempre se revierte: nada de lo sembrado queda en la base."""
+    try:
+        with transaction.atomic():
+            yield
+            raise _Revertir
+    except _Revertir:
+        pass
+
+
+def crear_creador(prefijo='medicion'):
+    """Persona, usuario Pastor y ministerio para colgar los eventos sembrados."""
+    persona = Persona.objects.create(nombres='Medición', apellidos=prefijo)
+    rol = Rol.objects.get(rol='Pastor')
+    usuario = Usuario.objects.create(
+        id_rol=rol, id_persona=persona, usuario=f'{prefijo}_{time.time_ns()}', contrasenia='!', activo=True
+    )
+    ministerio = Ministerio.objects.create(nombre=f'Ministerio {prefijo}', id_lider1=usuario)
+    return usuario, ministerio, UsuarioToken(usuario.id_usuario, rol.rol, rol.id_rol)
+
+
+def sembrar_eventos(cantidad, ministerio, usuario, **campos):
+    """Agrega ``cantidad`` eventos aprobados repartidos en dos años, por lotes."""
+    id_tipo = TipoEvento.objects.values_list('id_tipo_evento', flat=True).first()
+    id_estado = obtener_id_estado('Aprobado')
+    for desde in range(0, cantidad, 5000):
+        Evento.objects.bulk_create([
+            Evento(
+                nombre=f'Evento {i}', id_ministerio=ministerio, descripcion='Medición',
+                fecha=date(2025, 1, 1) + timedelta(days=i % 730), hora=hora(8 + i % 12, 0),
+                lugar=f'Salón {i % 50}', id_usuario=usuario, id_estado_id=id_estado,
+                id_tipo_evento_id=id_tipo, **campos,
+            )
+            for i in range(desde, min(desde + 5000, cantidad))
+        ])
+
+
+def milisegundos(funcion, repeticiones):
+    """Mediana en ms de ``repeticiones`` llamadas."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    tiempos.sort()
+    return tiempos[len(tiempos) // 2] * 1000
@@ -0,0 +1,114 @@
+"""
+Prueba de carga del check-in en lote (``MarcarAsistenciaView``).
+
+Crea un evento aprobado con ``--participantes`` inscritos confirmados y los marca
+en lotes de ``--lote`` desde ``--concurrencia`` hilos, cada uno con su propia
+conexión, como varios lectores de puerta a la vez. Al final comprueba que todos
+hayan quedado con asistencia y muestra los check-ins por segundo y la latencia
+de cada lote. Los datos se crean confirmados (los hilos no verían una
+transacción sin confirmar) y se borran al terminar::
+
+    python manage.py carga_asistencia --participantes 5000 --lote 50 --concurrencia 8
+"""
+import json
+import queue
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from Eventos.models import Evento, ParticipantesEvento
+from Login.models import Persona, Rol, Usuario
+from ._datos import crear_creador, sembrar_eventos
+
+
+class Command(BaseCommand):
+    help = 'Marca la asistencia de miles de participantes en lotes simultáneos y mide check-ins por segundo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--participantes', type=int, default=5000)
+        parser.add_argument('--lote', type=int, default=50)
+        parser.add_argument('--concurrencia', type=int, default=8)
+
+    def handle(self, *args, **options):
+        cantidad = options['participantes']
+        usuario, ministerio, token = crear_creador('asistencia')
+        personas = Persona.objects.bulk_create([
+            Persona(nombres='Asistencia', apellidos=str(i)) for i in range(cantidad)
+        ])
+        id_rol = Rol.objects.get(rol='Lider').id_rol
+        inscritos = Usuario.objects.bulk_create([
+            Usuario(id_rol_id=id_rol, id_persona=p, usuario=f'asistencia_{p.id_persona}', contrasenia='!', activo=True)
+            for p in personas
+        ])
+        sembrar_eventos(1, ministerio, usuario)
+        evento = Evento.objects.get(id_ministerio=ministerio)
+        ParticipantesEvento.objects.bulk_create([
+            ParticipantesEvento(id_evento=evento, id_usuario=inscrito) for inscrito in inscritos
+        ], batch_size=5000)
+        try:
+            ids = [inscrito.id_usuario for inscrito in inscritos]
+            lotes = [ids[i:i + options['lote']] for i in range(0, len(ids), options['lote'])]
+            duracion, latencias, estados = self.marcar(evento, token, lotes, options['concurrencia'])
+            self.informar(evento, cantidad, len(lotes), duracion, latencias, estados)
+        finally:
+            evento.delete()
+            ministerio.delete()
+            Usuario.objects.filter(pk__in=[u.pk for u in inscritos] + [usuario.pk]).delete()
+            Persona.objects.filter(pk__in=[p.pk for p in personas] + [usuario.id_persona_id]).delete()
+
+    def marcar(self, evento, token, lotes, concurrencia):
+        url = reverse('marcar_asistencia', kwargs={'id_evento': evento.id_evento})
+        vista = resolve(url).func
+        fabrica = RequestFactory()
+        pendientes = queue.SimpleQueue()
+        for lote in lotes:
+            pendientes.put(lote)
+        latencias, estados = [], {}
+        inicio = threading.Barrier(concurrencia + 1)
+
+        def trabajar():
+            try:
+                inicio.wait()
+                while True:
+                    try:
+                        lote = pendientes.get_nowait()
+                    except queue.Empty:
+                        return
+                    request = fabrica.post(url, json.dumps({'ids': lote}), content_type='application/json')
+                    request.usuario = token
+                    antes = time.perf_counter()
+                    respuesta = vista(request, id_evento=evento.id_evento)
+                    latencias.append(time.perf_counter() - antes)
+                    estados[respuesta.status_code] = estados.get(respuesta.status_code, 0) + 1
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=trabajar) for _ in range(concurrencia)]
+        for hilo in hilos:
+            hilo.start()
+        inicio.wait()
+        antes = time.perf_counter()
+        for hilo in hilos:
+            hilo.join()
+        return time.perf_counter() - antes, latencias, estados
+
+    def informar(self, evento, cantidad, lotes, duracion, latencias, estados):
+        marcados = ParticipantesEvento.objects.filter(id_evento=evento, asistencia=True).count()
+
+        latencias = sorted(latencias)
+        p95 = latencias[max(int(len(latencias) * 0.95) - 1, 0)]
+        self.stdout.write(
+            f'{cantidad} check-ins en {lotes} lotes, {duracion:.2f} s ({cantidad / duracion:.0f}/s), '
+            f'estados HTTP {estados}'
+        )
+        self.stdout.write(
+            f'latencia por lote ms: mediana {statistics.median(latencias) * 1000:.1f}, '
+            f'p95 {p95 * 1000:.1f}, máx {latencias[-1] * 1000:.1f}'
+        )
+        if marcados != cantidad:
+            raise CommandError(f'Quedaron marcados {marcados} de {cantidad}')
@@ -0,0 +1,119 @@
+"""
+Prueba de carga de inscripciones simultáneas a un evento con cupo.
+
+Crea un evento aprobado con ``--cupo`` plazas (como ``CrearEventoView``) y
+``--inscripciones`` usuarios, y cada usuario se inscribe a sí mismo con
+``RegistrarParticipantesView`` desde ``--concurrencia`` hilos, cada uno con su
+propia conexión. Todos arrancan a la vez, de modo que compiten por las plazas del
+evento. Al final comprueba que los confirmados sean exactamente
+``min(cupo, inscritos)`` y que coincidan con las plazas ocupadas, y muestra la
+latencia de las peticiones. Cada hilo abre una conexión, así que
+``--concurrencia`` debe quedar por debajo de ``max_connections``. Los datos se
+crean confirmados (los hilos no verían una transacción sin confirmar) y se borran
+al terminar::
+
+    python manage.py carga_inscripciones --inscripciones 500 --concurrencia 50 --cupo 100
+"""
+import queue
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from Eventos.models import Evento, ParticipantesEvento
+from Eventos.participantes import crear_plazas
+from Login.middleware import UsuarioToken
+from Login.models import Persona, Rol, Usuario
+from ._datos import crear_creador, sembrar_eventos
+
+
+class Command(BaseCommand):
+    help = 'Inscribe cientos de usuarios a la vez en un evento con cupo y verifica que no se supere.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inscripciones', type=int, default=500)
+        parser.add_argument('--concurrencia', type=int, default=50)
+        parser.add_argument('--cupo', type=int, default=100)
+
+    def handle(self, *args, **options):
+        cantidad, cupo = options['inscripciones'], options['cupo']
+        usuario, ministerio, _ = crear_creador('carga')
+        personas = Persona.objects.bulk_create([
+            Persona(nombres='Carga', apellidos=str(i)) for i in range(cantidad)
+        ])
+        id_rol = Rol.objects.get(rol='Lider').id_rol
+        inscritos = Usuario.objects.bulk_create([
+            Usuario(id_rol_id=id_rol, id_persona=p, usuario=f'carga_{p.id_persona}', contrasenia='!', activo=True)
+            for p in personas
+        ])
+        sembrar_eventos(1, ministerio, usuario, cupo=cupo)
+        evento = Evento.objects.get(id_ministerio=ministerio)
+        crear_plazas(evento.id_evento)
+        try:
+            duracion, latencias, estados = self.inscribir(evento, inscritos, options['concurrencia'])
+            self.informar(evento, cantidad, cupo, duracion, latencias, estados)
+        finally:
+            evento.delete()
+            ministerio.delete()
+            Usuario.objects.filter(pk__in=[u.pk for u in inscritos] + [usuario.pk]).delete()
+            Persona.objects.filter(pk__in=[p.pk for p in personas] + [usuario.id_persona_id]).delete()
+
+    def inscribir(self, evento, inscritos, concurrencia):
+        url = reverse('registrar_participantes', kwargs={'id_evento': evento.id_evento})
+        vista = resolve(url).func
+        fabrica = RequestFactory()
+        pendientes = queue.SimpleQueue()
+        for inscrito in inscritos:
+            pendientes.put(inscrito.id_usuario)
+        latencias, estados = [], {}
+        inicio = threading.Barrier(concurrencia + 1)
+
+        def trabajar():
+            try:
+                inicio.wait()
+                while True:
+                    try:
+                        id_usuario = pendientes.get_nowait()
+                    except queue.Empty:
+                        return
+                    request = fabrica.post(url, '{}', content_type='application/json')
+                    request.usuario = UsuarioToken(id_usuario, 'Lider', None)
+                    antes = time.perf_counter()
+                    respuesta = vista(request, id_evento=evento.id_evento)
+                    latencias.append(time.perf_counter() - antes)
+                    estados[respuesta.status_code] = estados.get(respuesta.status_code, 0) + 1
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=trabajar) for _ in range(concurrencia)]
+        for hilo in hilos:
+            hilo.start()
+        inicio.wait()
+        antes = time.perf_counter()
+        for hilo in hilos:
+            hilo.join()
+        return time.perf_counter() - antes, latencias, estados
+
+    def informar(self, evento, cantidad, cupo, duracion, latencias, estados):
+        participantes = ParticipantesEvento.objects.filter(id_evento=evento)
+        confirmados = participantes.filter(en_espera=False).count()
+        en_espera = participantes.filter(en_espera=True).count()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(id_participacion) FROM plazas_evento WHERE id_evento = %s', [evento.id_evento])
+            ocupados = cursor.fetchone()[0]
+
+        latencias = sorted(latencias)
+        p95 = latencias[int(len(latencias) * 0.95) - 1]
+        self.stdout.write(f'{cantidad} inscripciones en {duracion:.2f} s ({cantidad / duracion:.0f}/s), estados HTTP {estados}')
+        self.stdout.write(
+            f'latencia ms: mediana {statistics.median(latencias) * 1000:.1f}, '
+            f'p95 {p95 * 1000:.1f}, máx {latencias[-1] * 1000:.1f}'
+        )
+        self.stdout.write(f'cupo {cupo}: confirmados {confirmados}, en espera {en_espera}, plazas ocupadas {ocupados}')
+        inscritos = estados.get(201, 0)
+        if confirmados != min(cupo, inscritos) or ocupados != confirmados or confirmados + en_espera != inscritos:
+            raise CommandError('Las inscripciones no respetaron el cupo')
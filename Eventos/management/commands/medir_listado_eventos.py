@@ -0,0 +1,86 @@
+"""
+Benchmark de ``ListarEventosView`` (``/Eventos/eventos/``) con volúmenes crecientes.
+
+Para cada volumen siembra eventos dentro de una transacción que se revierte y
+mide la mediana de latencia y las consultas de:
+
+* ``antes``: el listado original, que resolvía estado, ministerio y persona
+  del creador fila por fila (4N+1 consultas); solo hasta ``--antes-max``;
+* ``completo``: la vista actual sin paginar (una consulta; crece con N porque
+  la respuesta crece con N);
+* ``página``: la primera página con ``?limit=50`` (una consulta);
+* ``última``: la última página, con el cursor de la fila anterior (el WHERE del
+  cursor recorre el índice desde ahí, sin OFFSET).
+
+    python manage.py medir_listado_eventos --volumenes 100 1000 10000 50000
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from Eventos.models import Evento
+from Eventos.paginacion import cursor_de_fila
+from Eventos.views import ListarEventosView
+from ._datos import crear_creador, datos_temporales, milisegundos, sembrar_eventos
+
+
+def listar_como_antes():
+    # Copia del cuerpo original de ListarEventosView (sin select_related)
+    return [
+        {
+            'id_evento': e.id_evento,
+            'nombre': e.nombre,
+            'descripcion': e.descripcion,
+            'fecha': e.fecha,
+            'hora': e.hora,
+            'lugar': e.lugar,
+            'estado': e.id_estado.nombre,
+            'id_ministerio': e.id_ministerio.id_ministerio,
+            'ministerio': e.id_ministerio.nombre,
+            'usuario': f"{e.id_usuario.id_persona.nombres} {e.id_usuario.id_persona.apellidos}"
+        }
+        for e in Evento.objects.all().order_by('id_evento')
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Mide la latencia de /Eventos/eventos/ de 100 a 50.000 eventos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--volumenes', type=int, nargs='+', default=[100, 1000, 10000, 50000])
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--antes-max', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        vista = ListarEventosView.as_view()
+        fabrica = RequestFactory()
+        completo = fabrica.get('/Eventos/eventos/')
+        pagina = fabrica.get('/Eventos/eventos/', {'limit': 50})
+
+        self.stdout.write(f'{"eventos":>8}  {"modo":<9}{"consultas":>10}{"mediana (ms)":>14}')
+        with datos_temporales():
+            usuario, ministerio, principal = crear_creador('listado')
+            completo.usuario = pagina.usuario = principal
+            sembrados = 0
+            for volumen in sorted(options['volumenes']):
+                sembrar_eventos(volumen - sembrados, ministerio, usuario)
+                sembrados = volumen
+                total = Evento.objects.count()
+                anterior = Evento.objects.order_by(*ListarEventosView.ORDEN).values('id_evento')[max(total - 51, 0)]
+                ultima = fabrica.get('/Eventos/eventos/', {
+                    'limit': 50, 'cursor': cursor_de_fila(anterior, ListarEventosView.ORDEN),
+                })
+                ultima.usuario = principal
+
+                modos = [
+                    ('completo', lambda: vista(completo)), ('página', lambda: vista(pagina)),
+                    ('última', lambda: vista(ultima)),
+                ]
+                if total <= options['antes_max']:
+                    modos.insert(0, ('antes', listar_como_antes))
+                for modo, funcion in modos:
+                    with CaptureQueriesContext(connection) as consultas:
+                        funcion()
+                    ms = milisegundos(funcion, options['repeticiones'])
+                    self.stdout.write(f'{total:>8}  {modo:<9}{len(consultas):>10}{ms:>14.1f}')
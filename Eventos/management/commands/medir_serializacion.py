@@ -0,0 +1,53 @@
+"""
+Benchmark de la serialización JSON de los listados de eventos.
+
+Siembra eventos dentro de una transacción que se revierte, arma las filas como
+``ListarTodosEventosView`` (``SerializadorEvento(TODOS_EVENTOS)``) y mide la
+mediana en ms, escalada a 10.000 eventos, de codificar la respuesta con:
+
+* ``JsonResponse``: ``json`` + ``DjangoJSONEncoder`` (lo que usaban las vistas);
+* ``RespuestaJSON``: ``a_json`` (orjson con las fechas por el hook de Django);
+* ``orjson nativo``: orjson formateando él mismo las fechas, como referencia del
+  costo de conservar el formato (no se usa: pierde los milisegundos).
+
+    python manage.py medir_serializacion --eventos 10000
+"""
+import json
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from backend.respuestas import a_json, orjson
+from Eventos.models import Evento
+from Eventos.serializacion import TODOS_EVENTOS, SerializadorEvento
+from ._datos import crear_creador, datos_temporales, milisegundos, sembrar_eventos
+
+
+class Command(BaseCommand):
+    help = 'Mide el costo de serializar a JSON los listados de eventos (ms por 10.000 eventos).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--eventos', type=int, default=10000)
+        parser.add_argument('--repeticiones', type=int, default=21)
+
+    def handle(self, *args, **options):
+        serializador = SerializadorEvento(TODOS_EVENTOS)
+        with datos_temporales():
+            usuario, ministerio, _ = crear_creador('serializacion')
+            sembrar_eventos(options['eventos'], ministerio, usuario)
+            filas = list(serializador.proyectar(Evento.objects.filter(id_ministerio=ministerio), ['-fecha']))
+        datos = {'eventos': serializador.serializar(filas)}
+
+        codificadores = [
+            ('JsonResponse', lambda: json.dumps(datos, cls=DjangoJSONEncoder).encode()),
+            ('RespuestaJSON', lambda: a_json(datos)),
+        ]
+        if orjson is not None:
+            codificadores.append(('orjson nativo', lambda: orjson.dumps(datos)))
+
+        escala = 10000 / len(filas)
+        self.stdout.write(f'{len(filas)} eventos, {len(a_json(datos)) // 1024} KiB')
+        self.stdout.write(f'{"codificador":<15}{"ms / 10k eventos":>18}')
+        for nombre, funcion in codificadores:
+            ms = milisegundos(funcion, options['repeticiones']) * escala
+            self.stdout.write(f'{nombre:<15}{ms:>18.1f}')
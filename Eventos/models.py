@@ -38,6 +38,8 @@ class Evento(models.Model):
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
     id_tipo_evento = models.ForeignKey(TipoEvento, models.DO_NOTHING, db_column='id_tipo_evento', blank=True, null=True)
+    cupo = models.IntegerField(blank=True, null=True)  # None: sin límite de participantes
+    duracion = models.IntegerField(default=120)  # minutos; la columna generada horario no se mapea
 
     class Meta:
         managed = False
@@ -61,6 +63,7 @@ class ParticipantesEvento(models.Model):
     id_usuario = models.ForeignKey(Usuario, models.DO_NOTHING, db_column='id_usuario')
     fecha_registro = models.DateTimeField(auto_now_add=True)
     asistencia = models.BooleanField(blank=True, null=True)
+    en_espera = models.BooleanField(default=False)
 
     class Meta:
         managed = False
@@ -88,3 +91,13 @@ class Notificaciones(models.Model):
             self.fecha_creacion = timezone.now()
         super().save(*args, **kwargs)
 
+
+# Contador de notificaciones no leídas por usuario (ver Eventos/notificaciones.py)
+class NotificacionesNoLeidas(models.Model):
+    id_usuario = models.OneToOneField(Usuario, models.DO_NOTHING, db_column='id_usuario', primary_key=True)
+    total = models.IntegerField(default=0)
+
+    class Meta:
+        managed = False
+        db_table = 'notificaciones_no_leidas'
+
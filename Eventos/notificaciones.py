@@ -0,0 +1,142 @@
+"""
+Contador de notificaciones no leídas por usuario.
+
+La insignia de la barra de navegación consulta una sola fila de
+``notificaciones_no_leidas`` en lugar de contar sobre ``notificaciones``. Toda
+vista que cree notificaciones sin leer o las marque como leídas debe ajustar el
+contador con ``sumar_no_leidas`` dentro de la misma transacción.
+
+``notificar_responsables`` reparte un aviso de cambio de estado de un evento a
+los líderes de su ministerio y a todos los pastores: una consulta para resolver
+los destinatarios, un INSERT masivo y un solo ajuste de contadores, también
+cuando se cambian varios eventos a la vez.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+
+from Login.models import Usuario
+from Login.roles import obtener_id_rol
+from .difusion import publicar_notificaciones
+from .models import Notificaciones, NotificacionesNoLeidas
+
+
+def sumar_no_leidas(id_usuario, cantidad=1):
+    """Suma ``cantidad`` (negativa para restar) al contador del usuario, sin bajar de 0."""
+    if not id_usuario or not cantidad:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO notificaciones_no_leidas (id_usuario, total)
+            VALUES (%s, GREATEST(%s, 0))
+            ON CONFLICT (id_usuario) DO UPDATE
+            SET total = GREATEST(notificaciones_no_leidas.total + %s, 0)
+            """,
+            [id_usuario, cantidad, cantidad],
+        )
+
+
+def sumar_no_leidas_varios(ids_usuario):
+    """Suma 1 al contador por cada aparición del usuario en ``ids_usuario``, en una sola sentencia."""
+    ids_usuario = list(ids_usuario)
+    if not ids_usuario:
+        return
+    # Agrupado: ON CONFLICT no admite tocar dos veces la misma fila en una sentencia
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO notificaciones_no_leidas (id_usuario, total)
+            SELECT id, COUNT(*) FROM unnest(%s::int[]) AS id GROUP BY id
+            ON CONFLICT (id_usuario) DO UPDATE
+            SET total = notificaciones_no_leidas.total + EXCLUDED.total
+            """,
+            [ids_usuario],
+        )
+
+
+def contar_no_leidas(id_usuario):
+    total = NotificacionesNoLeidas.objects.filter(id_usuario_id=id_usuario).values_list('total', flat=True).first()
+    return total or 0
+
+
+def crear_notificaciones(notificaciones):
+    """Inserta las notificaciones en un solo INSERT, ajusta los contadores y las publica."""
+    if not notificaciones:
+        return []
+    notificaciones = Notificaciones.objects.bulk_create(notificaciones)
+    sumar_no_leidas_varios(n.id_usuario_destino_id for n in notificaciones)
+    publicar_notificaciones(notificaciones)
+    return notificaciones
+
+
+def destinatarios_por_ministerio(ids_ministerio):
+    """
+    ``{id_ministerio: {id_usuario, ...}}`` con los líderes activos de cada
+    ministerio y todos los pastores activos, resuelto en una sola consulta.
+    """
+    ids_ministerio = set(ids_ministerio)
+    filtro = Q(ministerio__id_ministerio__in=ids_ministerio) | Q(
+        ministerio_id_lider2_set__id_ministerio__in=ids_ministerio
+    )
+    id_rol_pastor = obtener_id_rol('Pastor')
+    if id_rol_pastor is not None:
+        filtro |= Q(id_rol_id=id_rol_pastor)
+
+    filas = Usuario.objects.filter(filtro, activo=True).values_list(
+        'id_usuario', 'id_rol_id', 'ministerio__id_ministerio', 'ministerio_id_lider2_set__id_ministerio'
+    )
+    destinatarios = {id_ministerio: set() for id_ministerio in ids_ministerio}
+    for id_usuario, id_rol, lider1_de, lider2_de in filas:
+        if id_rol == id_rol_pastor:
+            for usuarios in destinatarios.values():
+                usuarios.add(id_usuario)
+        for id_ministerio in (lider1_de, lider2_de):
+            if id_ministerio in destinatarios:
+                destinatarios[id_ministerio].add(id_usuario)
+    return destinatarios
+
+
+def _crear_para_responsables(avisos, id_remitente):
+    destinatarios = destinatarios_por_ministerio(int(evento.id_ministerio_id) for evento, _, _ in avisos)
+    notificaciones = [
+        Notificaciones(
+            id_evento_id=evento.id_evento,
+            id_usuario_remitente_id=id_remitente,
+            id_usuario_destino_id=id_usuario,
+            tipo=tipo,
+            mensaje=mensaje,
+        )
+        for evento, tipo, mensaje in avisos
+        for id_usuario in destinatarios[int(evento.id_ministerio_id)]
+        if id_usuario != id_remitente
+    ]
+    return crear_notificaciones(notificaciones)
+
+
+def notificar_responsables_varios(avisos, id_remitente, diferido=None):
+    """
+    Notifica a líderes y pastores (menos al remitente) de una lista de avisos
+    ``(evento, tipo, mensaje)``. Con ``diferido`` (por defecto
+    NOTIFICACIONES_DIFERIDAS) se ejecuta cuando se confirma la transacción de la
+    vista, en una transacción propia, y no alarga la que cambia los eventos.
+    """
+    avisos = list(avisos)
+    if not avisos:
+        return
+    if diferido is None:
+        diferido = settings.NOTIFICACIONES_DIFERIDAS
+    if not diferido:
+        _crear_para_responsables(avisos, id_remitente)
+        return
+
+    def _crear():
+        with transaction.atomic():
+            _crear_para_responsables(avisos, id_remitente)
+
+    # robust: si falla, se registra en el log y no convierte en error un cambio ya confirmado
+    transaction.on_commit(_crear, robust=True)
+
+
+def notificar_responsables(evento, id_remitente, tipo, mensaje, diferido=None):
+    notificar_responsables_varios([(evento, tipo, mensaje)], id_remitente, diferido)
@@ -0,0 +1,102 @@
+"""
+Paginación por cursor (keyset) para los listados de eventos.
+
+El cursor es opaco para el cliente: codifica los valores de las columnas de orden
+de la última fila entregada, y la página siguiente se obtiene con un WHERE sobre
+esos valores en lugar de OFFSET. El orden debe terminar en una columna única
+(``id_evento``) para que los empates sean estables.
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import Q
+
+
+def _codificar_cursor(valores):
+    texto = json.dumps([v.isoformat() if hasattr(v, 'isoformat') else v for v in valores])
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def _decodificar_cursor(cursor, cantidad):
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except ValueError as e:
+        raise ValueError('Cursor inválido') from e
+    if not isinstance(valores, list) or len(valores) != cantidad:
+        raise ValueError('Cursor inválido')
+    return valores
+
+
+def _cota_principal(orden, valores, despues):
+    # Redundante con la expansión OR, pero es un rango simple sobre la primera
+    # columna que el planificador puede usar como límite del recorrido del índice
+    campo = orden[0]
+    comparacion = 'lte' if campo.startswith('-') == despues else 'gte'
+    return Q(**{f'{campo.lstrip("-")}__{comparacion}': valores[0]})
+
+
+def _filtro_despues_de(orden, valores, inclusive=False):
+    # (a, b, c) > (x, y, z)  ==  a > x  OR  (a = x AND b > y)  OR  (a = x AND b = y AND c > z)
+    # Con ``inclusive`` la última comparación es >=, así que también entra la fila del cursor
+    filtro = Q()
+    iguales = Q()
+    for posicion, (campo, valor) in enumerate(zip(orden, valores), 1):
+        nombre = campo.lstrip('-')
+        comparacion = 'lt' if campo.startswith('-') else 'gt'
+        if inclusive and posicion == len(orden):
+            comparacion += 'e'
+        filtro |= iguales & Q(**{f'{nombre}__{comparacion}': valor})
+        iguales &= Q(**{nombre: valor})
+    return _cota_principal(orden, valores, despues=True) & filtro
+
+
+def filtro_desde_cursor(orden, cursor):
+    """
+    Filtro de la fila del cursor y de todas las que le siguen en el listado. Con
+    un orden de más reciente a más antigua son esa fila y las más antiguas.
+    """
+    return _filtro_despues_de(orden, _decodificar_cursor(cursor, len(orden)), inclusive=True)
+
+
+def cursor_de_fila(fila, orden):
+    """Cursor que apunta a ``fila`` (instancia o dict de values())."""
+    valor = fila.__getitem__ if isinstance(fila, dict) else fila.__getattribute__
+    return _codificar_cursor([valor(campo.lstrip('-')) for campo in orden])
+
+
+def paginar_por_cursor(queryset, orden, request):
+    """Devuelve ``(filas, siguiente_cursor)``; ``siguiente_cursor`` es None en la última página."""
+    limite = int(request.GET.get('limit', settings.EVENTOS_PAGINA_DEFECTO))
+    limite = max(1, min(limite, settings.EVENTOS_PAGINA_MAX))
+
+    queryset = queryset.order_by(*orden)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        queryset = queryset.filter(_filtro_despues_de(orden, _decodificar_cursor(cursor, len(orden))))
+
+    # Se pide una fila de más para saber si hay otra página
+    filas = list(queryset[:limite + 1])
+    if len(filas) <= limite:
+        return filas, None
+
+    filas = filas[:limite]
+    return filas, cursor_de_fila(filas[-1], orden)
+
+
+def paginar_si_se_solicita(queryset, orden, request):
+    """
+    Pagina solo si se envía ``?cursor=`` o ``?limit=``; si no, devuelve todo como
+    antes. Devuelve ``(filas, datos)`` con los campos de paginación de la respuesta.
+    Con paginación, ``total`` solo se calcula si se pide ``?total=true``.
+    """
+    if 'cursor' not in request.GET and 'limit' not in request.GET:
+        filas = list(queryset.order_by(*orden))
+        return filas, {'total': len(filas)}
+
+    datos = {}
+    if request.GET.get('total') == 'true':
+        datos['total'] = queryset.count()
+    filas, datos['siguiente_cursor'] = paginar_por_cursor(queryset, orden, request)
+    return filas, datos
@@ -0,0 +1,344 @@
+"""
+Registro de participantes, cupo con lista de espera y control de asistencia.
+
+El registro masivo inserta con ``ON CONFLICT DO NOTHING`` (la restricción única
+``(id_evento, id_usuario)`` descarta los ya registrados) y el check-in marca la
+asistencia de un lote con un UPDATE. ``RETURNING`` indica qué filas cambiaron.
+
+Eventos con cupo: cada lugar es una fila de ``plazas_evento`` y un participante
+está confirmado si tiene plaza. Una inscripción entra en lista de espera y toma
+plazas libres con ``FOR UPDATE SKIP LOCKED``: cada una bloquea solo las filas
+que ocupa, así que mientras quedan lugares las inscripciones no se esperan entre
+sí y ninguna plaza se asigna dos veces. Un evento tiene ``max(cupo, confirmados)``
+plazas (bajar el cupo no saca a nadie). Las plazas se crean con el evento; si
+falta alguno (eventos cargados por otra vía), la primera inscripción las crea.
+
+Dos advisory locks por evento ordenan lo demás:
+
+* ``_LOCK_CUPO``: compartido al inscribir o cancelar, exclusivo al cambiar el
+  cupo. Una inscripción que llega durante la edición espera y usa el cupo nuevo.
+* ``_LOCK_ESPERA``: exclusivo al cancelar, que libera una plaza y se la da al
+  primero de la lista; compartido en la inscripción que no consiguió plaza, que
+  antes de quedar en espera aguarda a las plazas que otras están tomando. Así una
+  plaza liberada no queda libre mientras alguien espera, y con el evento lleno
+  las inscripciones siguen sin esperarse entre sí.
+
+El orden es siempre cupo y luego lista de espera. La edición toma antes la fila
+del evento con ``FOR NO KEY UPDATE``, que no choca con el ``FOR KEY SHARE`` de la
+llave foránea al insertar participantes.
+"""
+from django.db import connection, transaction
+
+from .models import Evento, Notificaciones
+from .notificaciones import crear_notificaciones
+
+# Primer entero de los advisory locks (int, int) de un evento; el segundo es id_evento
+_LOCK_CUPO = 1
+_LOCK_ESPERA = 2
+
+
+def datos_gestion_evento(id_evento):
+    """Nombre, estado, cupo, creador y líderes del ministerio en una consulta (None si no existe)."""
+    return Evento.objects.filter(id_evento=id_evento).values(
+        'nombre', 'id_estado', 'cupo', 'id_usuario', 'id_ministerio__id_lider1', 'id_ministerio__id_lider2'
+    ).first()
+
+
+def puede_gestionar(usuario, evento):
+    """Pastores, el creador del evento y los líderes de su ministerio."""
+    return usuario.id_rol == 1 or usuario.id_usuario in (
+        evento['id_usuario'], evento['id_ministerio__id_lider1'], evento['id_ministerio__id_lider2']
+    )
+
+
+def _bloquear(cursor, lock, id_evento, compartido=False):
+    funcion = 'pg_advisory_xact_lock_shared' if compartido else 'pg_advisory_xact_lock'
+    cursor.execute(f'SELECT {funcion}(%s, %s)', [lock, id_evento])
+
+
+def _ocupar_plazas(cursor, id_evento, ids_participacion):
+    """
+    Da plazas libres, sin esperar a las que otra transacción está tomando, a las
+    participaciones en espera de la lista (en ese orden). Devuelve los ids de
+    usuario confirmados.
+    """
+    cursor.execute(
+        """
+        WITH libres AS (
+            SELECT numero FROM plazas_evento
+            WHERE id_evento = %(evento)s AND id_participacion IS NULL
+            LIMIT %(cantidad)s
+            FOR UPDATE SKIP LOCKED
+        ), asignadas AS (
+            UPDATE plazas_evento p SET id_participacion = m.id_participacion
+            FROM (SELECT numero, row_number() OVER (ORDER BY numero) AS orden FROM libres) l
+            JOIN unnest(%(ids)s::int[]) WITH ORDINALITY AS m(id_participacion, orden) USING (orden)
+            WHERE p.id_evento = %(evento)s AND p.numero = l.numero
+            RETURNING p.id_participacion
+        )
+        UPDATE participantes_evento SET en_espera = FALSE
+        WHERE id_participacion IN (SELECT id_participacion FROM asignadas)
+        RETURNING id_usuario
+        """,
+        {'evento': id_evento, 'cantidad': len(ids_participacion), 'ids': list(ids_participacion)},
+    )
+    return [fila[0] for fila in cursor.fetchall()]
+
+
+def _bloquear_libres(cursor, id_evento, cantidad):
+    """
+    Bloquea hasta ``cantidad`` plazas libres esperando a las que otra transacción
+    está tomando: si la tomó queda fuera y se busca otra. Devuelve sus números.
+    """
+    libres = []
+    while len(libres) < cantidad:
+        cursor.execute(
+            """
+            SELECT numero FROM plazas_evento
+            WHERE id_evento = %s AND id_participacion IS NULL AND numero <> ALL(%s)
+            ORDER BY numero
+            LIMIT %s
+            FOR UPDATE
+            """,
+            [id_evento, libres, cantidad - len(libres)],
+        )
+        nuevas = [fila[0] for fila in cursor.fetchall()]
+        if not nuevas:
+            break
+        libres += nuevas
+    return libres
+
+
+def _asignar(cursor, id_evento, numeros, ids_participacion):
+    """Sienta cada participación en la plaza (ya bloqueada) del mismo orden; devuelve los ids de usuario."""
+    cursor.execute(
+        """
+        WITH asignadas AS (
+            UPDATE plazas_evento p SET id_participacion = a.id_participacion
+            FROM unnest(%(numeros)s::int[], %(ids)s::int[]) AS a(numero, id_participacion)
+            WHERE p.id_evento = %(evento)s AND p.numero = a.numero
+            RETURNING p.id_participacion
+        )
+        UPDATE participantes_evento SET en_espera = FALSE
+        WHERE id_participacion IN (SELECT id_participacion FROM asignadas)
+        RETURNING id_usuario
+        """,
+        {'evento': id_evento, 'numeros': list(numeros), 'ids': list(ids_participacion)},
+    )
+    return [fila[0] for fila in cursor.fetchall()]
+
+
+def _crear_plazas(cursor, id_evento):
+    """
+    Si el evento tiene cupo y todavía no tiene plazas, crea ``max(cupo, confirmados)``
+    con los confirmados ya sentados. Devuelve si faltaban: con dos inscripciones a
+    la vez, la segunda espera el COMMIT de la primera y sus plazas quedan a la vista.
+    """
+    cursor.execute(
+        """
+        WITH evento AS (
+            SELECT cupo FROM eventos
+            WHERE id_evento = %(evento)s AND cupo IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM plazas_evento WHERE id_evento = %(evento)s)
+        ), confirmados AS (
+            SELECT id_participacion, row_number() OVER (ORDER BY id_participacion) AS numero
+            FROM participantes_evento
+            WHERE id_evento = %(evento)s AND NOT en_espera
+        ), creadas AS (
+            INSERT INTO plazas_evento (id_evento, numero, id_participacion)
+            SELECT %(evento)s, n.numero, c.id_participacion
+            FROM evento
+            CROSS JOIN generate_series(1, GREATEST(evento.cupo, (SELECT COUNT(*) FROM confirmados))) AS n(numero)
+            LEFT JOIN confirmados c USING (numero)
+            ON CONFLICT DO NOTHING
+        )
+        SELECT EXISTS (SELECT 1 FROM evento)
+        """,
+        {'evento': id_evento},
+    )
+    return cursor.fetchone()[0]
+
+
+def crear_plazas(id_evento):
+    """Plazas de un evento recién creado, para que las primeras inscripciones no las esperen."""
+    with connection.cursor() as cursor:
+        _crear_plazas(cursor, id_evento)
+
+
+def _promover(cursor, id_evento):
+    """
+    Con el lock de la lista de espera exclusivo: da las plazas libres a los primeros
+    en espera, por orden de registro. Devuelve los ids de usuario promovidos.
+    """
+    cursor.execute(
+        """
+        SELECT e.cupo,
+               EXISTS (SELECT 1 FROM plazas_evento p WHERE p.id_evento = e.id_evento),
+               (SELECT COUNT(*) FROM participantes_evento p WHERE p.id_evento = e.id_evento AND p.en_espera)
+        FROM eventos e WHERE e.id_evento = %s
+        """,
+        [id_evento],
+    )
+    cupo, hay_plazas, pendientes = cursor.fetchone()
+    if cupo is None or not pendientes:
+        return []
+    if not hay_plazas:
+        _crear_plazas(cursor, id_evento)
+
+    # Solo tantas plazas como personas esperando: bloquear todas las libres dejaría
+    # sin ninguna a las inscripciones que buscan con SKIP LOCKED
+    libres = _bloquear_libres(cursor, id_evento, pendientes)
+    if not libres:
+        return []
+    cursor.execute(
+        """
+        SELECT id_participacion FROM participantes_evento
+        WHERE id_evento = %s AND en_espera
+        ORDER BY id_participacion
+        LIMIT %s
+        """,
+        [id_evento, len(libres)],
+    )
+    return _asignar(cursor, id_evento, libres, [fila[0] for fila in cursor.fetchall()])
+
+
+def cambiar_cupo(id_evento, cupo):
+    """
+    Ajusta las plazas al cupo nuevo y confirma a la lista de espera si hay lugar;
+    sin cupo, a todos. Debe llamarse dentro de la transacción que guarda el cupo.
+    Devuelve los ids promovidos.
+    """
+    with connection.cursor() as cursor:
+        _bloquear(cursor, _LOCK_CUPO, id_evento)
+        if cupo is None:
+            cursor.execute('DELETE FROM plazas_evento WHERE id_evento = %s', [id_evento])
+            cursor.execute(
+                'UPDATE participantes_evento SET en_espera = FALSE WHERE id_evento = %s AND en_espera RETURNING id_usuario',
+                [id_evento],
+            )
+            return [fila[0] for fila in cursor.fetchall()]
+
+        cursor.execute(
+            """
+            SELECT COUNT(*), COUNT(id_participacion), COALESCE(MAX(numero), 0)
+            FROM plazas_evento WHERE id_evento = %s
+            """,
+            [id_evento],
+        )
+        total, ocupadas, ultima = cursor.fetchone()
+        if total == 0:
+            _crear_plazas(cursor, id_evento)
+        elif cupo > total:
+            cursor.execute(
+                'INSERT INTO plazas_evento (id_evento, numero) SELECT %s, generate_series(%s, %s)',
+                [id_evento, ultima + 1, ultima + cupo - total],
+            )
+        elif total > max(cupo, ocupadas):
+            cursor.execute(
+                """
+                DELETE FROM plazas_evento WHERE id_evento = %s AND numero IN (
+                    SELECT numero FROM plazas_evento
+                    WHERE id_evento = %s AND id_participacion IS NULL
+                    ORDER BY numero DESC
+                    LIMIT %s
+                )
+                """,
+                [id_evento, id_evento, total - max(cupo, ocupadas)],
+            )
+        return _promover(cursor, id_evento)
+
+
+def registrar_participantes(id_evento, ids_usuario):
+    """
+    Registra a los usuarios activos de la lista. Devuelve ``(registrados, promovidos)``:
+    los ids insertados y los que quedaron confirmados (con cupo, los registrados que
+    no están en ``promovidos`` quedan en lista de espera).
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        _bloquear(cursor, _LOCK_CUPO, id_evento, compartido=True)
+        cursor.execute(
+            """
+            INSERT INTO participantes_evento (id_evento, id_usuario, en_espera)
+            SELECT e.id_evento, u.id_usuario, e.cupo IS NOT NULL
+            FROM eventos e JOIN usuarios u ON u.id_usuario = ANY(%s) AND u.activo
+            WHERE e.id_evento = %s
+            ORDER BY u.id_usuario
+            ON CONFLICT (id_evento, id_usuario) DO NOTHING
+            RETURNING id_participacion, id_usuario, en_espera
+            """,
+            [list(ids_usuario), id_evento],
+        )
+        filas = cursor.fetchall()
+        registrados = [id_usuario for _, id_usuario, _ in filas]
+        en_espera = {id_participacion: id_usuario for id_participacion, id_usuario, espera in filas if espera}
+        if not en_espera:
+            return registrados, registrados
+
+        promovidos = _ocupar_plazas(cursor, id_evento, en_espera)
+        if not promovidos and _crear_plazas(cursor, id_evento):
+            promovidos = _ocupar_plazas(cursor, id_evento, en_espera)
+        restantes = [p for p, id_usuario in en_espera.items() if id_usuario not in promovidos]
+        if restantes:
+            # Sin plazas libres a la vista: fuera de una cancelación, solo pueden
+            # estar ocupándolas otras inscripciones; se espera a ver si las confirman
+            _bloquear(cursor, _LOCK_ESPERA, id_evento, compartido=True)
+            libres = _bloquear_libres(cursor, id_evento, len(restantes))
+            promovidos += _asignar(cursor, id_evento, libres, restantes[:len(libres)])
+        return registrados, promovidos
+
+
+def cancelar_participacion(id_evento, id_usuario):
+    """
+    Elimina el registro y, si ocupaba un lugar, lo pasa al primero de la lista de
+    espera. Devuelve ``(eliminado, promovidos)``.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        _bloquear(cursor, _LOCK_CUPO, id_evento, compartido=True)
+        _bloquear(cursor, _LOCK_ESPERA, id_evento)
+        # La llave foránea (ON DELETE SET NULL) libera la plaza
+        cursor.execute(
+            'DELETE FROM participantes_evento WHERE id_evento = %s AND id_usuario = %s RETURNING en_espera',
+            [id_evento, id_usuario],
+        )
+        fila = cursor.fetchone()
+        if fila is None:
+            return False, []
+        if fila[0]:
+            return True, []
+        # Con más plazas que cupo (el cupo bajó) la plaza liberada desaparece
+        cursor.execute(
+            """
+            DELETE FROM plazas_evento
+            WHERE id_evento = %s AND id_participacion IS NULL
+              AND (SELECT COUNT(*) FROM plazas_evento WHERE id_evento = %s)
+                  > (SELECT cupo FROM eventos WHERE id_evento = %s)
+            """,
+            [id_evento, id_evento, id_evento],
+        )
+        return True, _promover(cursor, id_evento)
+
+
+def notificar_promovidos(id_evento, nombre_evento, ids_usuario):
+    crear_notificaciones([
+        Notificaciones(
+            id_evento_id=id_evento,
+            id_usuario_destino_id=id_usuario,
+            tipo='cupo_confirmado',
+            mensaje=f"Se liberó un lugar en el evento '{nombre_evento}': tu inscripción quedó confirmada"
+        )
+        for id_usuario in ids_usuario
+    ])
+
+
+def marcar_asistencia(id_evento, ids_usuario, asistencia=True):
+    """Marca la asistencia del lote; devuelve los ids con lugar confirmado en el evento."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE participantes_evento SET asistencia = %s
+            WHERE id_evento = %s AND id_usuario = ANY(%s) AND NOT en_espera
+            RETURNING id_usuario
+            """,
+            [asistencia, id_evento, list(ids_usuario)],
+        )
+        return [fila[0] for fila in cursor.fetchall()]
@@ -0,0 +1,135 @@
+"""
+Serialización compartida de los listados de eventos.
+
+Cada listado declara su forma de respuesta como una lista de pares
+``(clave de salida, campo)``; el campo es un nombre de ``CAMPOS`` o una tupla
+``(columnas, función)``. El serializador proyecta solo las columnas que la forma
+necesita con ``values()`` y arma cada fila desde ese dict, sin instanciar
+modelos ni llamar a ``strftime``: las fechas y horas se dejan como objetos y
+las formatea el encoder de ``RespuestaJSON``. Los nombres de estado y tipo de
+evento salen del registro en memoria (``catalogos``), sin unir con sus tablas.
+"""
+from operator import itemgetter
+
+from .catalogos import nombre_estado, obtener_tipo_evento
+
+
+def _columna(lookup):
+    return (lookup,), itemgetter(lookup)
+
+
+def _nombre_completo(fila):
+    if fila['id_usuario__id_persona__nombres'] is None:
+        return None
+    return f"{fila['id_usuario__id_persona__nombres']} {fila['id_usuario__id_persona__apellidos']}"
+
+
+def _tipo(fila, clave):
+    tipo = obtener_tipo_evento(fila['id_tipo_evento'])
+    return tipo[clave] if tipo else None
+
+
+def constante(valor):
+    """Campo que no depende de la fila (p. ej. ``es_mio`` en eventos de otros)."""
+    return (), lambda fila: valor
+
+
+CAMPOS = {
+    'id_evento': _columna('id_evento'),
+    'nombre': _columna('nombre'),
+    'descripcion': _columna('descripcion'),
+    'fecha': _columna('fecha'),
+    'hora': _columna('hora'),
+    'lugar': _columna('lugar'),
+    'id_estado': _columna('id_estado'),
+    'estado': (('id_estado',), lambda f: nombre_estado(f['id_estado'])),
+    'id_ministerio': _columna('id_ministerio'),
+    'ministerio': _columna('id_ministerio__nombre'),
+    'id_usuario': _columna('id_usuario'),
+    'usuario': (
+        ('id_usuario__id_persona__nombres', 'id_usuario__id_persona__apellidos'),
+        _nombre_completo,
+    ),
+    'id_tipo_evento': _columna('id_tipo_evento'),
+    'tipo_evento': (('id_tipo_evento',), lambda f: _tipo(f, 'nombre')),
+    'tipo_evento_detalle': (
+        ('id_tipo_evento',),
+        lambda f: {
+            'id': f['id_tipo_evento'],
+            'nombre': _tipo(f, 'nombre'),
+            'descripcion': _tipo(f, 'descripcion'),
+            'activo': _tipo(f, 'activo'),
+        },
+    ),
+    'creador': (
+        ('id_usuario', 'id_usuario__id_persona__nombres', 'id_usuario__id_persona__apellidos'),
+        lambda f: {
+            'id_usuario': f['id_usuario'],
+            'nombres': f['id_usuario__id_persona__nombres'],
+            'apellidos': f['id_usuario__id_persona__apellidos'],
+        },
+    ),
+    'fecha_creacion': (
+        ('fecha_creacion',),
+        lambda f: f['fecha_creacion'].strftime('%Y-%m-%d %H:%M:%S') if f['fecha_creacion'] else None,
+    ),
+}
+
+
+class SerializadorEvento:
+    def __init__(self, forma):
+        columnas = {}
+        self.campos = []
+        for clave, campo in forma:
+            lookups, funcion = CAMPOS[campo] if isinstance(campo, str) else campo
+            columnas.update(dict.fromkeys(lookups))
+            self.campos.append((clave, funcion))
+        self.columnas = tuple(columnas)
+
+    def proyectar(self, queryset, orden=(), *extra):
+        """``values()`` con las columnas de la forma, las del orden (para el cursor) y ``extra``."""
+        columnas = dict.fromkeys(self.columnas)
+        columnas.update(dict.fromkeys(campo.lstrip('-') for campo in orden))
+        columnas.update(dict.fromkeys(extra))
+        return queryset.values(*columnas)
+
+    def serializar(self, filas):
+        campos = self.campos
+        return [{clave: funcion(fila) for clave, funcion in campos} for fila in filas]
+
+
+# Formas de respuesta de cada listado (mismas claves que antes de compartir el serializador)
+LISTADO = [
+    ('id_evento', 'id_evento'), ('nombre', 'nombre'), ('descripcion', 'descripcion'),
+    ('fecha', 'fecha'), ('hora', 'hora'), ('lugar', 'lugar'), ('estado', 'estado'),
+    ('id_ministerio', 'id_ministerio'), ('ministerio', 'ministerio'), ('usuario', 'usuario'),
+]
+
+MIS_EVENTOS = LISTADO + [
+    ('id_tipo_evento', 'id_tipo_evento'), ('tipo_evento', 'tipo_evento'),
+]
+
+EVENTOS_OTROS = LISTADO + [
+    ('es_mio', constante(False)),
+    ('id_tipo_evento', 'id_tipo_evento'), ('tipo_evento', 'tipo_evento'),
+]
+
+TODOS_EVENTOS = [
+    ('id_evento', 'id_evento'), ('nombre', 'nombre'), ('descripcion', 'descripcion'),
+    ('fecha', 'fecha'), ('hora', 'hora'), ('lugar', 'lugar'), ('estado', 'estado'),
+    ('id_estado', 'id_estado'), ('id_ministerio', 'id_ministerio'), ('ministerio', 'ministerio'),
+    ('usuario', 'usuario'), ('id_usuario', 'id_usuario'), ('id_tipo_evento', 'id_tipo_evento'),
+    ('tipo_evento', 'tipo_evento_detalle'),
+]
+
+EVENTOS_MINISTERIO = [
+    ('id_evento', 'id_evento'), ('nombre', 'nombre'), ('descripcion', 'descripcion'),
+    ('fecha', 'fecha'), ('hora', 'hora'), ('lugar', 'lugar'),
+    # Solo se listan eventos aprobados: el nombre del estado no se consulta
+    ('estado', (('id_estado',), lambda f: {'id_estado': f['id_estado'], 'nombre': 'Aprobado'})),
+    ('tipo_evento', (
+        ('id_tipo_evento',),
+        lambda f: {'id_tipo_evento': f['id_tipo_evento'], 'nombre': _tipo(f, 'nombre')},
+    )),
+    ('creador', 'creador'), ('fecha_creacion', 'fecha_creacion'),
+]
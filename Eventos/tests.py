@@ -1,3 +1,1028 @@
-from django.test import TestCase
+import asyncio
+import random
+import re
+import threading
+from datetime import date, datetime, time, timedelta
+from time import sleep
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import OperationalError, connection, transaction
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from backend.pruebas import PruebaAPI, crear_catalogos, crear_eventos, crear_usuario, crear_usuarios
+from Login.models import Usuario
+from Ministerio.models import Ministerio
+from . import catalogos, horarios
+from .calendario import invalidar_meses, versiones_meses
+from .difusion import RESINCRONIZAR, BrokerMemoria, emitir_ticket, flujo_notificaciones
+from .horarios import ArbolIntervalos, disponibilidad
+from .models import EstadoEvento, Evento, Notificaciones, ParticipantesEvento, TipoEvento
+from .notificaciones import contar_no_leidas, crear_notificaciones, sumar_no_leidas
+from .participantes import cambiar_cupo, cancelar_participacion, registrar_participantes
+
+
+class ConsultasListadosEventosTests(PruebaAPI):
+    """Cada listado hace la misma cantidad de consultas con pocas o muchas filas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.pastor = crear_usuario(id_rol=1, prefijo='pastor')
+        cls.lider, cls.otro = crear_usuarios(2)
+        cls.ministerio = Ministerio.objects.create(nombre='Jóvenes', id_lider1=cls.lider)
+
+    def sembrar_eventos(self, usuario=None, id_estado=2):
+        # Se alternan creadores para que "mis eventos" y "de otros" tengan filas
+        def sembrar(cantidad):
+            crear_eventos(cantidad, self.ministerio, usuario or self.lider, id_estado)
+            crear_eventos(cantidad, self.ministerio, self.otro, id_estado)
+        return sembrar
+
+    def test_listar_eventos(self):
+        respuestas = self.assertConsultasConstantes(1, '/Eventos/eventos/', self.sembrar_eventos(), self.lider)
+        self.assertEqual(len(respuestas[-1].json()['eventos']), 86)
+
+    def test_listar_eventos_paginado(self):
+        # Sin COUNT ni OFFSET: la página siguiente sale del cursor
+        respuestas = self.assertConsultasConstantes(
+            1, '/Eventos/eventos/', self.sembrar_eventos(), self.lider, limit=10
+        )
+        primera = respuestas[-1].json()
+        self.assertNotIn('total', primera)
+        encabezados = self.autorizacion(self.lider)
+        with self.assertNumQueries(1):
+            respuesta = self.client.get('/Eventos/eventos/', {'limit': 10, 'cursor': primera['siguiente_cursor']},
+                                        **encabezados)
+        ids = [evento['id_evento'] for evento in primera['eventos'] + respuesta.json()['eventos']]
+        self.assertEqual(ids, sorted(Evento.objects.values_list('id_evento', flat=True))[:20])
+
+    @override_settings(EVENTOS_PAGINA_MAX=5)
+    def test_listar_eventos_acota_el_limite(self):
+        crear_eventos(8, self.ministerio, self.lider)
+        respuesta = self.get('/Eventos/eventos/', self.lider, limit=1000)
+        self.assertEqual(len(respuesta.json()['eventos']), 5)
+        self.assertIsNotNone(respuesta.json()['siguiente_cursor'])
+        self.assertEqual(self.get('/Eventos/eventos/', self.lider, limit='x').status_code, 400)
+
+    def test_mis_eventos(self):
+        respuestas = self.assertConsultasConstantes(1, '/Eventos/mis_eventos/', self.sembrar_eventos(), self.lider)
+        self.assertEqual(len(respuestas[-1].json()['eventos']), 43)
+
+    def test_eventos_otros_usuarios(self):
+        respuestas = self.assertConsultasConstantes(
+            1, '/Eventos/evetos_usuarios/', self.sembrar_eventos(), self.lider
+        )
+        self.assertEqual(len(respuestas[-1].json()['eventos']), 43)
+
+    def test_todos_eventos(self):
+        # El ETag sale de las filas del listado, sin agregado aparte
+        respuestas = self.assertConsultasConstantes(1, '/Eventos/eventos_todos/', self.sembrar_eventos(), self.lider)
+        self.assertEqual(len(respuestas[-1].json()['eventos']), 86)
+
+    def test_todos_eventos_paginado(self):
+        respuestas = self.assertConsultasConstantes(
+            1, '/Eventos/eventos_todos/', self.sembrar_eventos(), self.lider, limit=10
+        )
+        self.assertEqual(len(respuestas[-1].json()['eventos']), 10)
+        cursor = respuestas[-1].json()['siguiente_cursor']
+        encabezados = self.autorizacion(self.lider)
+        with self.assertNumQueries(1):
+            respuesta = self.client.get('/Eventos/eventos_todos/', {'limit': 10, 'cursor': cursor}, **encabezados)
+        self.assertEqual(len(respuesta.json()['eventos']), 10)
+
+    def test_eventos_por_ministerio(self):
+        # Listado con el ministerio y el creador en el mismo SELECT; el ETag sale de esas filas
+        url = f'/Eventos/eventos_ministerio/{self.ministerio.id_ministerio}/'
+        respuestas = self.assertConsultasConstantes(1, url, self.sembrar_eventos(), self.lider)
+        self.assertEqual(respuestas[-1].json()['total_eventos'], 86)
+
+    def test_eventos_por_ministerio_paginas(self):
+        url = f'/Eventos/eventos_ministerio/{self.ministerio.id_ministerio}/'
+        respuestas = self.assertConsultasConstantes(1, url, self.sembrar_eventos(), self.lider, limit=10)
+        cursor = respuestas[-1].json()['siguiente_cursor']
+        encabezados = self.autorizacion(self.lider)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, {'limit': 10, 'cursor': cursor}, **encabezados).status_code, 200)
+
+    def test_notificaciones(self):
+        evento = crear_eventos(1, self.ministerio, self.otro)[0]
+
+        def sembrar(cantidad):
+            Notificaciones.objects.bulk_create([
+                Notificaciones(
+                    id_evento=evento, id_usuario_remitente=self.otro, id_usuario_destino=self.lider,
+                    tipo='aprobacion', mensaje=f'Mensaje {i}'
+                )
+                for i in range(cantidad)
+            ])
+
+        respuestas = self.assertConsultasConstantes(1, '/Eventos/notificaciones/', sembrar, self.lider)
+        self.assertEqual(len(respuestas[-1].json()['notificaciones']), 43)
+
+
+class PaginacionCursorTests(PruebaAPI):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.lider = crear_usuario()
+        cls.ministerio = Ministerio.objects.create(nombre='Jóvenes', id_lider1=cls.lider)
+        # Muchas filas con la misma fecha y hora para ejercitar los desempates
+        crear_eventos(30, cls.ministerio, cls.lider)
+        crear_eventos(20, cls.ministerio, cls.lider, fecha=date(2025, 6, 1))
+
+    def recorrer(self, orden, limit=7):
+        ids, cursor = [], None
+        while True:
+            params = {'orden': orden, 'limit': limit, **({'cursor': cursor} if cursor else {})}
+            datos = self.get('/Eventos/eventos_todos/', self.lider, **params).json()
+            ids += [evento['id_evento'] for evento in datos['eventos']]
+            cursor = datos['siguiente_cursor']
+            if cursor is None:
+                return ids
+
+    def test_paginas_cubren_el_listado_sin_repetir(self):
+        for orden in ('-fecha', 'fecha', 'nombre', '-id'):
+            with self.subTest(orden=orden):
+                completo = self.get('/Eventos/eventos_todos/', self.lider, orden=orden).json()['eventos']
+                self.assertEqual(self.recorrer(orden), [evento['id_evento'] for evento in completo])
+
+    def test_cursor_acota_la_primera_columna(self):
+        cursor = self.get('/Eventos/eventos_todos/', self.lider, limit=5).json()['siguiente_cursor']
+        with CaptureQueriesContext(connection) as consultas:
+            self.get('/Eventos/eventos_todos/', self.lider, limit=5, cursor=cursor)
+        listado = next(q['sql'] for q in consultas if 'ORDER BY' in q['sql'])
+        # La cota se aplica junto a la expansión OR, no dentro de ella
+        self.assertIn('"eventos"."fecha" <=', listado)
+
+    def test_total_por_ministerio_solo_en_la_primera_pagina_o_si_se_pide(self):
+        url = f'/Eventos/eventos_ministerio/{self.ministerio.id_ministerio}/'
+        with CaptureQueriesContext(connection) as consultas:
+            primera = self.get(url, self.lider, limit=5).json()
+        self.assertEqual(primera['total_eventos'], 50)
+        self.assertTrue(any('OVER' in q['sql'] for q in consultas))
+
+        cursor = primera['siguiente_cursor']
+        with CaptureQueriesContext(connection) as consultas:
+            segunda = self.get(url, self.lider, limit=5, cursor=cursor).json()
+        self.assertNotIn('total_eventos', segunda)
+        self.assertFalse(any('OVER' in q['sql'] for q in consultas))
+
+        self.assertEqual(self.get(url, self.lider, limit=5, cursor=cursor, total='true').json()['total_eventos'], 50)
+
+
+class FiltrosTodosEventosTests(PruebaAPI):
+    """Los filtros de eventos_todos van en el WHERE: la respuesta depende solo de las filas que pasan."""
+
+    FILTROS = {
+        'id_estado': 2, 'fecha_desde': '2025-03-01', 'fecha_hasta': '2025-03-31', 'q': ' retiro ',
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.lider = crear_usuario()
+        cls.ministerio, cls.otro_ministerio = Ministerio.objects.bulk_create([
+            Ministerio(nombre='Jóvenes', id_lider1=cls.lider), Ministerio(nombre='Alabanza', id_lider1=cls.lider),
+        ])
+        crear_eventos(5, cls.ministerio, cls.lider, nombre='Retiro', fecha=date(2025, 3, 10))
+
+    def sembrar_descartados(self, cantidad):
+        # Cada grupo falla exactamente uno de los filtros
+        for campos in (
+            {'ministerio': self.otro_ministerio},
+            {'id_estado': 1},
+            {'fecha': date(2025, 4, 1)},
+            {'nombre': 'Congreso'},
+        ):
+            crear_eventos(cantidad, campos.pop('ministerio', self.ministerio), self.lider, **{
+                'id_estado': 2, 'nombre': 'Retiro', 'fecha': date(2025, 3, 10), **campos,
+            })
+
+    def test_filtros_en_sql_con_consultas_constantes(self):
+        respuestas = self.assertConsultasConstantes(
+            1, '/Eventos/eventos_todos/', self.sembrar_descartados,
+            id_ministerio=self.ministerio.id_ministerio, **self.FILTROS
+        )
+        self.assertEqual([len(r.json()['eventos']) for r in respuestas], [5, 5])
+        self.assertEqual(Evento.objects.count(), 5 + 4 * 43)
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.get('/Eventos/eventos_todos/', id_ministerio=self.ministerio.id_ministerio, **self.FILTROS)
+        listado, = consultas.captured_queries
+        where = listado['sql'].split(' WHERE ', 1)[1]
+        for condicion in (
+            f'"eventos"."id_ministerio" = {self.ministerio.id_ministerio}', '"eventos"."id_estado" = 2',
+            '"eventos"."fecha" >=', '"eventos"."fecha" <=', 'LIKE UPPER(',
+        ):
+            self.assertIn(condicion, where)
+
+    def test_orden_o_parametros_invalidos_responden_400(self):
+        for params in ({'orden': 'lugar'}, {'id_estado': 'dos'}, {'fecha_desde': '01/03/2025'}):
+            with self.subTest(**params), self.assertNumQueries(0):
+                respuesta = self.get('/Eventos/eventos_todos/', **params)
+            self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('nombre', self.get('/Eventos/eventos_todos/', orden='lugar').json()['error'])
+
+    def test_ordenes_permitidos(self):
+        crear_eventos(3, self.ministerio, self.lider, fecha=date(2025, 3, 1))
+        for orden, clave in (('fecha', 'fecha'), ('-nombre', 'nombre'), ('id', 'id_evento')):
+            with self.subTest(orden=orden):
+                eventos = self.get('/Eventos/eventos_todos/', orden=orden).json()['eventos']
+                valores = [evento[clave] for evento in eventos]
+                self.assertEqual(valores, sorted(valores, reverse=orden.startswith('-')))
+
+
+class RespuestasCondicionalesTests(PruebaAPI):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.lider = crear_usuario()
+        cls.ministerio = Ministerio.objects.create(nombre='Jóvenes', id_lider1=cls.lider)
+        cls.eventos = crear_eventos(5, cls.ministerio, cls.lider)
+
+    def setUp(self):
+        super().setUp()
+        self.encabezados = self.autorizacion(self.lider)
+
+    def condicional(self, url, etag, **params):
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=etag, **self.encabezados)
+
+    def assertCondicional(self, url, **params):
+        """304 con el ETag vigente, en una consulta; otro ETag tras editar un evento de la página."""
+        etag = self.get(url, self.lider, **params)['ETag']
+        with self.assertNumQueries(1):
+            respuesta = self.condicional(url, etag, **params)
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta['ETag'], etag)
+
+        evento = Evento.objects.get(pk=self.eventos[0].pk)
+        evento.nombre = 'Editado'
+        evento.save()
+        respuesta = self.condicional(url, etag, **params)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+        return respuesta
+
+    def test_eventos_por_ministerio(self):
+        url = f'/Eventos/eventos_ministerio/{self.ministerio.id_ministerio}/'
+        self.assertCondicional(url)
+        self.assertCondicional(url, limit=10)
+
+    def test_todos_eventos(self):
+        self.assertCondicional('/Eventos/eventos_todos/')
+        self.assertCondicional('/Eventos/eventos_todos/', limit=10, orden='nombre')
+
+    def test_todos_eventos_etag_por_usuario_y_por_borrado(self):
+        url = '/Eventos/eventos_todos/'
+        etag = self.get(url, self.lider)['ETag']
+        # es_mio cambia con quien consulta
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        Evento.objects.filter(pk=self.eventos[-1].pk).delete()
+        self.assertEqual(self.condicional(url, etag).status_code, 200)
+
+    def test_eventos_por_ministerio_otra_pagina_otro_etag(self):
+        url = f'/Eventos/eventos_ministerio/{self.ministerio.id_ministerio}/'
+        primera = self.get(url, self.lider, limit=2)
+        segunda = self.get(url, self.lider, limit=2, cursor=primera.json()['siguiente_cursor'])
+        self.assertNotEqual(primera['ETag'], segunda['ETag'])
+        self.assertEqual(self.condicional(url, primera['ETag'], limit=3).status_code, 200)
+
+
+class CalendarioTests(PruebaAPI):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.lider = crear_usuario()
+        cls.ministerio = Ministerio.objects.create(nombre='Jóvenes', id_lider1=cls.lider)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def crear_en_junio(self, dia):
+        evento = crear_eventos(1, self.ministerio, self.lider, fecha=date(2025, 6, dia))[0]
+        invalidar_meses(evento.fecha)
+        return evento
+
+    def dias(self):
+        return self.get('/Eventos/calendario/2025/6/').json()['dias']
+
+    def test_mes_en_cache_solo_consulta_la_version(self):
+        self.crear_en_junio(3)
+        self.dias()
+        with self.assertNumQueries(1):
+            self.assertEqual(list(self.dias()), ['3'])
+
+    def test_cambio_confirmado_invalida_la_copia_de_cualquier_worker(self):
+        self.crear_en_junio(3)
+        self.assertEqual(list(self.dias()), ['3'])
+        # Otro worker crea un evento: esta caché no se toca, pero la versión cambia
+        self.crear_en_junio(9)
+        self.assertEqual(sorted(self.dias()), ['3', '9'])
+
+    def test_copia_armada_antes_de_confirmar_no_se_sirve(self):
+        self.crear_en_junio(3)
+        version = versiones_meses([(2025, 6)])[2025, 6]
+        self.crear_en_junio(9)
+        # Un lector leyó la versión antes de la confirmación y guarda su copia tarde
+        cache.set(f'calendario:2025:06:{version}', {3: []})
+        self.assertEqual(sorted(self.dias()), ['3', '9'])
+
+    def test_anio_o_mes_fuera_de_rango_responde_400_sin_consultar(self):
+        for año, mes in ((2025, 0), (2025, 13), (0, 6), (10000, 6)):
+            with self.subTest(año=año, mes=mes), self.assertNumQueries(0):
+                respuesta = self.client.get(f'/Eventos/calendario/{año}/{mes}/')
+            self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(self.client.get('/Eventos/calendario/2025/junio/').status_code, 404)
+        self.assertEqual(self.client.get('/Eventos/calendario/9999/12/').status_code, 200)
+
+    def test_invalidar_incrementa_solo_los_meses_tocados(self):
+        antes = versiones_meses([(2025, 6), (2025, 7)])
+        invalidar_meses(date(2025, 6, 1), '2025-06-20')
+        despues = versiones_meses([(2025, 6), (2025, 7)])
+        self.assertEqual(despues[2025, 6], antes[2025, 6] + 1)
+        self.assertEqual(despues[2025, 7], antes[2025, 7])
+
+
+class ArbolIntervalosTests(SimpleTestCase):
+    def test_igual_que_fuerza_bruta(self):
+        azar = random.Random(25)
+        for cantidad in (0, 1, 2, 7, 100, 500):
+            intervalos = []
+            for i in range(cantidad):
+                inicio = azar.randrange(1000)
+                intervalos.append((inicio, inicio + azar.randrange(1, 80), i))
+            arbol = ArbolIntervalos(intervalos)
+            self.assertEqual(len(arbol), cantidad)
+            for _ in range(200):
+                inicio = azar.randrange(-20, 1020)
+                fin = inicio + azar.randrange(1, 120)
+                esperado = sorted(dato for a, b, dato in intervalos if a < fin and b > inicio)
+                with self.subTest(cantidad=cantidad, inicio=inicio, fin=fin):
+                    self.assertEqual(sorted(arbol.solapados(inicio, fin)), esperado)
+
+    def test_extremos_semiabiertos(self):
+        arbol = ArbolIntervalos([(10, 20, 'a'), (20, 30, 'b'), (10, 20, 'c')])
+        self.assertEqual(sorted(arbol.solapados(20, 25)), ['b'])
+        self.assertEqual(sorted(arbol.solapados(5, 10)), [])
+        self.assertEqual(sorted(arbol.solapados(19, 21)), ['a', 'b', 'c'])
+
+
+class HorariosTests(PruebaAPI):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.pastor = crear_usuario(id_rol=1, prefijo='pastor')
+        cls.ministerio = Ministerio.objects.create(nombre='Jóvenes', id_lider1=cls.pastor)
+        cls.otro_ministerio = Ministerio.objects.create(nombre='Alabanza', id_lider1=cls.pastor)
+
+    def setUp(self):
+        super().setUp()
+        # Las versiones se repiten entre pruebas (cada una se revierte): el índice no debe sobrevivir
+        horarios._indices.clear()
+
+    def evento(self, id_estado=2, ministerio=None, **campos):
+        return crear_eventos(
+            1, ministerio or self.ministerio, self.pastor, id_estado,
+            **{'fecha': date(2025, 6, 1), 'hora': time(10, 0), 'lugar': 'Templo', **campos}
+        )[0]
+
+    def aprobar(self, evento):
+        return self.post(f'/Eventos/aprobar-rechazar/{evento.id_evento}/', {'accion': 'aprobar'},
+                         self.pastor, content_type='application/json')
+
+    def test_aprobar_pospuesto_que_se_cruza_responde_409(self):
+        ocupado = self.evento()
+        pospuesto = self.evento(6, self.otro_ministerio)
+        respuesta = self.aprobar(pospuesto)
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual([c['id_evento'] for c in respuesta.json()['conflictos']], [ocupado.id_evento])
+        pospuesto.refresh_from_db()
+        self.assertEqual(pospuesto.id_estado_id, 6)
+
+        Evento.objects.filter(pk=ocupado.pk).update(id_estado_id=4)
+        self.assertEqual(self.aprobar(pospuesto).status_code, 200)
+
+    def test_lote_no_aprueba_dos_pospuestos_en_el_mismo_horario(self):
+        primero, segundo = self.evento(6), self.evento(6, self.otro_ministerio)
+        respuesta = self.post('/Eventos/aprobar-rechazar/lote/', {
+            'accion': 'aprobar', 'ids': [primero.id_evento, segundo.id_evento],
+        }, self.pastor, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 200)
+        primero_r, segundo_r = respuesta.json()['resultados']
+        self.assertTrue(primero_r['ok'])
+        self.assertFalse(segundo_r['ok'])
+        self.assertEqual([c['id_evento'] for c in segundo_r['conflictos']], [primero.id_evento])
+        self.assertEqual(
+            dict(Evento.objects.filter(pk__in=[primero.pk, segundo.pk]).values_list('pk', 'id_estado')),
+            {primero.pk: 2, segundo.pk: 6}
+        )
+
+    def lote(self, accion, eventos, usuario=None):
+        ids = [evento if isinstance(evento, int) else evento.id_evento for evento in eventos]
+        respuesta = self.post('/Eventos/aprobar-rechazar/lote/', {'accion': accion, 'ids': ids},
+                              usuario or self.pastor, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.json()['resultados']
+
+    def test_lote_responde_cada_evento_con_una_comprobacion_y_un_update(self):
+        ocupado = self.evento()
+        pendiente = self.evento(1, lugar='Salón', hora=time(16, 0))
+        cruzado = self.evento(6, self.otro_ministerio)
+        libre = self.evento(6, self.otro_ministerio, hora=time(14, 0))
+        # Choca con el libre (mismo ministerio y hora) si este se aprueba antes
+        detras = self.evento(6, self.otro_ministerio, hora=time(14, 30), lugar='Patio')
+        with CaptureQueriesContext(connection) as consultas:
+            resultados = self.lote('aprobar', [999999, ocupado, pendiente, cruzado, libre, detras])
+
+        self.assertEqual([r['ok'] for r in resultados], [False, False, True, False, True, False])
+        self.assertEqual(resultados[0]['error'], 'Evento no encontrado')
+        self.assertEqual(resultados[1]['error'], 'Solo se pueden aprobar eventos pendientes o pospuestos')
+        self.assertEqual([c['id_evento'] for c in resultados[3]['conflictos']], [ocupado.id_evento])
+        self.assertEqual(resultados[3]['conflictos'][0]['motivos'], ['lugar'])
+        self.assertEqual([c['id_evento'] for c in resultados[5]['conflictos']], [libre.id_evento])
+        self.assertEqual(resultados[5]['conflictos'][0]['motivos'], ['ministerio'])
+        self.assertEqual(
+            dict(Evento.objects.filter(pk__in=[pendiente.pk, cruzado.pk, libre.pk, detras.pk]).values_list('pk', 'id_estado')),
+            {pendiente.pk: 2, cruzado.pk: 6, libre.pk: 2, detras.pk: 6}
+        )
+        sql = [q['sql'] for q in consultas]
+        self.assertEqual(sum(q.startswith('WITH lote AS') for q in map(str.strip, sql)), 1)
+        self.assertEqual(sum(q.startswith('UPDATE "eventos"') for q in sql), 1)
+
+    def test_lote_aplica_los_estados_permitidos_de_cada_accion(self):
+        pendiente, aprobado = self.evento(1, hora=time(8, 0)), self.evento(2, hora=time(12, 0))
+        resultados = self.lote('posponer', [pendiente, aprobado])
+        self.assertEqual([r['ok'] for r in resultados], [True, False])
+        self.assertEqual(resultados[1]['error'], 'Solo se pueden posponer eventos pendientes')
+        # El pendiente ya quedó pospuesto: no se puede cancelar en lote
+        resultados = self.lote('cancelar', [pendiente, aprobado])
+        self.assertEqual(resultados[0], {
+            'id_evento': pendiente.id_evento, 'ok': False, 'error': 'Solo se pueden cancelar eventos aprobados'
+        })
+        self.assertEqual(resultados[1], {'id_evento': aprobado.id_evento, 'ok': True, 'estado': 'Cancelado'})
+
+    def test_lote_solo_cancela_eventos_propios(self):
+        otro_pastor = crear_usuario(id_rol=1, prefijo='otro_pastor')
+        propio = self.evento()
+        ajeno = crear_eventos(1, self.ministerio, otro_pastor, 2, hora=time(18, 0))[0]
+        resultados = self.lote('cancelar', [propio, ajeno])
+        self.assertEqual([r['ok'] for r in resultados], [True, False])
+        self.assertEqual(resultados[1]['error'], 'Solo se pueden cancelar en lote eventos propios')
+        ajeno.refresh_from_db()
+        self.assertEqual(ajeno.id_estado_id, 2)
+
+    def orden_de_locks(self, consultas):
+        filas = [i for i, q in enumerate(consultas) if re.search(r'FOR (NO KEY )?UPDATE', q['sql']) and '"eventos"' in q['sql']]
+        llaves = [(i, q['sql']) for i, q in enumerate(consultas) if 'pg_advisory_xact_lock' in q['sql']]
+        return filas, llaves
+
+    def test_editar_bloquea_la_fila_antes_que_el_horario(self):
+        evento = self.evento()
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.post(f'/Eventos/editar/{evento.id_evento}/', {'hora': '11:00'}, self.pastor)
+        self.assertEqual(respuesta.status_code, 200)
+        filas, llaves = self.orden_de_locks(consultas)
+        self.assertEqual(len(filas), 1)
+        # Un lugar y un ministerio en un día
+        self.assertEqual(len(llaves), 2)
+        self.assertLess(filas[0], llaves[0][0])
+
+    def test_lote_bloquea_filas_y_luego_todos_los_horarios_en_orden(self):
+        eventos = [self.evento(6, lugar=f'Salón {i}', fecha=date(2025, 6, 1 + i)) for i in range(3)]
+        ids = [evento.id_evento for evento in reversed(eventos)]
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.post('/Eventos/aprobar-rechazar/lote/', {'accion': 'aprobar', 'ids': ids},
+                                  self.pastor, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 200)
+        filas, llaves = self.orden_de_locks(consultas)
+        self.assertEqual(len(filas), 1)
+        self.assertEqual(len(llaves), 6)
+        posiciones = [i for i, _ in llaves]
+        self.assertLess(filas[0], posiciones[0])
+        # Todos seguidos, antes de la primera comprobación, y en orden de llave
+        self.assertEqual(posiciones, list(range(posiciones[0], posiciones[0] + 6)))
+        valores = [int(q['sql'].split('(')[1].rstrip(')')) for q in (consultas[i] for i in posiciones)]
+        self.assertEqual(valores, sorted(valores))
+
+    def test_disponibilidad_usa_el_indice_de_la_version_del_mes(self):
+        inicio = datetime(2025, 6, 1, 10, 30)
+        fin = inicio + timedelta(hours=1)
+        self.assertEqual(disponibilidad(inicio, fin, 'Templo'), [])
+        # Índices de mayo y junio armados: solo se consultan las versiones
+        with self.assertNumQueries(1):
+            self.assertEqual(disponibilidad(inicio, fin, 'Templo'), [])
+
+        evento = self.evento()
+        invalidar_meses(evento.fecha)
+        self.assertEqual([c['id_evento'] for c in disponibilidad(inicio, fin, ' templo ')], [evento.id_evento])
+        self.assertEqual(len(horarios._indices), 2)
+
+    @override_settings(HORARIOS_MESES_EN_MEMORIA=3)
+    def test_indices_en_memoria_acotados(self):
+        for mes in range(1, 7):
+            inicio = datetime(2025, mes, 15, 10, 0)
+            disponibilidad(inicio, inicio + timedelta(hours=1), 'Templo')
+        self.assertEqual([clave[:2] for clave in horarios._indices], [(2025, 4), (2025, 5), (2025, 6)])
+
+
+class ParticipantesTests(PruebaAPI):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.lider, cls.ajeno, *cls.usuarios = crear_usuarios(5)
+        ministerio = Ministerio.objects.create(nombre='Jóvenes', id_lider1=cls.lider)
+        cls.evento = crear_eventos(1, ministerio, cls.lider, cupo=2)[0]
+        cls.ids = [usuario.id_usuario for usuario in cls.usuarios]
+
+    def url(self, accion=''):
+        return f'/Eventos/participantes/{self.evento.id_evento}/{accion}'
+
+    def registrar(self, ids, usuario=None):
+        return self.post(self.url('registrar/'), {'ids': ids}, usuario or self.lider, content_type='application/json')
+
+    def asistencia(self, ids, usuario=None):
+        return self.post(self.url('asistencia/'), {'ids': ids}, usuario or self.lider, content_type='application/json')
+
+    def test_solo_quien_gestiona_el_evento_ve_registra_y_marca(self):
+        self.assertEqual(self.registrar(self.ids, self.ajeno).status_code, 403)
+        self.assertEqual(self.asistencia(self.ids, self.ajeno).status_code, 403)
+        self.assertEqual(self.get(self.url(), self.ajeno).status_code, 403)
+        self.assertEqual(self.get('/Eventos/participantes/999999/', self.lider).status_code, 404)
+        self.assertFalse(ParticipantesEvento.objects.filter(id_evento=self.evento).exists())
+
+        # Sin ids, cualquiera se inscribe a sí mismo
+        respuesta = self.post(self.url('registrar/'), {}, self.ajeno, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 201)
+        respuesta = self.get(self.url(), self.lider)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([p['id_usuario'] for p in respuesta.json()['participantes']], [self.ajeno.id_usuario])
+
+    def test_registrar_dos_veces_omite_los_ya_registrados(self):
+        respuesta = self.registrar(self.ids[:2] + self.ids[:1])
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(respuesta.json()['registrados'], self.ids[:2])
+
+        respuesta = self.registrar(self.ids)
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(respuesta.json(), {
+            'mensaje': 'Participantes registrados', 'registrados': [],
+            'en_espera': self.ids[2:], 'omitidos': self.ids[:2],
+        })
+        respuesta = self.registrar(self.ids)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['omitidos'], self.ids)
+        self.assertEqual(ParticipantesEvento.objects.filter(id_evento=self.evento).count(), 3)
+
+    def test_la_asistencia_solo_se_marca_a_confirmados(self):
+        self.registrar(self.ids)
+        respuesta = self.asistencia(self.ids + [self.ajeno.id_usuario])
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(sorted(respuesta.json()['marcados']), self.ids[:2])
+        self.assertEqual(respuesta.json()['no_registrados'], sorted(self.ids[2:] + [self.ajeno.id_usuario]))
+        self.assertEqual(
+            dict(ParticipantesEvento.objects.filter(id_evento=self.evento).values_list('id_usuario', 'asistencia')),
+            {self.ids[0]: True, self.ids[1]: True, self.ids[2]: None}
+        )
+
+
+class NotificacionesTests(PruebaAPI):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.pastor = crear_usuario(id_rol=1, prefijo='pastor')
+        cls.lider = crear_usuario()
+        cls.ministerio = Ministerio.objects.create(nombre='Jóvenes', id_lider1=cls.lider)
+        cls.evento = crear_eventos(1, cls.ministerio, cls.lider)[0]
+
+    def notificar(self, cantidad=1, tipo='solicitud_cancelacion', destino=None):
+        notificaciones = crear_notificaciones([
+            Notificaciones(
+                id_evento=self.evento, id_usuario_remitente=self.lider, id_usuario_destino=destino or self.pastor,
+                tipo=tipo, mensaje=f'Mensaje {i}'
+            )
+            for i in range(cantidad)
+        ])
+        return notificaciones[0] if cantidad == 1 else notificaciones
+
+    def responder(self, notificacion, aprobada, usuario=None):
+        return self.post('/Eventos/notificaciones/respuesta/', {
+            'id_notificacion': notificacion.id_notificacion, 'aprobada': aprobada, 'motivo_rechazo': 'No',
+        }, usuario or self.pastor, content_type='application/json')
+
+    def test_responder_descuenta_la_no_leida(self):
+        notificacion = self.notificar()
+        self.assertEqual(contar_no_leidas(self.pastor.id_usuario), 1)
+        self.assertEqual(self.responder(notificacion, False).status_code, 200)
+        self.assertEqual(contar_no_leidas(self.pastor.id_usuario), 0)
+
+    def test_aprobar_cancelacion_avisa_a_los_responsables(self):
+        otro_pastor = crear_usuario(id_rol=1, prefijo='pastor')
+        notificacion = self.notificar()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.responder(notificacion, True).status_code, 200)
+
+        self.evento.refresh_from_db()
+        self.assertEqual(self.evento.id_estado_id, 4)
+        avisos = Notificaciones.objects.filter(tipo='evento_cancelado', id_evento=self.evento)
+        # El líder del ministerio y el otro pastor; no quien aprobó
+        self.assertEqual(
+            sorted(avisos.values_list('id_usuario_destino', flat=True)),
+            sorted([self.lider.id_usuario, otro_pastor.id_usuario])
+        )
+        self.assertEqual(contar_no_leidas(self.lider.id_usuario), 1)
+
+    def test_responder_tras_marcar_leida_en_paralelo_no_descuenta_dos_veces(self):
+        self.notificar()  # Otra no leída: el contador no debe quedar en 0 por el tope
+        notificacion = self.notificar()
+        get = Notificaciones.objects.get
+
+        def leida_por_otra_peticion(*args, **kwargs):
+            # La otra petición la marca como leída justo después de que esta la lee
+            encontrada = get(*args, **kwargs)
+            if Notificaciones.objects.filter(pk=encontrada.pk, leida=False).update(leida=True):
+                sumar_no_leidas(self.pastor.id_usuario, -1)
+            return encontrada
+
+        with mock.patch.object(Notificaciones.objects, 'get', leida_por_otra_peticion):
+            self.assertEqual(self.responder(notificacion, False).status_code, 200)
+        self.assertEqual(contar_no_leidas(self.pastor.id_usuario), 1)
+        notificacion.refresh_from_db()
+        self.assertTrue(notificacion.leida)
+        self.assertFalse(notificacion.accion_tomada)
+
+    def test_marcar_hasta_cursor_marca_esa_y_las_mas_antiguas(self):
+        notificaciones = self.notificar(5)
+        # Más antigua primero; dos con la misma fecha para ejercitar el desempate por id
+        base = Notificaciones.objects.get(pk=notificaciones[0].pk).fecha_creacion
+        for minutos, notificacion in zip((0, 1, 2, 2, 3), notificaciones):
+            Notificaciones.objects.filter(pk=notificacion.pk).update(fecha_creacion=base + timedelta(minutes=minutos))
+
+        listado = self.get('/Eventos/notificaciones/', self.pastor).json()['notificaciones']
+        self.assertEqual([n['id_notificacion'] for n in listado], [n.pk for n in reversed(notificaciones)])
+
+        # El cliente vio hasta la segunda más reciente (empata en fecha con la tercera)
+        respuesta = self.post('/Eventos/notificaciones/marcar_leidas/', {'hasta': listado[1]['cursor']},
+                              self.pastor, content_type='application/json')
+        self.assertEqual(respuesta.json()['actualizadas'], 4)
+        no_leidas = Notificaciones.objects.filter(id_usuario_destino=self.pastor, leida=False)
+        self.assertEqual(list(no_leidas.values_list('pk', flat=True)), [notificaciones[4].pk])
+        self.assertEqual(contar_no_leidas(self.pastor.id_usuario), 1)
+
+
+class TiposEventoTests(PruebaAPI):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.pastor = crear_usuario(id_rol=1, prefijo='pastor')
+
+    def cambiar_estado(self, encabezados):
+        return self.client.patch('/Eventos/tipos_evento/cambiar_estado/1/', **encabezados)
+
+    def test_rol_de_la_base_sin_bloquear_la_fila_del_usuario(self):
+        encabezados = self.autorizacion(self.pastor)
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.cambiar_estado(encabezados).status_code, 200)
+        bloqueos = [q['sql'] for q in consultas if 'FOR UPDATE' in q['sql']]
+        self.assertEqual(len(bloqueos), 1)
+        self.assertIn('"tipo_evento"', bloqueos[0])
+
+    def test_token_de_pastor_degradado_no_autoriza(self):
+        encabezados = self.autorizacion(self.pastor)
+        Usuario.objects.filter(pk=self.pastor.pk).update(id_rol_id=2)
+        self.assertEqual(self.cambiar_estado(encabezados).status_code, 403)
+        respuesta = self.client.post(
+            '/Eventos/tipos_evento/crear/', {'nombre': 'Retiro'}, content_type='application/json', **encabezados
+        )
+        self.assertEqual(respuesta.status_code, 403)
+
+
+class CatalogosTests(PruebaAPI):
+    """Estados y tipos se sirven de memoria y se recargan cuando cambia la versión compartida."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.lider = crear_usuario()
+
+    def setUp(self):
+        super().setUp()
+        # Otras pruebas pudieron dejar una copia de datos ya revertidos
+        catalogos.invalidar_catalogos()
+        catalogos.listar_tipos_evento()
+        self.encabezados = self.autorizacion(self.lider)
+
+    def version(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT version FROM versiones_catalogo WHERE nombre = %s', [catalogos.CATALOGO])
+            return cursor.fetchone()[0]
+
+    def tipos(self):
+        respuesta = self.client.get('/Eventos/tipos_evento/listar/', **self.encabezados)
+        self.assertEqual(respuesta.status_code, 200)
+        return [tipo['nombre'] for tipo in respuesta.json()['data']]
+
+    def test_guardar_o_borrar_estado_y_tipo_incrementa_la_version(self):
+        version = self.version()
+        with self.captureOnCommitCallbacks(execute=True):
+            tipo = TipoEvento.objects.create(nombre='Retiro')
+        self.assertEqual(self.version(), version + 1)
+        # Quien escribe descarta su copia al confirmar
+        self.assertIn('Retiro', self.tipos())
+
+        estado = EstadoEvento.objects.get(pk=6)
+        estado.nombre = 'Postergado'
+        with self.captureOnCommitCallbacks(execute=True):
+            estado.save()
+        self.assertEqual(self.version(), version + 2)
+        self.assertEqual(catalogos.obtener_id_estado('Postergado'), 6)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tipo.delete()
+        self.assertEqual(self.version(), version + 3)
+        self.assertNotIn('Retiro', self.tipos())
+
+    def test_otro_proceso_recarga_tras_un_cambio_externo(self):
+        with self.assertNumQueries(0):
+            self.assertNotIn('Retiro', self.tipos())
+
+        # Otro proceso inserta un tipo e incrementa la versión; aquí no corre ninguna señal
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO tipo_evento (nombre, activo) VALUES ('Retiro', TRUE)")
+            cursor.execute(
+                'UPDATE versiones_catalogo SET version = version + 1 WHERE nombre = %s', [catalogos.CATALOGO]
+            )
+
+        # Dentro de la ventana de revalidación se sigue sirviendo la copia
+        with self.assertNumQueries(0):
+            self.assertNotIn('Retiro', self.tipos())
+        with override_settings(CATALOGOS_REVALIDAR=0):
+            # La versión y, como cambió, las dos tablas
+            with self.assertNumQueries(3):
+                self.assertIn('Retiro', self.tipos())
+            with self.assertNumQueries(1):
+                self.tipos()
+        with self.assertNumQueries(0):
+            self.assertIn('Retiro', self.tipos())
+
+
+class BrokerMemoriaTests(SimpleTestCase):
+    DATOS = {'evento': 'notificacion', 'id_notificacion': 1, 'mensaje': 'Hola'}
+
+    async def test_entrega_solo_a_las_colas_del_usuario(self):
+        broker = BrokerMemoria()
+        cola, otra = broker.suscribir(1), broker.suscribir(2)
+        # Las vistas publican desde el hilo de la petición, no desde el event loop
+        await asyncio.to_thread(broker.publicar, 1, self.DATOS)
+        self.assertEqual(await asyncio.wait_for(cola.get(), 1), self.DATOS)
+        self.assertTrue(otra.empty())
+
+    @override_settings(SSE_COLA_MAX=2)
+    async def test_cola_llena_pide_resincronizar(self):
+        broker = BrokerMemoria()
+        cola = broker.suscribir(1)
+        for _ in range(3):
+            broker.publicar(1, self.DATOS)
+        await asyncio.sleep(0)
+        self.assertEqual(cola.get_nowait(), RESINCRONIZAR)
+        self.assertTrue(cola.empty())
+
+    async def test_desuscribir_deja_de_entregar(self):
+        broker = BrokerMemoria()
+        cola = broker.suscribir(1)
+        broker.desuscribir(1, cola)
+        broker.publicar(1, self.DATOS)
+        await asyncio.sleep(0)
+        self.assertTrue(cola.empty())
+        self.assertEqual(broker._suscripciones, {})
+
+    @override_settings(SSE_HEARTBEAT=0.01)
+    async def test_flujo_formatea_y_se_desuscribe_al_cerrar(self):
+        broker = BrokerMemoria()
+        with mock.patch('Eventos.difusion.obtener_broker', return_value=broker):
+            flujo = flujo_notificaciones(1)
+            self.assertTrue((await anext(flujo)).startswith('retry: '))
+            self.assertEqual(await anext(flujo), ': ping\n\n')
+            broker.publicar(1, self.DATOS)
+            self.assertEqual(await anext(flujo), 'id: 1\nevent: notificacion\ndata: {"id_notificacion": 1, "mensaje": "Hola"}\n\n')
+            await flujo.aclose()
+        self.assertEqual(broker._suscripciones, {})
+
+
+class NotificacionesStreamTests(PruebaAPI):
+    URL = '/Eventos/notificaciones/stream/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.lider = crear_usuario()
+
+    def test_ticket_abre_el_flujo_con_asgi(self):
+        ticket = self.post(f'{self.URL}ticket/', usuario=self.lider).json()['ticket']
+
+        async def abrir():
+            respuesta = await self.async_client.get(self.URL, {'ticket': ticket})
+            primero = await anext(aiter(respuesta.streaming_content))
+            await respuesta._iterator.aclose()
+            return respuesta, primero
+
+        respuesta, primero = asyncio.run(abrir())
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['Content-Type'], 'text/event-stream')
+        self.assertTrue(primero.startswith(b'retry: '))
+
+    def test_ticket_invalido_o_expirado(self):
+        async def estado(ticket):
+            return (await self.async_client.get(self.URL, {'ticket': ticket})).status_code
+
+        self.assertEqual(asyncio.run(estado('falso')), 401)
+        with override_settings(SSE_TICKET_SEGUNDOS=-1):
+            self.assertEqual(asyncio.run(estado(emitir_ticket(self.lider.id_usuario))), 401)
+
+    def test_con_wsgi_responde_501(self):
+        ticket = emitir_ticket(self.lider.id_usuario)
+        self.assertEqual(self.client.get(self.URL, {'ticket': ticket}).status_code, 501)
+
+
+class PruebaConcurrente(TransactionTestCase):
+    """Funciones en hilos con conexiones propias: los locks se ejercitan de verdad."""
+
+    def tearDown(self):
+        # flush no vacía las tablas de modelos no administrados
+        with connection.cursor() as cursor:
+            cursor.execute('TRUNCATE rol, estado_evento, tipo_evento, personas RESTART IDENTITY CASCADE')
+
+    def en_hilos(self, funciones):
+        barrera = threading.Barrier(len(funciones))
+        errores = []
+
+        def correr(funcion):
+            try:
+                barrera.wait()
+                funcion()
+            except Exception as e:
+                errores.append(e)
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=correr, args=(funcion,)) for funcion in funciones]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(errores, [])
+
+
+class InscripcionesConcurrentesTests(PruebaConcurrente):
+    def setUp(self):
+        crear_catalogos()
+        self.usuarios = crear_usuarios(40)
+        ministerio = Ministerio.objects.create(nombre='Jóvenes', id_lider1=self.usuarios[0])
+        self.evento = crear_eventos(1, ministerio, self.usuarios[0], cupo=10)[0]
+
+    def confirmados(self):
+        participantes = ParticipantesEvento.objects.filter(id_evento=self.evento)
+        return participantes.filter(en_espera=False).count(), participantes.filter(en_espera=True).count()
+
+    def test_inscripciones_simultaneas_no_superan_el_cupo(self):
+        self.en_hilos([
+            lambda id_usuario=usuario.id_usuario: registrar_participantes(self.evento.id_evento, [id_usuario])
+            for usuario in self.usuarios
+        ])
+        self.assertEqual(self.confirmados(), (10, 30))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT COUNT(*), COUNT(id_participacion) FROM plazas_evento WHERE id_evento = %s',
+                [self.evento.id_evento],
+            )
+            self.assertEqual(cursor.fetchone(), (10, 10))
+
+    def test_con_lugares_libres_las_inscripciones_no_se_esperan(self):
+        registrar_participantes(self.evento.id_evento, [self.usuarios[0].id_usuario])
+        inscrito, listo = threading.Event(), threading.Event()
+        resultado = {}
+
+        def primero():
+            with transaction.atomic():
+                registrar_participantes(self.evento.id_evento, [self.usuarios[1].id_usuario])
+                inscrito.set()
+                listo.wait(5)
+
+        def segundo():
+            inscrito.wait(5)
+            try:
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        cursor.execute("SET LOCAL lock_timeout = '200ms'")
+                    resultado['promovidos'] = registrar_participantes(
+                        self.evento.id_evento, [self.usuarios[2].id_usuario]
+                    )[1]
+            finally:
+                listo.set()
+
+        self.en_hilos([primero, segundo])
+        self.assertEqual(resultado['promovidos'], [self.usuarios[2].id_usuario])
+        self.assertEqual(self.confirmados(), (3, 0))
+
+    def test_inscripcion_durante_una_edicion_usa_el_cupo_confirmado(self):
+        editando, inscribiendo = threading.Event(), threading.Event()
+
+        def editar():
+            with transaction.atomic():
+                Evento.objects.filter(pk=self.evento.pk).update(cupo=2)
+                cambiar_cupo(self.evento.id_evento, 2)
+                editando.set()
+                # La inscripción espera el lock de cupo hasta el COMMIT
+                inscribiendo.wait(5)
+                sleep(0.2)
+
+        def inscribir():
+            editando.wait(5)
+            inscribiendo.set()
+            registrar_participantes(self.evento.id_evento, [usuario.id_usuario for usuario in self.usuarios[:5]])
+
+        self.en_hilos([editar, inscribir])
+        self.assertEqual(self.confirmados(), (2, 3))
+
+
+class ListaEsperaTests(PruebaAPI):
+    def setUp(self):
+        super().setUp()
+        self.usuarios = crear_usuarios(5)
+        ministerio = Ministerio.objects.create(nombre='Jóvenes', id_lider1=self.usuarios[0])
+        self.evento = crear_eventos(1, ministerio, self.usuarios[0], cupo=2)[0]
+        self.ids = [usuario.id_usuario for usuario in self.usuarios]
+        registrar_participantes(self.evento.id_evento, self.ids)
+
+    def en_espera(self):
+        return list(ParticipantesEvento.objects.filter(id_evento=self.evento, en_espera=True)
+                    .order_by('id_participacion').values_list('id_usuario', flat=True))
+
+    def test_cancelar_un_confirmado_promueve_al_primero_en_espera(self):
+        self.assertEqual(self.en_espera(), self.ids[2:])
+        self.assertEqual(cancelar_participacion(self.evento.id_evento, self.ids[0]), (True, [self.ids[2]]))
+        self.assertEqual(cancelar_participacion(self.evento.id_evento, self.ids[4]), (True, []))
+        self.assertEqual(self.en_espera(), [self.ids[3]])
+
+    def test_bajar_el_cupo_no_saca_a_nadie_ni_libera_lugares(self):
+        self.assertEqual(cambiar_cupo(self.evento.id_evento, 2), [])
+        Evento.objects.filter(pk=self.evento.pk).update(cupo=1)
+        self.assertEqual(cambiar_cupo(self.evento.id_evento, 1), [])
+        # Con dos confirmados y cupo 1, la primera cancelación no deja lugar libre
+        self.assertEqual(cancelar_participacion(self.evento.id_evento, self.ids[0]), (True, []))
+        self.assertEqual(cancelar_participacion(self.evento.id_evento, self.ids[1]), (True, [self.ids[2]]))
+
+    def test_subir_el_cupo_o_quitarlo_promueve_en_orden(self):
+        Evento.objects.filter(pk=self.evento.pk).update(cupo=3)
+        self.assertEqual(cambiar_cupo(self.evento.id_evento, 3), [self.ids[2]])
+        Evento.objects.filter(pk=self.evento.pk).update(cupo=None)
+        self.assertEqual(sorted(cambiar_cupo(self.evento.id_evento, None)), self.ids[3:])
+        # Con cupo otra vez, los confirmados ocupan plazas y los nuevos esperan
+        Evento.objects.filter(pk=self.evento.pk).update(cupo=4)
+        self.assertEqual(cambiar_cupo(self.evento.id_evento, 4), [])
+        otro = crear_usuario()
+        self.assertEqual(registrar_participantes(self.evento.id_evento, [otro.id_usuario]), ([otro.id_usuario], []))
+
+
+class HorariosConcurrentesTests(PruebaConcurrente):
+    INICIO = datetime(2025, 6, 1, 10, 0)
+    FIN = datetime(2025, 6, 1, 12, 0)
+
+    def setUp(self):
+        crear_catalogos()
+
+    def comprobar_mientras_otro_bloquea(self, lugar, id_ministerio):
+        """Si ``comprobar_horario`` espera a otra transacción que bloqueó Templo / ministerio 1."""
+        bloqueado, listo = threading.Event(), threading.Event()
+        resultado = {}
+
+        def primero():
+            with transaction.atomic():
+                horarios.comprobar_horario(self.INICIO, self.FIN, 'Templo', 1)
+                bloqueado.set()
+                listo.wait(5)
+
+        def segundo():
+            bloqueado.wait(5)
+            try:
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        cursor.execute("SET LOCAL lock_timeout = '200ms'")
+                    horarios.comprobar_horario(self.INICIO + timedelta(hours=1), self.FIN, lugar, id_ministerio)
+                resultado['espera'] = False
+            except OperationalError:
+                resultado['espera'] = True
+            finally:
+                listo.set()
+
+        self.en_hilos([primero, segundo])
+        return resultado['espera']
+
+    def test_otro_lugar_y_ministerio_del_mismo_dia_no_espera(self):
+        self.assertFalse(self.comprobar_mientras_otro_bloquea('Salón', 2))
+
+    def test_mismo_lugar_o_mismo_ministerio_espera(self):
+        self.assertTrue(self.comprobar_mientras_otro_bloquea(' templo ', 2))
+        self.assertTrue(self.comprobar_mientras_otro_bloquea('Salón', 1))
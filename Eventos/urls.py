@@ -5,7 +5,9 @@ from . import views
 urlpatterns = [
     path('crear/', CrearEventoView.as_view(), name='crear_evento'),  
     path('editar/<int:id_evento>/', EditarEventoView.as_view(), name='editar_evento'),
+    path('disponibilidad/', DisponibilidadHorarioView.as_view(), name='disponibilidad_horario'),
     path('cancelar-reactivar/<int:id_evento>/', CancelarEventoView.as_view(), name='cancelar_evento'),
+    path('aprobar-rechazar/lote/', AprobarRechazarEventosLoteView.as_view(), name='aprobar_rechazar_eventos_lote'),
     path('aprobar-rechazar/<int:id_evento>/', AprobarRechazarEventoView.as_view(), name='aprobar_rechazar_evento'),
     path('eventos/', ListarEventosView.as_view(), name='listar_eventos'),
     path('detalle_eventos/<int:id_evento>/', ObtenerEventoView.as_view(), name='obtener_evento'),
@@ -13,9 +15,18 @@ urlpatterns = [
     path('evetos_usuarios/', ListarEventosOtrosUsuariosView.as_view(), name='listar_eventos_otros_usuarios'),
     path('eventos_todos/', ListarTodosEventosView.as_view(), name='todos_eventos'),
     path('eventos_ministerio/<int:ministerio_id>/', EventosPorMinisterioView.as_view(), name='eventos_por_ministerio'),
+    path('calendario/<int:año>/<int:mes>/', CalendarioMesView.as_view(), name='calendario_mes'),
+    path('participantes/<int:id_evento>/', ListarParticipantesEventoView.as_view(), name='listar_participantes_evento'),
+    path('participantes/<int:id_evento>/registrar/', RegistrarParticipantesView.as_view(), name='registrar_participantes'),
+    path('participantes/<int:id_evento>/cancelar/', CancelarParticipacionView.as_view(), name='cancelar_participacion'),
+    path('participantes/<int:id_evento>/asistencia/', MarcarAsistenciaView.as_view(), name='marcar_asistencia'),
     path('notificaciones/', NotificacionesView.as_view(), name='notificaciones'),
+    path('notificaciones/stream/', NotificacionesStreamView.as_view(), name='notificaciones_stream'),
+    path('notificaciones/stream/ticket/', TicketNotificacionesStreamView.as_view(), name='notificaciones_stream_ticket'),
+    path('notificaciones/no_leidas/', NotificacionesNoLeidasView.as_view(), name='notificaciones_no_leidas'),
     path('notificaciones/respuesta/', ResponderNotificacionView.as_view(), name='responder_notificacion'),
     path('notificaciones/marcar_leida/', views.MarcarNotificacionLeidaView.as_view(), name='marcar_notificacion_leida'),
+    path('notificaciones/marcar_leidas/', MarcarNotificacionesLeidasView.as_view(), name='marcar_notificaciones_leidas'),
     path('tipos_evento/', include([path('crear/', CrearTipoEventoView.as_view(), name='crear_tipo_evento'),
                                    path('listar/', ListarTiposEventoView.as_view(), name='listar_tipos_evento'),
                                    path('editar/<int:id_tipo_evento>/', EditarTipoEventoView.as_view(), name='editar_tipo_evento'),
@@ -1,44 +1,69 @@
 import json
+from datetime import MAXYEAR, MINYEAR, datetime
+
 import jwt
+from django.conf import settings
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
 from django.db import transaction
+from django.db.models import Count, Window
 from django.views import View
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-from django.conf import settings
+from django.views.decorators.http import condition
 
+from backend.replica import usar_replica
+from backend.respuestas import RespuestaJSON
+from Login.middleware import token_requerido
+from Login.roles import rol_permitido
 from Login.models import *
 from Ministerio.models import Ministerio
-from .models import Evento, MotivosEvento, Notificaciones, TipoEvento
+from .calendario import invalidar_meses, obtener_mes
+from .catalogos import listar_tipos_evento, nombre_estado, obtener_id_estado, obtener_tipo_evento
+from .condicional import COLUMNAS_ETAG, etag_evento, etag_filas, respuesta_condicional
+from .difusion import emitir_ticket, flujo_notificaciones, leer_ticket, publicar_notificacion
+from .horarios import (
+    comprobar_horario, comprobar_horarios, disponibilidad, entra_a_ocupar, ids_estados_ocupan, leer_duracion, ventana,
+)
+from .models import Evento, MotivosEvento, Notificaciones, ParticipantesEvento, TipoEvento
+from .notificaciones import contar_no_leidas, notificar_responsables, notificar_responsables_varios, sumar_no_leidas
+from .paginacion import cursor_de_fila, filtro_desde_cursor, paginar_por_cursor, paginar_si_se_solicita
+from .participantes import (
+    cambiar_cupo, cancelar_participacion, crear_plazas, datos_gestion_evento, marcar_asistencia,
+    notificar_promovidos, puede_gestionar, registrar_participantes,
+)
+from .serializacion import (
+    EVENTOS_MINISTERIO, EVENTOS_OTROS, LISTADO, MIS_EVENTOS, TODOS_EVENTOS, SerializadorEvento, constante,
+)
+
+def leer_cupo(valor):
+    """Cupo enviado en el formulario: vacío es sin límite; lanza ValueError si no es un entero >= 0."""
+    if valor in ('', None):
+        return None
+    cupo = int(valor)
+    if cupo < 0:
+        raise ValueError('cupo no puede ser negativo')
+    return cupo
+
+def respuesta_conflictos(conflictos):
+    return JsonResponse({
+        'error': 'El horario se cruza con otros eventos del mismo lugar o ministerio',
+        'conflictos': conflictos
+    }, status=409)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class CrearEventoView(View):
     ESTADO_PENDIENTE = 1
     ESTADO_APROBADO = 2
     
     def post(self, request, *args, **kwargs):
         try:
-            # Verificación del token (se mantiene igual)
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-
-            token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
-
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                id_usuario = payload.get('id_usuario')
-                rol = payload.get('rol')
-                
-                if rol == "Pastor":
-                    rol_id = 1
-                else:
-                    rol_id = 2
-                    
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            id_usuario = request.usuario.id_usuario
+            rol_id = request.usuario.id_rol
 
             # Campos obligatorios (añadimos id_tipo_evento como opcional)
             required_fields = ['nombre', 'id_ministerio', 'descripcion', 'fecha', 'hora']
@@ -65,7 +90,23 @@ class CrearEventoView(View):
                 if 'id_tipo_evento' in request.POST and request.POST['id_tipo_evento']:
                     evento_data['id_tipo_evento_id'] = request.POST['id_tipo_evento']
 
+                # Cupo opcional; sin cupo no hay límite de participantes
+                if 'cupo' in request.POST:
+                    evento_data['cupo'] = leer_cupo(request.POST['cupo'])
+
+                # Duración en minutos; sin ella se usa la duración por defecto
+                evento_data['duracion'] = leer_duracion(request.POST.get('duracion'))
+
+                # Mismo lugar o mismo ministerio en una ventana que se cruza
+                inicio, fin = ventana(evento_data['fecha'], evento_data['hora'], evento_data['duracion'])
+                conflictos = comprobar_horario(inicio, fin, evento_data['lugar'], evento_data['id_ministerio_id'])
+                if conflictos:
+                    return respuesta_conflictos(conflictos)
+
                 evento = Evento.objects.create(**evento_data)
+                if evento.cupo is not None:
+                    crear_plazas(evento.id_evento)
+                invalidar_meses(evento.fecha)
 
                 if rol_id == 1:
                     MotivosEvento.objects.create(
@@ -75,39 +116,39 @@ class CrearEventoView(View):
                     )
 
                 estado_texto = "Aprobado" if rol_id == 1 else "Pendiente"
+                notificar_responsables(
+                    evento, id_usuario, 'evento_creado',
+                    f"Nuevo evento '{evento.nombre}' ({estado_texto.lower()})"
+                )
                 return JsonResponse({
                     'mensaje': 'Evento creado exitosamente',
                     'id_evento': evento.id_evento,
                     'estado': estado_texto,
-                    'id_tipo_evento': evento.id_tipo_evento_id if evento.id_tipo_evento else None
+                    'id_tipo_evento': evento.id_tipo_evento_id if evento.id_tipo_evento else None,
+                    'cupo': evento.cupo,
+                    'duracion': evento.duracion
                 }, status=201)
 
+        except ValueError as e:
+            return JsonResponse({'error': 'Parámetros inválidos: ' + str(e)}, status=400)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
         
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class EditarEventoView(View):
     def post(self, request, id_evento, *args, **kwargs):
         try:
-            # Autenticación y validación de token
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-
-            token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
-
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                usuario_id = payload.get('id_usuario')
-                rol_id = payload.get('rol')
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            usuario_id = request.usuario.id_usuario
+            rol_id = request.usuario.id_rol
 
             with transaction.atomic():
                 try:
-                    evento = Evento.objects.get(id_evento=id_evento)
+                    # La fila se bloquea antes que los horarios (orden de locks de horarios.py).
+                    # NO KEY: las inscripciones (llave foránea) no esperan a la edición
+                    # mientras la edición espera el lock de cupo que ellas tienen
+                    evento = Evento.objects.select_for_update(no_key=True).get(id_evento=id_evento)
                 except Evento.DoesNotExist:
                     return JsonResponse({'error': 'Evento no encontrado'}, status=404)
 
@@ -115,6 +156,9 @@ class EditarEventoView(View):
                 if evento.id_usuario_id != usuario_id and rol_id != 1:
                     return JsonResponse({'error': 'No tiene permisos para editar este evento'}, status=403)
 
+                fecha_anterior = evento.fecha
+                ocupaba_horario = evento.id_estado_id in ids_estados_ocupan()
+
                 # Campos editables
                 campos_editables = {
                     'nombre': 'nombre',
@@ -136,11 +180,36 @@ class EditarEventoView(View):
                         
                         setattr(evento, field_db, request.POST[field] if request.POST[field] else None)
 
+                # Un cupo mayor (o quitarlo) libera lugares para la lista de espera
+                cambia_cupo = 'cupo' in request.POST
+                if cambia_cupo:
+                    evento.cupo = leer_cupo(request.POST['cupo'])
+
+                if 'duracion' in request.POST:
+                    evento.duracion = leer_duracion(request.POST['duracion'])
+
                 # Cambiar estado según quién edita
                 nuevo_estado = 2 if rol_id == 1 else 1  # 2: Aprobado, 1: Pendiente
                 evento.id_estado_id = nuevo_estado
+
+                # Se comprueba si cambia el horario, el lugar o el ministerio, o si el evento vuelve a ocupar horario
+                campos_horario = ('fecha', 'hora', 'duracion', 'lugar', 'id_ministerio')
+                if not ocupaba_horario or any(campo in request.POST for campo in campos_horario):
+                    inicio, fin = ventana(evento.fecha, evento.hora, evento.duracion)
+                    conflictos = comprobar_horario(
+                        inicio, fin, evento.lugar, evento.id_ministerio_id, excluir=evento.id_evento
+                    )
+                    if conflictos:
+                        return respuesta_conflictos(conflictos)
                 
                 evento.save()
+                # Si cambió la fecha, el evento sale de un mes y entra en otro
+                invalidar_meses(fecha_anterior, evento.fecha)
+
+                if cambia_cupo:
+                    promovidos = cambiar_cupo(evento.id_evento, evento.cupo)
+                    if promovidos:
+                        notificar_promovidos(evento.id_evento, evento.nombre, promovidos)
 
                 # Registrar motivo si lo edita un pastor
                 if rol_id == 1:
@@ -155,33 +224,62 @@ class EditarEventoView(View):
                     'id_evento': evento.id_evento,
                     'estado': 'Aprobado' if rol_id == 1 else 'Pendiente',
                     'id_tipo_evento': evento.id_tipo_evento_id,
-                    'tipo_evento': evento.id_tipo_evento.nombre if evento.id_tipo_evento else None
+                    'tipo_evento': evento.id_tipo_evento.nombre if evento.id_tipo_evento else None,
+                    'cupo': evento.cupo,
+                    'duracion': evento.duracion
                 }, status=200)
 
+        except ValueError as e:
+            return JsonResponse({'error': 'Parámetros inválidos: ' + str(e)}, status=400)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
 
 @method_decorator(csrf_exempt, name='dispatch')
-class CancelarEventoView(View):
-    def post(self, request, id_evento, *args, **kwargs):
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
+class DisponibilidadHorarioView(View):
+    """Consulta sin escribir: eventos que se cruzarían con la ventana pedida."""
+
+    def get(self, request, *args, **kwargs):
         try:
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
+            for campo in ('fecha', 'hora'):
+                if not request.GET.get(campo):
+                    return JsonResponse({'error': f'El parámetro {campo} es obligatorio'}, status=400)
+
+            id_ministerio = request.GET.get('id_ministerio')
+            id_evento = request.GET.get('id_evento')  # al editar, el propio evento no cuenta
+            inicio, fin = ventana(request.GET['fecha'], request.GET['hora'], leer_duracion(request.GET.get('duracion')))
+            conflictos = disponibilidad(
+                inicio, fin,
+                lugar=request.GET.get('lugar'),
+                id_ministerio=int(id_ministerio) if id_ministerio else None,
+                excluir=int(id_evento) if id_evento else None
+            )
 
-            token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+            return JsonResponse({
+                'disponible': not conflictos,
+                'inicio': inicio,
+                'fin': fin,
+                'conflictos': conflictos
+            }, status=200)
 
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                usuario_id = payload.get('id_usuario')
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+        except ValueError as e:
+            return JsonResponse({'error': 'Parámetros inválidos: ' + str(e)}, status=400)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+
+@method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
+class CancelarEventoView(View):
+    def post(self, request, id_evento, *args, **kwargs):
+        try:
+            usuario_id = request.usuario.id_usuario
 
             with transaction.atomic():
                 try:
-                    evento = Evento.objects.get(id_evento=id_evento)
+                    # La fila se bloquea antes que los horarios (orden de locks de horarios.py)
+                    evento = Evento.objects.select_for_update().get(id_evento=id_evento)
                 except Evento.DoesNotExist:
                     return JsonResponse({'error': 'Evento no encontrado'}, status=404)
 
@@ -195,18 +293,32 @@ class CancelarEventoView(View):
                 if evento.id_estado_id == 4:  # Si está cancelado
                     nuevo_estado = 2  # Cambiar a aprobado (asumiendo que 2 es aprobado)
                     mensaje = 'Evento reactivado y aprobado exitosamente'
+
+                    # Al reactivarse vuelve a ocupar su horario
+                    inicio, fin = ventana(evento.fecha, evento.hora, evento.duracion)
+                    conflictos = comprobar_horario(
+                        inicio, fin, evento.lugar, evento.id_ministerio_id, excluir=evento.id_evento
+                    )
+                    if conflictos:
+                        return respuesta_conflictos(conflictos)
                 else:  # Para cualquier otro estado
                     nuevo_estado = 4  # Cambiar a cancelado
                     mensaje = 'Evento cancelado exitosamente'
 
                 evento.id_estado_id = nuevo_estado
                 evento.save()
+                invalidar_meses(evento.fecha)
 
                 MotivosEvento.objects.create(
                     id_evento=evento,
                     id_usuario_id=usuario_id,
                     descripcion=request.POST.get('motivo', 'Cancelado/reactivado por el creador')
                 )
+                notificar_responsables(
+                    evento, usuario_id,
+                    'evento_reactivado' if nuevo_estado == 2 else 'evento_cancelado',
+                    f"Evento '{evento.nombre}' {'reactivado' if nuevo_estado == 2 else 'cancelado'} por su creador"
+                )
 
                 return JsonResponse({
                     'mensaje': mensaje,
@@ -217,37 +329,47 @@ class CancelarEventoView(View):
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
 
-def obtener_usuario_id(request):
-    auth_header = request.headers.get('Authorization')
-    if not auth_header:
-        raise Exception('Token no proporcionado')
-    
-    token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
-    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-    return payload.get('id_usuario')
-
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class AprobarRechazarEventoView(View):
+    # Mapeo de estados y validaciones (compartido con la aprobación masiva)
+    STATE_MAPPING = {
+        'aprobar': {
+            'allowed_states': [1, 6],  # Pendiente o Pospuesto
+            'new_state': 2,  # Aprobado
+            'error_msg': 'Solo se pueden aprobar eventos pendientes o pospuestos'
+        },
+        'rechazar': {
+            'allowed_states': [1, 6],  # Pendiente o Pospuesto
+            'new_state': 3,  # Rechazado
+            'error_msg': 'Solo se pueden rechazar eventos pendientes o pospuestos'
+        },
+        'cancelar': {
+            'allowed_states': [2],  # Aprobado
+            'new_state': 4,  # Cancelado
+            'error_msg': 'Solo se pueden cancelar eventos aprobados'
+        },
+        'posponer': {
+            'allowed_states': [1],  # Pendiente
+            'new_state': 6,  # Pospuesto
+            'error_msg': 'Solo se pueden posponer eventos pendientes'
+        }
+    }
+
+    NOMBRES_ESTADO = {
+        2: 'Aprobado',
+        3: 'Rechazado',
+        4: 'Cancelado',
+        6: 'Pospuesto'
+    }
+
     def post(self, request, id_evento, *args, **kwargs):
         try:
-            # Verificación de token y autenticación
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-
-            token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
-
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                usuario_id = payload.get('id_usuario')
-                rol_nombre = payload.get('rol')
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            usuario_id = request.usuario.id_usuario
 
             # Verificar si es Pastor
-            if rol_nombre != 'Pastor':
+            if not rol_permitido(request.usuario, [1]):
                 return JsonResponse({'error': 'No tiene permisos para esta acción'}, status=403)
 
             with transaction.atomic():
@@ -267,7 +389,8 @@ class AprobarRechazarEventoView(View):
                     }, status=400)
 
                 try:
-                    evento = Evento.objects.get(id_evento=id_evento)
+                    # La fila se bloquea antes que los horarios (orden de locks de horarios.py)
+                    evento = Evento.objects.select_for_update().get(id_evento=id_evento)
                 except Evento.DoesNotExist:
                     return JsonResponse({'error': 'Evento no encontrado'}, status=404)
 
@@ -283,67 +406,54 @@ class AprobarRechazarEventoView(View):
                         }, status=400)
                     
                     # Crear notificación de solicitud de cancelación
-                    Notificaciones.objects.create(
+                    notificacion = Notificaciones.objects.create(
                         id_evento=evento,
                         id_usuario_remitente_id=usuario_id,
                         id_usuario_destino=evento.id_usuario,
                         tipo='solicitud_cancelacion',
                         mensaje=f"Solicitud de cancelación del evento '{evento.nombre}'. Motivo: {motivo}"
                     )
+                    sumar_no_leidas(evento.id_usuario_id)
+                    publicar_notificacion(notificacion)
                     
                     return JsonResponse({
                         'mensaje': 'Solicitud de cancelación enviada al creador del evento',
                         'requiere_aprobacion': True
                     })
 
-                # Mapeo de estados y validaciones
-                state_mapping = {
-                    'aprobar': {
-                        'allowed_states': [1, 6],  # Pendiente o Pospuesto
-                        'new_state': 2,  # Aprobado
-                        'error_msg': 'Solo se pueden aprobar eventos pendientes o pospuestos'
-                    },
-                    'rechazar': {
-                        'allowed_states': [1, 6],  # Pendiente o Pospuesto
-                        'new_state': 3,  # Rechazado
-                        'error_msg': 'Solo se pueden rechazar eventos pendientes o pospuestos'
-                    },
-                    'cancelar': {
-                        'allowed_states': [2],  # Aprobado
-                        'new_state': 4,  # Cancelado
-                        'error_msg': 'Solo se pueden cancelar eventos aprobados'
-                    },
-                    'posponer': {
-                        'allowed_states': [1],  # Pendiente
-                        'new_state': 6,  # Pospuesto
-                        'error_msg': 'Solo se pueden posponer eventos pendientes'
-                    }
-                }
-
-                action_config = state_mapping.get(accion)
+                action_config = self.STATE_MAPPING.get(accion)
                 if evento.id_estado_id not in action_config['allowed_states']:
                     return JsonResponse({
                         'error': 'Acción no permitida',
                         'detalle': action_config['error_msg']
                     }, status=400)
 
+                # Un evento pospuesto que se aprueba vuelve a ocupar su horario
+                if entra_a_ocupar(evento.id_estado_id, action_config['new_state']):
+                    inicio, fin = ventana(evento.fecha, evento.hora, evento.duracion)
+                    conflictos = comprobar_horario(
+                        inicio, fin, evento.lugar, evento.id_ministerio_id, excluir=evento.id_evento
+                    )
+                    if conflictos:
+                        return respuesta_conflictos(conflictos)
+
                 # Actualizar estado del evento
                 evento.id_estado_id = action_config['new_state']
                 evento.save()
+                invalidar_meses(evento.fecha)
 
                 # Registrar motivo
-                estado_nombre = {
-                    2: 'Aprobado',
-                    3: 'Rechazado',
-                    4: 'Cancelado',
-                    6: 'Pospuesto'
-                }.get(action_config['new_state'], 'Desconocido')
+                estado_nombre = self.NOMBRES_ESTADO.get(action_config['new_state'], 'Desconocido')
 
                 MotivosEvento.objects.create(
                     id_evento=evento,
                     id_usuario_id=usuario_id,
                     descripcion=motivo or f"Evento {estado_nombre.lower()}"
                 )
+                notificar_responsables(
+                    evento, usuario_id, f'evento_{estado_nombre.lower()}',
+                    f"Evento '{evento.nombre}' {estado_nombre.lower()}" + (f". Motivo: {motivo}" if motivo else '')
+                )
 
                 return JsonResponse({
                     'mensaje': f"Evento {estado_nombre.lower()} exitosamente",
@@ -355,10 +465,130 @@ class AprobarRechazarEventoView(View):
             return JsonResponse({'error': str(e)}, status=500)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
+class AprobarRechazarEventosLoteView(View):
+    """
+    Aplica la misma acción a varios eventos con las reglas de
+    ``AprobarRechazarEventoView``: una consulta con bloqueo, una de cruces de
+    horario para los que vuelven a ocuparlo, un UPDATE y un INSERT masivo de
+    motivos. Responde el resultado de cada evento.
+    """
+    MAX_EVENTOS = 200
+
+    def post(self, request, *args, **kwargs):
+        try:
+            usuario_id = request.usuario.id_usuario
+
+            # Verificar si es Pastor
+            if not rol_permitido(request.usuario, [1]):
+                return JsonResponse({'error': 'No tiene permisos para esta acción'}, status=403)
+
+            try:
+                data = json.loads(request.body)
+            except json.JSONDecodeError:
+                return JsonResponse({'error': 'Formato JSON inválido'}, status=400)
+
+            accion = str(data.get('accion', '')).lower()
+            motivo = data.get('motivo', '')
+            reglas = AprobarRechazarEventoView.STATE_MAPPING
+            if accion not in reglas:
+                return JsonResponse({
+                    'error': 'Acción inválida',
+                    'detalle': f'Valores permitidos: {", ".join(reglas)}'
+                }, status=400)
+
+            ids = data.get('ids')
+            if not isinstance(ids, list) or not ids:
+                return JsonResponse({'error': 'ids debe ser una lista no vacía'}, status=400)
+            ids = list(dict.fromkeys(int(i) for i in ids))
+            if len(ids) > self.MAX_EVENTOS:
+                return JsonResponse({'error': f'Máximo {self.MAX_EVENTOS} eventos por petición'}, status=400)
+
+            config = reglas[accion]
+            estado_nombre = AprobarRechazarEventoView.NOMBRES_ESTADO[config['new_state']]
+
+            with transaction.atomic():
+                # Bloqueo en orden de id para no cruzarse con otra petición masiva
+                eventos = Evento.objects.select_for_update().filter(id_evento__in=ids).order_by('id_evento').only(
+                    'id_evento', 'nombre', 'fecha', 'hora', 'duracion', 'lugar', 'id_ministerio', 'id_usuario', 'id_estado'
+                )
+                eventos = {evento.id_evento: evento for evento in eventos}
+
+                errores = {}
+                validos = []
+                for id_evento in ids:
+                    evento = eventos.get(id_evento)
+                    if evento is None:
+                        errores[id_evento] = {'error': 'Evento no encontrado'}
+                    elif accion == 'cancelar' and evento.id_usuario_id != usuario_id:
+                        # Cancelar un evento ajeno requiere la solicitud individual al creador
+                        errores[id_evento] = {'error': 'Solo se pueden cancelar en lote eventos propios'}
+                    elif evento.id_estado_id not in config['allowed_states']:
+                        errores[id_evento] = {'error': config['error_msg']}
+                    else:
+                        validos.append(evento)
+
+                # Los pospuestos que se aprueban vuelven a ocupar su horario: se comparan
+                # con los eventos guardados y entre sí, en el orden de la petición
+                conflictos = comprobar_horarios([
+                    evento for evento in validos if entra_a_ocupar(evento.id_estado_id, config['new_state'])
+                ])
+                for id_evento, cruces in conflictos.items():
+                    errores[id_evento] = {
+                        'error': 'El horario se cruza con otros eventos del mismo lugar o ministerio',
+                        'conflictos': cruces
+                    }
+                validos = [evento for evento in validos if evento.id_evento not in conflictos]
+                resultados = [
+                    {'id_evento': id_evento, 'ok': False, **errores[id_evento]} if id_evento in errores
+                    else {'id_evento': id_evento, 'ok': True, 'estado': estado_nombre}
+                    for id_evento in ids
+                ]
+
+                if validos:
+                    Evento.objects.filter(id_evento__in=[evento.id_evento for evento in validos]).update(
+                        id_estado_id=config['new_state'],
+                        fecha_actualizacion=timezone.now()  # update() no aplica auto_now
+                    )
+                    MotivosEvento.objects.bulk_create([
+                        MotivosEvento(
+                            id_evento=evento,
+                            id_usuario_id=usuario_id,
+                            descripcion=motivo or f"Evento {estado_nombre.lower()}"
+                        )
+                        for evento in validos
+                    ])
+                    invalidar_meses(*(evento.fecha for evento in validos))
+                    notificar_responsables_varios([
+                        (
+                            evento, f'evento_{estado_nombre.lower()}',
+                            f"Evento '{evento.nombre}' {estado_nombre.lower()}" + (f". Motivo: {motivo}" if motivo else '')
+                        )
+                        for evento in validos
+                    ], usuario_id)
+
+            return JsonResponse({
+                'mensaje': f"{len(validos)} de {len(ids)} eventos actualizados",
+                'estado': estado_nombre,
+                'resultados': resultados
+            })
+
+        except (ValueError, TypeError) as e:
+            return JsonResponse({'error': 'Parámetros inválidos: ' + str(e)}, status=400)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+
+# Orden del listado de notificaciones; los cursores dependen de él
+ORDEN_NOTIFICACIONES = ['-fecha_creacion', '-id_notificacion']
+
+@method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class NotificacionesView(View):
     def get(self, request, *args, **kwargs):
         try:
-            usuario_id = obtener_usuario_id(request)
+            usuario_id = request.usuario.id_usuario
             leida = request.GET.get('leida', None)
             
             queryset = Notificaciones.objects.filter(
@@ -373,7 +603,8 @@ class NotificacionesView(View):
             if leida is not None:
                 queryset = queryset.filter(leida=not bool(leida.lower() == 'true'))
             
-            queryset = queryset.order_by('-fecha_creacion')
+            # Paginación por cursor opcional (?limit= / ?cursor=)
+            queryset, paginacion = paginar_si_se_solicita(queryset, ORDEN_NOTIFICACIONES, request)
             
             data = []
             for n in queryset:
@@ -399,19 +630,77 @@ class NotificacionesView(View):
                     'mensaje': n.mensaje,
                     'leida': n.leida,
                     'accion_tomada': n.accion_tomada,
-                    'fecha_creacion': n.fecha_creacion.strftime('%Y-%m-%d %H:%M') if n.fecha_creacion else None
+                    'fecha_creacion': n.fecha_creacion.strftime('%Y-%m-%d %H:%M') if n.fecha_creacion else None,
+                    # Para marcar como leídas esta y las anteriores (marcar_leidas con "hasta")
+                    'cursor': cursor_de_fila(n, ORDEN_NOTIFICACIONES)
                 })
             
-            return JsonResponse({'notificaciones': data})
+            return JsonResponse({'notificaciones': data, **paginacion})
             
+        except ValueError as e:
+            return JsonResponse({'error': 'Parámetros inválidos: ' + str(e)}, status=400)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+
+@method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
+class NotificacionesNoLeidasView(View):
+    def get(self, request, *args, **kwargs):
+        try:
+            # Lee el contador del usuario; no recorre la tabla de notificaciones
+            return JsonResponse({'no_leidas': contar_no_leidas(request.usuario.id_usuario)})
+
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
         
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
+class TicketNotificacionesStreamView(View):
+    def post(self, request, *args, **kwargs):
+        # EventSource no envía encabezados: el flujo se abre con este ticket de vida corta
+        return JsonResponse({
+            'ticket': emitir_ticket(request.usuario.id_usuario),
+            'expira_en': settings.SSE_TICKET_SEGUNDOS
+        })
+
+@method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+class NotificacionesStreamView(View):
+    """
+    Flujo SSE con las notificaciones nuevas del usuario. Es una vista async: la
+    conexión queda abierta sin ocupar un hilo cuando se sirve con ASGI. Bajo
+    WSGI cada flujo retendría un worker indefinidamente, así que se responde 501.
+    """
+    async def get(self, request, *args, **kwargs):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse({'error': 'El flujo de notificaciones requiere un servidor ASGI'}, status=501)
+
+        id_usuario = request.usuario.id_usuario if request.usuario else None
+
+        if id_usuario is None and request.GET.get('ticket'):
+            try:
+                id_usuario = leer_ticket(request.GET['ticket'])
+            except signing.SignatureExpired:
+                return JsonResponse({'error': 'Ticket expirado'}, status=401)
+            except signing.BadSignature:
+                return JsonResponse({'error': 'Ticket inválido'}, status=401)
+
+        if id_usuario is None:
+            return JsonResponse({'error': 'Token no proporcionado'}, status=400)
+
+        response = StreamingHttpResponse(flujo_notificaciones(id_usuario), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Sin buffer en nginx
+        return response
+
+@method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class MarcarNotificacionLeidaView(View):
     def post(self, request, *args, **kwargs):
         try:
-            usuario_id = obtener_usuario_id(request)
+            usuario_id = request.usuario.id_usuario
             data = json.loads(request.body)
             
             notificacion = Notificaciones.objects.get(
@@ -419,8 +708,9 @@ class MarcarNotificacionLeidaView(View):
                 id_usuario_destino_id=usuario_id
             )
             
-            notificacion.leida = True
-            notificacion.save()
+            # El UPDATE condicional evita descontar dos veces si llegan dos peticiones a la vez
+            if Notificaciones.objects.filter(pk=notificacion.pk, leida=False).update(leida=True):
+                sumar_no_leidas(usuario_id, -1)
             
             return JsonResponse({'mensaje': 'Notificación marcada como leída'})
             
@@ -430,10 +720,48 @@ class MarcarNotificacionLeidaView(View):
             return JsonResponse({'error': str(e)}, status=500)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
+class MarcarNotificacionesLeidasView(View):
+    def post(self, request, *args, **kwargs):
+        try:
+            usuario_id = request.usuario.id_usuario
+            data = json.loads(request.body)
+
+            # Solo se tocan notificaciones propias que sigan sin leer
+            notificaciones = Notificaciones.objects.filter(id_usuario_destino_id=usuario_id, leida=False)
+
+            if data.get('ids') is not None:
+                ids = data['ids']
+                if not isinstance(ids, list):
+                    return JsonResponse({'error': 'ids debe ser una lista'}, status=400)
+                notificaciones = notificaciones.filter(id_notificacion__in=[int(i) for i in ids])
+            elif data.get('hasta'):
+                # "Leído hasta aquí": la notificación del cursor y todas las más antiguas;
+                # las que llegaron después de la que vio el cliente siguen sin leer
+                notificaciones = notificaciones.filter(filtro_desde_cursor(ORDEN_NOTIFICACIONES, data['hasta']))
+            elif not data.get('todas'):
+                return JsonResponse({'error': 'Debe enviar ids, hasta o todas'}, status=400)
+
+            # Un solo UPDATE; el contador se ajusta con las filas realmente modificadas
+            actualizadas = notificaciones.update(leida=True)
+            sumar_no_leidas(usuario_id, -actualizadas)
+
+            return JsonResponse({
+                'mensaje': 'Notificaciones marcadas como leídas',
+                'actualizadas': actualizadas
+            })
+
+        except (json.JSONDecodeError, ValueError, TypeError) as e:
+            return JsonResponse({'error': 'Parámetros inválidos: ' + str(e)}, status=400)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+
+@method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class ResponderNotificacionView(View):
     def post(self, request, *args, **kwargs):
         try:
-            usuario_id = obtener_usuario_id(request)
+            usuario_id = request.usuario.id_usuario
             data = json.loads(request.body)
             
             notificacion = Notificaciones.objects.get(
@@ -457,12 +785,19 @@ class ResponderNotificacionView(View):
                     # Lógica de aprobación
                     evento.id_estado_id = 4  # Cancelado
                     evento.save()
+                    invalidar_meses(evento.fecha)
                     
                     MotivosEvento.objects.create(
                         id_evento=evento,
                         id_usuario_id=usuario_id,
                         descripcion=f"Cancelación aprobada. Motivo original: {notificacion.mensaje}"
                     )
+                    # Mismo aviso que una cancelación directa (CancelarEventoView)
+                    notificar_responsables(
+                        evento, usuario_id, 'evento_cancelado',
+                        f"Evento '{evento.nombre}' cancelado: solicitud aprobada por "
+                        f"{persona_actual.nombres} {persona_actual.apellidos}"
+                    )
                 else:
                     # Lógica de rechazo con todos los detalles
                     mensaje_rechazo = (
@@ -472,7 +807,7 @@ class ResponderNotificacionView(View):
                         f"Motivo: {motivo_rechazo}"
                     )
                     
-                    Notificaciones.objects.create(
+                    respuesta = Notificaciones.objects.create(
                         id_evento=notificacion.id_evento,
                         id_usuario_remitente_id=usuario_id,
                         id_usuario_destino=notificacion.id_usuario_remitente,
@@ -480,11 +815,15 @@ class ResponderNotificacionView(View):
                         mensaje=mensaje_rechazo,
                         motivo_rechazo=motivo_rechazo
                     )
+                    sumar_no_leidas(notificacion.id_usuario_remitente_id)
+                    publicar_notificacion(respuesta)
                 
-                notificacion.accion_tomada = aprobada
-                notificacion.leida = True
-                notificacion.save()
-                
+                # UPDATE condicional como en MarcarNotificacionLeidaView: si otra petición
+                # ya la marcó como leída, el contador no se descuenta dos veces
+                if Notificaciones.objects.filter(pk=notificacion.pk, leida=False).update(leida=True):
+                    sumar_no_leidas(usuario_id, -1)
+                Notificaciones.objects.filter(pk=notificacion.pk).update(accion_tomada=aprobada)
+
                 return JsonResponse({
                     'mensaje': 'Respuesta registrada exitosamente',
                     'evento_actualizado': aprobada
@@ -503,76 +842,46 @@ class ResponderNotificacionView(View):
         
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class ListarEventosView(View):
+    ORDEN = ['id_evento']
+    serializador = SerializadorEvento(LISTADO)
+
     def get(self, request, *args, **kwargs):
         try:
-            # Autenticación
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-                
-            token = auth_header.split('Bearer ')[1] if 'Bearer ' in auth_header else auth_header
+            # Una sola consulta con JOIN, trayendo solo las columnas de la respuesta,
+            # de menor a mayor id_evento
+            eventos = self.serializador.proyectar(Evento.objects.all(), self.ORDEN)
 
-            try:
-                jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            # Paginación por cursor opcional (?limit= / ?cursor=); limit se acota a EVENTOS_PAGINA_MAX
+            eventos, paginacion = paginar_si_se_solicita(eventos, self.ORDEN, request)
 
-            # Cambiado: ordenar por id_evento ascendente (de menor a mayor)
-            eventos = Evento.objects.all().order_by('id_evento')
-
-            eventos_data = [
-                {
-                    'id_evento': e.id_evento,
-                    'nombre': e.nombre,
-                    'descripcion': e.descripcion,
-                    'fecha': e.fecha,
-                    'hora': e.hora,
-                    'lugar': e.lugar,
-                    'estado': e.id_estado.nombre,
-                    'id_ministerio': e.id_ministerio.id_ministerio,
-                    'ministerio': e.id_ministerio.nombre,
-                    'usuario': f"{e.id_usuario.id_persona.nombres} {e.id_usuario.id_persona.apellidos}"
-                }
-                for e in eventos
-            ]
-
-            return JsonResponse({'eventos': eventos_data}, status=200)
+            return RespuestaJSON({'eventos': self.serializador.serializar(eventos), **paginacion}, status=200)
 
+        except ValueError as e:
+            return JsonResponse({'error': 'Parámetros inválidos: ' + str(e)}, status=400)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
+@method_decorator(condition(etag_func=etag_evento), name='get')
 class ObtenerEventoView(View):
     def get(self, request, id_evento, *args, **kwargs):
         try:
-            # Autenticación
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-
-            token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
-
-            try:
-                jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
-
             try:
+                # Estado y tipo de evento salen del registro en memoria, sin JOIN
                 evento = Evento.objects.select_related(
-                    'id_estado', 
                     'id_ministerio', 
                     'id_usuario', 
-                    'id_usuario__id_persona',
-                    'id_tipo_evento'
+                    'id_usuario__id_persona'
                 ).get(id_evento=id_evento)
             except Evento.DoesNotExist:
                 return JsonResponse({'error': 'Evento no encontrado'}, status=404)
 
+            tipo = obtener_tipo_evento(evento.id_tipo_evento_id)
             data = {
                 'id_evento': evento.id_evento,
                 'nombre': evento.nombre,
@@ -580,17 +889,18 @@ class ObtenerEventoView(View):
                 'fecha': evento.fecha.strftime('%Y-%m-%d') if evento.fecha else None,
                 'hora': evento.hora.strftime('%H:%M:%S') if evento.hora else None,
                 'lugar': evento.lugar,
-                'estado': evento.id_estado.nombre if evento.id_estado else None,
-                'id_estado': evento.id_estado.id_estado if evento.id_estado else None,
+                'duracion': evento.duracion,
+                'estado': nombre_estado(evento.id_estado_id),
+                'id_estado': evento.id_estado_id,
                 'id_ministerio': evento.id_ministerio.id_ministerio if evento.id_ministerio else None,
                 'ministerio': evento.id_ministerio.nombre if evento.id_ministerio else None,
                 'usuario': f"{evento.id_usuario.id_persona.nombres} {evento.id_usuario.id_persona.apellidos}",
                 'id_usuario': evento.id_usuario.id_usuario,
                 'tipo_evento': {
-                    'id': evento.id_tipo_evento.id_tipo_evento if evento.id_tipo_evento else None,
-                    'nombre': evento.id_tipo_evento.nombre if evento.id_tipo_evento else None,
-                    'descripcion': evento.id_tipo_evento.descripcion if evento.id_tipo_evento else None,
-                    'activo': evento.id_tipo_evento.activo if evento.id_tipo_evento else None
+                    'id': tipo['id_tipo_evento'] if tipo else None,
+                    'nombre': tipo['nombre'] if tipo else None,
+                    'descripcion': tipo['descripcion'] if tipo else None,
+                    'activo': tipo['activo'] if tipo else None
                 }
             }
 
@@ -600,173 +910,318 @@ class ObtenerEventoView(View):
             return JsonResponse({'error': str(e)}, status=500)
         
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class ListarMisEventosView(View):
+    serializador = SerializadorEvento(MIS_EVENTOS)
+
     def get(self, request, *args, **kwargs):
         try:
-            # Autenticación
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-                
-            token = auth_header.split('Bearer ')[1] if 'Bearer ' in auth_header else auth_header
+            usuario_id = request.usuario.id_usuario
 
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                usuario_id = payload.get('id_usuario')
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
-
-            # Filtrar eventos solo del usuario actual con select_related para optimizar
-            eventos = Evento.objects.filter(id_usuario_id=usuario_id)\
-                                  .select_related('id_estado', 'id_ministerio', 'id_usuario', 'id_usuario__id_persona', 'id_tipo_evento')\
-                                  .order_by('id_evento')
-
-            eventos_data = [
-                {
-                    'id_evento': e.id_evento,
-                    'nombre': e.nombre,
-                    'descripcion': e.descripcion,
-                    'fecha': e.fecha.strftime('%Y-%m-%d') if e.fecha else None,
-                    'hora': e.hora.strftime('%H:%M:%S') if e.hora else None,
-                    'lugar': e.lugar,
-                    'estado': e.id_estado.nombre if e.id_estado else None,
-                    'id_ministerio': e.id_ministerio.id_ministerio if e.id_ministerio else None,
-                    'ministerio': e.id_ministerio.nombre if e.id_ministerio else None,
-                    'usuario': f"{e.id_usuario.id_persona.nombres} {e.id_usuario.id_persona.apellidos}" if e.id_usuario and e.id_usuario.id_persona else None,
-                    'id_tipo_evento': e.id_tipo_evento.id_tipo_evento if e.id_tipo_evento else None,
-                    'tipo_evento': e.id_tipo_evento.nombre if e.id_tipo_evento else None
-                }
-                for e in eventos
-            ]
+            # Filtrar eventos solo del usuario actual, proyectando solo las columnas de la respuesta
+            eventos = self.serializador.proyectar(Evento.objects.filter(id_usuario_id=usuario_id), ['id_evento'])
+            eventos, paginacion = paginar_si_se_solicita(eventos, ['id_evento'], request)
+            eventos_data = self.serializador.serializar(eventos)
 
-            return JsonResponse({
+            return RespuestaJSON({
                 'eventos': eventos_data, 
-                'total': len(eventos_data),
+                **paginacion,
                 'mensaje': 'Mis eventos obtenidos correctamente'
             }, status=200)
 
+        except ValueError as e:
+            return JsonResponse({'error': 'Parámetros inválidos: ' + str(e)}, status=400)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class ListarEventosOtrosUsuariosView(View):
+    serializador = SerializadorEvento(EVENTOS_OTROS)
+
     def get(self, request, *args, **kwargs):
         try:
-            # Autenticación
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-                
-            token = auth_header.split('Bearer ')[1] if 'Bearer ' in auth_header else auth_header
+            usuario_id = request.usuario.id_usuario
 
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                usuario_id = payload.get('id_usuario')
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
-
-            # Filtrar eventos que NO son del usuario actual con select_related
-            eventos = Evento.objects.exclude(id_usuario_id=usuario_id)\
-                                   .select_related('id_estado', 'id_ministerio', 'id_usuario', 'id_usuario__id_persona', 'id_tipo_evento')\
-                                   .order_by('id_evento')
-
-            eventos_data = [
-                {
-                    'id_evento': e.id_evento,
-                    'nombre': e.nombre,
-                    'descripcion': e.descripcion,
-                    'fecha': e.fecha.strftime('%Y-%m-%d') if e.fecha else None,
-                    'hora': e.hora.strftime('%H:%M:%S') if e.hora else None,
-                    'lugar': e.lugar,
-                    'estado': e.id_estado.nombre if e.id_estado else None,
-                    'id_ministerio': e.id_ministerio.id_ministerio if e.id_ministerio else None,
-                    'ministerio': e.id_ministerio.nombre if e.id_ministerio else None,
-                    'usuario': f"{e.id_usuario.id_persona.nombres} {e.id_usuario.id_persona.apellidos}" if e.id_usuario and e.id_usuario.id_persona else None,
-                    'es_mio': False,
-                    'id_tipo_evento': e.id_tipo_evento.id_tipo_evento if e.id_tipo_evento else None,
-                    'tipo_evento': e.id_tipo_evento.nombre if e.id_tipo_evento else None
-                }
-                for e in eventos
-            ]
+            # Filtrar eventos que NO son del usuario actual, proyectando solo las columnas de la respuesta
+            eventos = self.serializador.proyectar(Evento.objects.exclude(id_usuario_id=usuario_id), ['id_evento'])
+            eventos, paginacion = paginar_si_se_solicita(eventos, ['id_evento'], request)
+            eventos_data = self.serializador.serializar(eventos)
 
-            return JsonResponse({
+            return RespuestaJSON({
                 'eventos': eventos_data,
-                'total': len(eventos_data),
+                **paginacion,
                 'mensaje': 'Eventos de otros usuarios obtenidos correctamente'
             }, status=200)
 
+        except ValueError as e:
+            return JsonResponse({'error': 'Parámetros inválidos: ' + str(e)}, status=400)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
         
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(usar_replica, name='dispatch')
 class ListarTodosEventosView(View):
+    # Órdenes permitidos en ?orden=; todos terminan en id_evento para desempatar
+    ORDENES = {
+        '-fecha': ['-fecha', '-hora', '-id_evento'],
+        'fecha': ['fecha', 'hora', 'id_evento'],
+        'nombre': ['nombre', 'id_evento'],
+        '-nombre': ['-nombre', '-id_evento'],
+        'id': ['id_evento'],
+        '-id': ['-id_evento'],
+    }
+
+    # Parámetro de consulta -> campo de Evento (se filtran por igualdad)
+    FILTROS_ID = {
+        'id_estado': 'id_estado_id',
+        'id_ministerio': 'id_ministerio_id',
+        'id_tipo_evento': 'id_tipo_evento_id',
+        'id_usuario': 'id_usuario_id',
+    }
+
+    @classmethod
+    def filtrar(cls, eventos, params):
+        for param, campo in cls.FILTROS_ID.items():
+            if params.get(param):
+                eventos = eventos.filter(**{campo: int(params[param])})
+
+        if params.get('fecha_desde'):
+            eventos = eventos.filter(fecha__gte=datetime.strptime(params['fecha_desde'], '%Y-%m-%d').date())
+        if params.get('fecha_hasta'):
+            eventos = eventos.filter(fecha__lte=datetime.strptime(params['fecha_hasta'], '%Y-%m-%d').date())
+
+        if params.get('q'):
+            eventos = eventos.filter(nombre__icontains=params['q'].strip())
+
+        return eventos
+
     def get(self, request, *args, **kwargs):
         try:
-            auth_header = request.headers.get('Authorization')
-            if auth_header:  # Si hay token, validarlo pero no es requerido para todos los casos
-                token = auth_header.split('Bearer ')[1] if 'Bearer ' in auth_header else auth_header
-                try:
-                    jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                except jwt.ExpiredSignatureError:
-                    return JsonResponse({'error': 'Token expirado'}, status=401)
-                except jwt.InvalidTokenError:
-                    return JsonResponse({'error': 'Token inválido'}, status=401)
-
-            # Obtener todos los eventos con select_related para optimizar
-            eventos = Evento.objects.all()\
-                                   .select_related('id_estado', 'id_ministerio', 'id_usuario', 'id_usuario__id_persona', 'id_tipo_evento')\
-                                   .order_by('-fecha', '-hora')  # Ordenados por fecha y hora descendente
-
-            eventos_data = [
+            # El token no es requerido; si falta o no es válido, request.usuario es None
+            orden = self.ORDENES.get(request.GET.get('orden', '-fecha'))
+            if orden is None:
+                return JsonResponse({'error': 'Orden no válido. Opciones: ' + ', '.join(self.ORDENES)}, status=400)
+
+            # es_mio depende del usuario que consulta
+            if request.usuario:
+                id_actual = request.usuario.id_usuario
+                es_mio = (('id_usuario',), lambda fila: fila['id_usuario'] == id_actual)
+            else:
+                es_mio = constante(None)
+            serializador = SerializadorEvento(TODOS_EVENTOS + [('es_mio', es_mio)])
+
+            # Los filtros se aplican en SQL y solo se proyectan las columnas de la respuesta
+            eventos = serializador.proyectar(self.filtrar(Evento.objects.all(), request.GET), orden, *COLUMNAS_ETAG)
+            eventos, paginacion = paginar_si_se_solicita(eventos, orden, request)
+
+            # ETag de la página ya leída (es_mio depende del usuario); si el cliente lo tiene, 304
+            usuario = request.usuario.id_usuario if request.usuario else None
+            etag = etag_filas(eventos, request.GET.urlencode(), usuario, paginacion)
+            return respuesta_condicional(request, etag, lambda: RespuestaJSON({
+                'eventos': serializador.serializar(eventos),
+                **paginacion,
+                'mensaje': 'Todos los eventos obtenidos correctamente'
+            }, status=200))
+
+        except ValueError as e:
+            return JsonResponse({'error': 'Parámetros inválidos: ' + str(e)}, status=400)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+        
+@method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+class CalendarioMesView(View):
+    def get(self, request, año, mes, *args, **kwargs):
+        try:
+            # Como eventos_todos, no requiere token. La ruta solo acepta dígitos, pero
+            # un año fuera de lo que admite date() no debe llegar a obtener_mes
+            if not MINYEAR <= año <= MAXYEAR:
+                return JsonResponse({'error': 'Año no válido'}, status=400)
+            if not 1 <= mes <= 12:
+                return JsonResponse({'error': 'Mes no válido'}, status=400)
+
+            return JsonResponse({
+                'año': año,
+                'mes': mes,
+                'dias': obtener_mes(año, mes),
+            }, status=200)
+
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+
+def _ids_usuario(data, maximo):
+    """Lista ``ids`` del cuerpo JSON, sin repetidos; lanza ValueError si no es válida."""
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids:
+        raise ValueError('ids debe ser una lista no vacía')
+    ids = list(dict.fromkeys(int(i) for i in ids))
+    if len(ids) > maximo:
+        raise ValueError(f'máximo {maximo} usuarios por petición')
+    return ids
+
+@method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
+class ListarParticipantesEventoView(View):
+    def get(self, request, id_evento, *args, **kwargs):
+        try:
+            evento = datos_gestion_evento(id_evento)
+            if evento is None:
+                return JsonResponse({'error': 'Evento no encontrado'}, status=404)
+            if not puede_gestionar(request.usuario, evento):
+                return JsonResponse({'error': 'No tiene permisos para esta acción'}, status=403)
+
+            participantes = ParticipantesEvento.objects.filter(id_evento_id=id_evento).order_by(
+                'id_usuario__id_persona__apellidos', 'id_usuario__id_persona__nombres'
+            ).values_list(
+                'id_usuario', 'id_usuario__id_persona__nombres', 'id_usuario__id_persona__apellidos',
+                'fecha_registro', 'asistencia', 'en_espera'
+            )
+
+            data = [
                 {
-                    'id_evento': e.id_evento,
-                    'nombre': e.nombre,
-                    'descripcion': e.descripcion,
-                    'fecha': e.fecha.strftime('%Y-%m-%d') if e.fecha else None,
-                    'hora': e.hora.strftime('%H:%M:%S') if e.hora else None,
-                    'lugar': e.lugar,
-                    'estado': e.id_estado.nombre if e.id_estado else None,
-                    'id_estado': e.id_estado.id_estado if e.id_estado else None,
-                    'id_ministerio': e.id_ministerio.id_ministerio if e.id_ministerio else None,
-                    'ministerio': e.id_ministerio.nombre if e.id_ministerio else None,
-                    'usuario': f"{e.id_usuario.id_persona.nombres} {e.id_usuario.id_persona.apellidos}" if e.id_usuario and e.id_usuario.id_persona else None,
-                    'id_usuario': e.id_usuario.id_usuario if e.id_usuario else None,
-                    'id_tipo_evento': e.id_tipo_evento.id_tipo_evento if e.id_tipo_evento else None,
-                    'tipo_evento': {
-                        'id': e.id_tipo_evento.id_tipo_evento if e.id_tipo_evento else None,
-                        'nombre': e.id_tipo_evento.nombre if e.id_tipo_evento else None,
-                        'descripcion': e.id_tipo_evento.descripcion if e.id_tipo_evento else None,
-                        'activo': e.id_tipo_evento.activo if e.id_tipo_evento else None
-                    },
-                    'es_mio': e.id_usuario.id_usuario == request.user.id if auth_header and hasattr(request, 'user') else None
+                    'id_usuario': id_usuario,
+                    'nombres': nombres,
+                    'apellidos': apellidos,
+                    'fecha_registro': fecha_registro,
+                    'asistencia': asistencia,
+                    'en_espera': en_espera
                 }
-                for e in eventos
+                for id_usuario, nombres, apellidos, fecha_registro, asistencia, en_espera in participantes
             ]
 
+            return RespuestaJSON({
+                'participantes': data,
+                'total': len(data),
+                'en_espera': sum(1 for p in data if p['en_espera'])
+            }, status=200)
+
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+
+# Sin ATOMIC_REQUESTS: registrar_participantes abre su propia transacción y sus locks
+# no duran más que ella
+@method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
+class RegistrarParticipantesView(View):
+    MAX_USUARIOS = 500
+
+    def post(self, request, id_evento, *args, **kwargs):
+        try:
+            usuario_id = request.usuario.id_usuario
+            data = json.loads(request.body or '{}')
+
+            # Sin ids, el usuario se registra a sí mismo
+            ids = _ids_usuario(data, self.MAX_USUARIOS) if data.get('ids') is not None else [usuario_id]
+
+            evento = datos_gestion_evento(id_evento)
+            if evento is None:
+                return JsonResponse({'error': 'Evento no encontrado'}, status=404)
+            if evento['id_estado'] != obtener_id_estado('Aprobado'):
+                return JsonResponse({'error': 'Solo se puede registrar participantes en eventos aprobados'}, status=400)
+            if ids != [usuario_id] and not puede_gestionar(request.usuario, evento):
+                return JsonResponse({'error': 'No tiene permisos para registrar a otros usuarios'}, status=403)
+
+            registrados, promovidos = registrar_participantes(id_evento, ids)
+
             return JsonResponse({
-                'eventos': eventos_data,
-                'total': len(eventos_data),
-                'mensaje': 'Todos los eventos obtenidos correctamente'
+                'mensaje': 'Participantes registrados',
+                'registrados': [i for i in registrados if i in promovidos],
+                'en_espera': [i for i in registrados if i not in promovidos],
+                # Ya registrados o usuarios inexistentes/inactivos
+                'omitidos': sorted(set(ids) - set(registrados))
+            }, status=201 if registrados else 200)
+
+        except (json.JSONDecodeError, ValueError, TypeError) as e:
+            return JsonResponse({'error': 'Parámetros inválidos: ' + str(e)}, status=400)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+
+@method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
+class CancelarParticipacionView(View):
+    def post(self, request, id_evento, *args, **kwargs):
+        try:
+            usuario_id = request.usuario.id_usuario
+            data = json.loads(request.body or '{}')
+            id_usuario = int(data.get('id_usuario') or usuario_id)
+
+            evento = datos_gestion_evento(id_evento)
+            if evento is None:
+                return JsonResponse({'error': 'Evento no encontrado'}, status=404)
+            if id_usuario != usuario_id and not puede_gestionar(request.usuario, evento):
+                return JsonResponse({'error': 'No tiene permisos para cancelar la inscripción de otro usuario'}, status=403)
+
+            eliminado, promovidos = cancelar_participacion(id_evento, id_usuario)
+            if not eliminado:
+                return JsonResponse({'error': 'El usuario no está registrado en el evento'}, status=404)
+            if promovidos:
+                notificar_promovidos(id_evento, evento['nombre'], promovidos)
+
+            return JsonResponse({
+                'mensaje': 'Inscripción cancelada',
+                'promovidos': promovidos
             }, status=200)
 
+        except (json.JSONDecodeError, ValueError, TypeError) as e:
+            return JsonResponse({'error': 'Parámetros inválidos: ' + str(e)}, status=400)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
-        
+
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
+class MarcarAsistenciaView(View):
+    """Check-in en lote para el lector de la puerta: una consulta de permisos y un UPDATE."""
+    MAX_USUARIOS = 500
+
+    def post(self, request, id_evento, *args, **kwargs):
+        try:
+            data = json.loads(request.body)
+            ids = _ids_usuario(data, self.MAX_USUARIOS)
+            asistencia = data.get('asistencia', True)
+            if not isinstance(asistencia, bool):
+                raise ValueError('asistencia debe ser true o false')
+
+            evento = datos_gestion_evento(id_evento)
+            if evento is None:
+                return JsonResponse({'error': 'Evento no encontrado'}, status=404)
+            if not puede_gestionar(request.usuario, evento):
+                return JsonResponse({'error': 'No tiene permisos para esta acción'}, status=403)
+
+            marcados = marcar_asistencia(id_evento, ids, asistencia)
+
+            return JsonResponse({
+                'marcados': marcados,
+                'no_registrados': sorted(set(ids) - set(marcados))
+            }, status=200)
+
+        except (json.JSONDecodeError, ValueError, TypeError) as e:
+            return JsonResponse({'error': 'Parámetros inválidos: ' + str(e)}, status=400)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+
+@method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class CrearTipoEventoView(View):
     def post(self, request, *args, **kwargs):
         try:
-            with transaction.atomic():
-                # Validar permisos
-                id_usuario = obtener_usuario_id(request)
-                usuario = Usuario.objects.select_for_update().get(id_usuario=id_usuario)
-                if usuario.id_rol.id_rol != 1:
-                    return JsonResponse({'error': 'Solo los pastores pueden crear tipos de evento'}, status=403)
+            # Rol vigente en la base, no el del token (que no expira ni se entera de un
+            # cambio de rol); lectura simple, sin bloquear la fila del usuario
+            id_rol = Usuario.objects.filter(id_usuario=request.usuario.id_usuario).values_list('id_rol', flat=True).first()
+            if id_rol is None:
+                return JsonResponse({'error': 'Usuario no encontrado'}, status=404)
+            if id_rol != 1:
+                return JsonResponse({'error': 'Solo los pastores pueden crear tipos de evento'}, status=403)
 
+            with transaction.atomic():
                 # Obtener y validar datos
                 data = json.loads(request.body) if request.body else request.POST
                 if 'nombre' not in data:
@@ -796,22 +1251,24 @@ class CrearTipoEventoView(View):
                     }
                 }, status=201)
 
-        except Usuario.DoesNotExist:
-            return JsonResponse({'error': 'Usuario no encontrado'}, status=404)
         except Exception as e:
             return JsonResponse({'error': f'Error al crear el tipo de evento: {str(e)}'}, status=500)
         
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class EditarTipoEventoView(View):
     def put(self, request, id_tipo_evento, *args, **kwargs):
         try:
-            with transaction.atomic():
-                # Validar permisos
-                id_usuario = obtener_usuario_id(request)
-                usuario = Usuario.objects.select_for_update().get(id_usuario=id_usuario)
-                if usuario.id_rol.id_rol != 1:
-                    return JsonResponse({'error': 'No autorizado'}, status=403)
+            # Rol vigente en la base, no el del token (que no expira ni se entera de un
+            # cambio de rol); lectura simple, sin bloquear la fila del usuario
+            id_rol = Usuario.objects.filter(id_usuario=request.usuario.id_usuario).values_list('id_rol', flat=True).first()
+            if id_rol is None:
+                return JsonResponse({'error': 'Usuario no encontrado'}, status=404)
+            if id_rol != 1:
+                return JsonResponse({'error': 'No autorizado'}, status=403)
 
+            with transaction.atomic():
                 # Obtener datos
                 data = json.loads(request.body) if request.body else {}
                 tipo_evento = TipoEvento.objects.get(id_tipo_evento=id_tipo_evento)
@@ -856,18 +1313,22 @@ class EditarTipoEventoView(View):
             return JsonResponse({'error': str(e)}, status=500)
         
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class CambiarEstadoTipoEventoView(View):
     def patch(self, request, id_tipo_evento, *args, **kwargs):
         try:
-            with transaction.atomic():
-                # Validar permisos (solo pastores)
-                id_usuario = obtener_usuario_id(request)
-                usuario = Usuario.objects.select_for_update().get(id_usuario=id_usuario)
-                if usuario.id_rol.id_rol != 1:
-                    return JsonResponse({'error': 'No autorizado'}, status=403)
+            # Rol vigente en la base, no el del token (que no expira ni se entera de un
+            # cambio de rol); lectura simple, sin bloquear la fila del usuario
+            id_rol = Usuario.objects.filter(id_usuario=request.usuario.id_usuario).values_list('id_rol', flat=True).first()
+            if id_rol is None:
+                return JsonResponse({'error': 'Usuario no encontrado'}, status=404)
+            if id_rol != 1:
+                return JsonResponse({'error': 'No autorizado'}, status=403)
 
-                # Cambiar estado
-                tipo_evento = TipoEvento.objects.get(id_tipo_evento=id_tipo_evento)
+            with transaction.atomic():
+                # Cambiar estado; solo se bloquea la fila del tipo para que dos cambios no se pisen
+                tipo_evento = TipoEvento.objects.select_for_update().get(id_tipo_evento=id_tipo_evento)
                 tipo_evento.activo = not tipo_evento.activo  # Invertir estado actual
                 tipo_evento.save()
 
@@ -887,23 +1348,13 @@ class CambiarEstadoTipoEventoView(View):
             return JsonResponse({'error': str(e)}, status=500)
         
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class ListarTiposEventoView(View):
     def get(self, request, *args, **kwargs):
         try:
-            # Obtener usuario (validación opcional)
-            id_usuario = obtener_usuario_id(request)
-            usuario = Usuario.objects.get(id_usuario=id_usuario)
-            
-            # Consulta base - lista todos (activos e inactivos) ordenados por ID ascendente
-            tipos_evento = TipoEvento.objects.all().order_by('id_tipo_evento')
-            
-            # Preparar respuesta simplificada
-            data = [{
-                'id_tipo_evento': tipo.id_tipo_evento,
-                'nombre': tipo.nombre,
-                'descripcion': tipo.descripcion,
-                'activo': tipo.activo
-            } for tipo in tipos_evento]
+            # Todos (activos e inactivos) ordenados por ID, desde el registro en memoria
+            data = listar_tipos_evento()
             
             return JsonResponse({
                 'success': True,
@@ -911,82 +1362,76 @@ class ListarTiposEventoView(View):
                 'data': data
             }, status=200)
 
-        except Usuario.DoesNotExist:
-            return JsonResponse({'error': 'Usuario no encontrado'}, status=404)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
 
         
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class EventosPorMinisterioView(View):
+    ORDEN = ['-fecha', '-hora', '-id_evento']
+    serializador = SerializadorEvento(EVENTOS_MINISTERIO)
+
     def get(self, request, ministerio_id):
         try:
-            # 1. Validación del token
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-                
-            token = auth_header.split('Bearer ')[1] if 'Bearer ' in auth_header else auth_header
-
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
-
-            # 2. Verificar que el ministerio existe
-            try:
-                ministerio = Ministerio.objects.get(id_ministerio=ministerio_id)
-            except Ministerio.DoesNotExist:
-                return JsonResponse({'error': 'Ministerio no encontrado'}, status=404)
-
-            # 3. Obtener eventos APROBADOS del ministerio
+            # 1. Eventos APROBADOS del ministerio, en una sola consulta: el estado se
+            # filtra por id (registro en memoria) y el creador y el ministerio vienen
+            # en el mismo SELECT
+            id_aprobado = obtener_id_estado('Aprobado')
             eventos = Evento.objects.filter(
                 id_ministerio=ministerio_id,
-                id_estado__nombre='Aprobado'  # Filtro por estado Aprobado
-            ).select_related(
-                'id_estado',
-                'id_tipo_evento',
-                'id_usuario'
-            ).order_by('-fecha', '-hora')
-
-            total_eventos = eventos.count()
-            
-            # 4. Preparar la respuesta
-            eventos_data = []
-            for evento in eventos:
-                eventos_data.append({
-                    'id_evento': evento.id_evento,
-                    'nombre': evento.nombre,
-                    'descripcion': evento.descripcion,
-                    'fecha': evento.fecha.strftime('%Y-%m-%d'),
-                    'hora': evento.hora.strftime('%H:%M:%S'),
-                    'lugar': evento.lugar,
-                    'estado': {
-                        'id_estado': evento.id_estado.id_estado,
-                        'nombre': evento.id_estado.nombre
-                    },
-                    'tipo_evento': {
-                        'id_tipo_evento': evento.id_tipo_evento.id_tipo_evento if evento.id_tipo_evento else None,
-                        'nombre': evento.id_tipo_evento.nombre if evento.id_tipo_evento else None
-                    },
-                    'creador': {
-                        'id_usuario': evento.id_usuario.id_usuario,
-                        'nombres': evento.id_usuario.id_persona.nombres,
-                        'apellidos': evento.id_usuario.id_persona.apellidos
-                    },
-                    'fecha_creacion': evento.fecha_creacion.strftime('%Y-%m-%d %H:%M:%S')
-                })
-
-            return JsonResponse({
-                'ministerio': {
-                    'id_ministerio': ministerio.id_ministerio,
-                    'nombre': ministerio.nombre
-                },
-                'eventos': eventos_data,
-                'total_eventos': total_eventos 
-            }, status=200)
-
+                id_estado_id=id_aprobado
+            )
+            paginado = 'cursor' in request.GET or 'limit' in request.GET
+            primera_pagina = paginado and 'cursor' not in request.GET
+            total_eventos = None
+            extra = ['id_ministerio__nombre', *COLUMNAS_ETAG]
+            if primera_pagina:
+                # COUNT(*) OVER () recorre todas las filas del ministerio aunque la página
+                # sea corta: solo en la primera página, donde el cliente muestra el total
+                eventos = eventos.annotate(total_filas=Window(Count('id_evento')))
+                extra.append('total_filas')
+            elif paginado and request.GET.get('total') == 'true':
+                # Con cursor la ventana solo contaría desde el cursor
+                total_eventos = eventos.count()
+            eventos = self.serializador.proyectar(eventos, self.ORDEN, *extra)
+
+            # Paginación por cursor opcional (?limit= / ?cursor=)
+            siguiente_cursor = None
+            if paginado:
+                eventos, siguiente_cursor = paginar_por_cursor(eventos, self.ORDEN, request)
+            else:
+                eventos = list(eventos.order_by(*self.ORDEN))
+
+            # 2. El ministerio sale de las filas; solo sin eventos hace falta consultarlo
+            if eventos:
+                ministerio = {'id_ministerio': int(ministerio_id), 'nombre': eventos[0]['id_ministerio__nombre']}
+            else:
+                ministerio = Ministerio.objects.filter(id_ministerio=ministerio_id).values('id_ministerio', 'nombre').first()
+                if ministerio is None:
+                    return JsonResponse({'error': 'Ministerio no encontrado'}, status=404)
+
+            # 3. Preparar la respuesta
+            paginacion = {}
+            if not paginado:
+                paginacion['total_eventos'] = len(eventos)
+            elif primera_pagina:
+                paginacion['total_eventos'] = eventos[0]['total_filas'] if eventos else 0
+            elif total_eventos is not None:
+                paginacion['total_eventos'] = total_eventos
+            if paginado:
+                paginacion['siguiente_cursor'] = siguiente_cursor
+
+            # 4. ETag de las filas ya leídas: si el cliente lo tiene, 304 sin serializar
+            etag = etag_filas(eventos, request.GET.urlencode(), ministerio, paginacion)
+            return respuesta_condicional(request, etag, lambda: RespuestaJSON({
+                'ministerio': ministerio,
+                'eventos': self.serializador.serializar(eventos),
+                **paginacion,
+            }, status=200))
+
+        except ValueError as e:
+            return JsonResponse({'error': 'Parámetros inválidos: ' + str(e)}, status=400)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
\ No newline at end of file
@@ -4,3 +4,17 @@ from django.apps import AppConfig
 class LoginConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Login'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_delete, post_save
+
+        from .conexiones import registrar_apertura
+        from .models import Rol
+        from .roles import invalidar_roles
+
+        # Cualquier cambio en la tabla rol descarta el registro en memoria
+        post_save.connect(lambda **kwargs: invalidar_roles(), sender=Rol, weak=False)
+        post_delete.connect(lambda **kwargs: invalidar_roles(), sender=Rol, weak=False)
+
+        connection_created.connect(registrar_apertura, weak=False)
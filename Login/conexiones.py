@@ -0,0 +1,55 @@
+"""
+Estadísticas de las conexiones a PostgreSQL del proceso actual.
+
+Cada worker de uvicorn tiene sus propias conexiones (o su propio pool), por lo
+que los valores corresponden solo al proceso que atiende la petición.
+"""
+import os
+import threading
+import time
+
+from django.db import connections
+
+_lock = threading.Lock()
+_aperturas = 0
+
+
+def registrar_apertura(sender, connection, **kwargs):
+    """Receptor de ``connection_created``: cuenta aperturas y guarda cuándo ocurrió."""
+    global _aperturas
+    with _lock:
+        _aperturas += 1
+    connection.abierta_en = time.monotonic()
+
+
+def estadisticas_conexiones(alias='default'):
+    conexion = connections[alias]
+    ajustes = conexion.settings_dict
+    pool = conexion.pool
+
+    if pool is not None:
+        modo = 'pool'
+    elif ajustes['CONN_MAX_AGE'] != 0:
+        modo = 'persistente'
+    else:
+        modo = 'por_peticion'
+
+    datos = {
+        'pid': os.getpid(),
+        'modo': modo,
+        'conn_max_age': ajustes['CONN_MAX_AGE'],
+        'health_checks': ajustes['CONN_HEALTH_CHECKS'],
+        # Con pool, cada préstamo de conexión cuenta como una apertura
+        'aperturas': _aperturas,
+        'edad_conexion_s': None,
+    }
+
+    abierta_en = getattr(conexion, 'abierta_en', None)
+    if conexion.connection is not None and abierta_en is not None:
+        datos['edad_conexion_s'] = round(time.monotonic() - abierta_en, 1)
+
+    if pool is not None:
+        # requests_num = préstamos, requests_waiting / requests_wait_ms = esperas
+        datos['pool'] = pool.get_stats()
+
+    return datos
@@ -0,0 +1,89 @@
+"""
+Micro-benchmark del costo de autenticar una petición (ver Login/middleware.py).
+
+Para una ruta de cada app compara:
+
+* antes: el bloque que repetía cada vista (leer el encabezado, ``split``,
+  ``jwt.decode`` y la escalera de excepciones);
+* ahora: ``JWTAutenticacionMiddleware`` con una vista vacía detrás.
+
+Solo consulta la base para cargar el registro de roles::
+
+    python manage.py medir_autenticacion --repeticiones 20000
+"""
+import time
+
+import jwt
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse, JsonResponse
+from django.test import RequestFactory
+
+from Login.middleware import JWTAutenticacionMiddleware
+from Login.roles import obtener_id_rol
+
+RUTAS = [
+    '/Login/conexiones/',
+    '/Registrar/register/',
+    '/Miembros/personas/',
+    '/Ministerio/listarministerios/',
+    '/Eventos/eventos/',
+    '/Roles/asignar_pastor/',
+    '/Ciclos/listar_ciclos/',
+    '/Cursos/listar_cursos/1/',
+    '/Devocionales/historial/',
+]
+
+
+def autenticar_como_antes(request):
+    # Copia del bloque que tenían las vistas antes del middleware
+    auth_header = request.headers.get('Authorization')
+    if not auth_header:
+        return JsonResponse({'error': 'Token no proporcionado'}, status=400)
+
+    token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
+        id_usuario = payload.get('id_usuario')
+        rol = payload.get('rol')
+    except jwt.ExpiredSignatureError:
+        return JsonResponse({'error': 'Token expirado'}, status=401)
+    except jwt.InvalidTokenError:
+        return JsonResponse({'error': 'Token inválido'}, status=401)
+    return id_usuario, rol
+
+
+def microsegundos(funcion, request, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion(request)
+    return (time.perf_counter() - inicio) / repeticiones * 1e6
+
+
+class Command(BaseCommand):
+    help = 'Compara el costo por petición de la autenticación JWT antes y después del middleware.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        repeticiones = options['repeticiones']
+        token = jwt.encode({'id_usuario': 1, 'rol': 'Pastor', 'id_rol': 1}, settings.SECRET_KEY, algorithm='HS256')
+        obtener_id_rol('Pastor')  # Carga el registro antes de medir
+        respuesta = HttpResponse()  # Se reutiliza para no medir la construcción de la respuesta
+        middleware = JWTAutenticacionMiddleware(lambda request: respuesta)
+        fabrica = RequestFactory()
+
+        self.stdout.write(f'{"ruta":<34}{"antes (µs)":>12}{"ahora (µs)":>12}')
+        for ruta in RUTAS:
+            request = fabrica.get(ruta, HTTP_AUTHORIZATION=f'Bearer {token}')
+            antes = microsegundos(autenticar_como_antes, request, repeticiones)
+            ahora = microsegundos(middleware, request, repeticiones)
+            self.stdout.write(f'{ruta:<34}{antes:>12.1f}{ahora:>12.1f}')
+
+        # Token inválido: el middleware solo lo marca (token_requerido responde 401)
+        request = fabrica.get(RUTAS[4], HTTP_AUTHORIZATION='Bearer no-es-un-token')
+        antes = microsegundos(autenticar_como_antes, request, repeticiones)
+        ahora = microsegundos(middleware, request, repeticiones)
+        self.stdout.write(f'{"token inválido":<34}{antes:>12.1f}{ahora:>12.1f}')
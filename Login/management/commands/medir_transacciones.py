@@ -0,0 +1,104 @@
+"""
+Mide las idas y vueltas de transacción que ahorra ``non_atomic_requests``
+(ver el commit de user-004 y ``ATOMIC_REQUESTS`` en settings).
+
+Para cada vista compara:
+
+* antes: la vista envuelta en ``transaction.atomic()`` como hacía
+  ATOMIC_REQUESTS, con lo que su propio ``atomic()`` pasaba a ser un SAVEPOINT;
+* ahora: la vista tal como la despacha Django hoy.
+
+Cuenta las sentencias SQL (incluidos SAVEPOINT/RELEASE), las transacciones
+confirmadas (cada una es un BEGIN y un COMMIT) y la mediana de latencia. La
+escritura medida es EditarCicloView sobre un ciclo temporal con los mismos
+valores, que se borra al terminar::
+
+    python manage.py medir_transacciones --repeticiones 200
+"""
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.urls import resolve
+
+from Ciclos.models import Ciclo
+from Login.middleware import UsuarioToken
+from Login.models import Usuario
+
+
+@contextmanager
+def contar_idas_y_vueltas():
+    cuenta = {'sentencias': 0, 'transacciones': 0}
+
+    def contar_sentencia(execute, sql, params, many, context):
+        cuenta['sentencias'] += 1
+        return execute(sql, params, many, context)
+
+    confirmar = connection._commit
+
+    def contar_commit():
+        cuenta['transacciones'] += 1
+        return confirmar()
+
+    connection._commit = contar_commit
+    try:
+        with connection.execute_wrapper(contar_sentencia):
+            yield cuenta
+    finally:
+        del connection._commit
+
+
+class Command(BaseCommand):
+    help = 'Compara sentencias, transacciones y latencia de vistas con y sin ATOMIC_REQUESTS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=200)
+
+    def handle(self, *args, **options):
+        pastor = Usuario.objects.select_related('id_rol').filter(id_rol__rol='Pastor', activo=True).first()
+        if pastor is None:
+            raise CommandError('Se necesita al menos un usuario Pastor activo')
+        usuario = UsuarioToken(pastor.id_usuario, pastor.id_rol.rol, pastor.id_rol.id_rol)
+
+        ciclo = Ciclo.objects.create(nombre='medir_transacciones', descripcion='temporal')
+        fabrica = RequestFactory()
+        peticiones = [
+            fabrica.get('/Eventos/eventos_todos/'),
+            fabrica.get('/Miembros/personas/'),
+            fabrica.get('/Devocionales/historial/'),
+            fabrica.post(f'/Ciclos/editar_ciclo/{ciclo.id_ciclo}/', {'nombre': ciclo.nombre, 'descripcion': ciclo.descripcion}),
+        ]
+
+        self.stdout.write(f'{"vista":<34}{"modo":<7}{"sentencias":>11}{"BEGIN/COMMIT":>14}{"mediana (ms)":>14}')
+        try:
+            for request in peticiones:
+                request.usuario = usuario
+                coincidencia = resolve(request.path)
+                modos = [
+                    ('antes', transaction.atomic(coincidencia.func)),
+                    ('ahora', coincidencia.func),
+                ]
+                for modo, vista in modos:
+                    self.medir(request, coincidencia, modo, vista, options['repeticiones'])
+        finally:
+            ciclo.delete()
+
+    def medir(self, request, coincidencia, modo, vista, repeticiones):
+        vista(request, *coincidencia.args, **coincidencia.kwargs)  # Calienta cachés y conexión
+        with contar_idas_y_vueltas() as cuenta:
+            respuesta = vista(request, *coincidencia.args, **coincidencia.kwargs)
+        if respuesta.status_code >= 400:
+            raise CommandError(f'{request.path} respondió {respuesta.status_code}: {respuesta.content[:200]}')
+
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            vista(request, *coincidencia.args, **coincidencia.kwargs)
+            tiempos.append(time.perf_counter() - inicio)
+        self.stdout.write(
+            f'{coincidencia.url_name:<34}{modo:<7}{cuenta["sentencias"]:>11}'
+            f'{cuenta["transacciones"]:>14}{statistics.median(tiempos) * 1000:>14.2f}'
+        )
@@ -0,0 +1,80 @@
+from functools import wraps
+from typing import NamedTuple, Optional
+
+import jwt
+from django.conf import settings
+from django.http import JsonResponse
+
+from .roles import obtener_id_rol
+
+
+class UsuarioToken(NamedTuple):
+    """Datos del usuario autenticado extraídos del token JWT."""
+    id_usuario: int
+    rol: Optional[str]
+    id_rol: Optional[int]
+
+
+def extraer_token(auth_header):
+    # Se acepta tanto "Bearer <token>" como el token sin prefijo
+    if auth_header.startswith('Bearer '):
+        return auth_header[7:].strip()
+    return auth_header.strip()
+
+
+def decodificar_token(token):
+    """Payload del token; lanza ``jwt.ExpiredSignatureError`` o ``jwt.InvalidTokenError``."""
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
+
+
+class JWTAutenticacionMiddleware:
+    """
+    Decodifica el token JWT una sola vez por petición y deja el resultado en
+    ``request.usuario`` (``None`` si no se envió token o no es válido). Un token
+    expirado o inválido no corta la petición: las rutas sin ``token_requerido``
+    la atienden como anónima, y ``token_requerido`` responde 401 con el motivo
+    que queda en ``request.error_token``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.rutas_publicas = tuple(getattr(settings, 'JWT_RUTAS_PUBLICAS', ()))
+
+    def __call__(self, request):
+        request.usuario = None
+        request.error_token = None
+
+        auth_header = request.headers.get('Authorization')
+        if auth_header and not request.path.startswith(self.rutas_publicas):
+            try:
+                payload = decodificar_token(extraer_token(auth_header))
+            except jwt.ExpiredSignatureError:
+                request.error_token = 'Token expirado'
+            except jwt.InvalidTokenError:
+                request.error_token = 'Token inválido'
+            else:
+                # El id_rol se resuelve por nombre desde el registro en memoria;
+                # las verificaciones de permisos comparan con él
+                rol = payload.get('rol')
+                request.usuario = UsuarioToken(
+                    id_usuario=payload.get('id_usuario'),
+                    rol=rol,
+                    id_rol=obtener_id_rol(rol),
+                )
+
+        return self.get_response(request)
+
+
+def token_requerido(view_func):
+    """
+    Responde 401 si el token es inválido o expiró y 400 si la petición no trae
+    token (usar con ``method_decorator``).
+    """
+    @wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        if request.usuario is None:
+            if request.error_token:
+                return JsonResponse({'error': request.error_token}, status=401)
+            return JsonResponse({'error': 'Token no proporcionado'}, status=400)
+        return view_func(request, *args, **kwargs)
+    return _wrapped
@@ -0,0 +1,43 @@
+from django.db import migrations
+
+# El esquema se mantiene a mano en bd.sql (todos los modelos son managed = False),
+# así que los índices de todas las apps se crean aquí con SQL idempotente.
+# Cualquier índice nuevo debe agregarse también junto a su tabla en bd.sql.
+INDICES = [
+    # Eventos: mis eventos, eventos por ministerio y listado general por fecha
+    ('idx_eventos_usuario', 'eventos (id_usuario)'),
+    ('idx_eventos_ministerio_estado_fecha', 'eventos (id_ministerio, id_estado, fecha DESC, hora DESC)'),
+    ('idx_eventos_fecha_hora', 'eventos (fecha DESC, hora DESC)'),
+    ('idx_motivos_evento_evento', 'motivos_evento (id_evento)'),
+    # Notificaciones del usuario, filtradas por leída y ordenadas por fecha
+    ('idx_notificaciones_destino_leida_fecha', 'notificaciones (id_usuario_destino, leida, fecha_creacion DESC)'),
+    ('idx_notificaciones_evento', 'notificaciones (id_evento)'),
+    # Usuarios y líderes de ministerio
+    ('idx_usuarios_persona', 'usuarios (id_persona)'),
+    ('idx_ministerio_lider1', 'ministerio (id_lider1)'),
+    ('idx_ministerio_lider2', 'ministerio (id_lider2)'),
+    # Cursos
+    ('idx_curso_ciclo', 'curso (id_ciclo)'),
+    ('idx_rubrica_curso', 'rubrica (id_curso)'),
+    ('idx_tarea_curso', 'tarea (id_curso)'),
+    ('idx_calificacion_persona_tarea', 'calificacion (id_persona, id_tarea)'),
+    ('idx_asistencia_curso_curso_persona_fecha', 'asistencia_curso (id_curso, id_persona, fecha)'),
+    # Devocionales
+    ('idx_devocionales_mes_anio', 'devocionales (mes, año)'),
+    ('idx_devocionales_fecha_creacion', 'devocionales (fecha_creacion DESC)'),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Login', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=f'CREATE INDEX IF NOT EXISTS {nombre} ON {definicion};',
+            reverse_sql=f'DROP INDEX IF EXISTS {nombre};',
+        )
+        for nombre, definicion in INDICES
+    ]
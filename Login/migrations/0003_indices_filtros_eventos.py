@@ -0,0 +1,30 @@
+from django.db import migrations
+
+# Índices para los filtros de /Eventos/eventos_todos/ (ver ListarTodosEventosView).
+# Los filtros por ministerio, creador y fecha ya están cubiertos por 0002.
+INDICES = [
+    ('idx_eventos_estado_fecha', 'eventos (id_estado, fecha DESC, hora DESC)'),
+    ('idx_eventos_tipo_evento', 'eventos (id_tipo_evento)'),
+    # nombre__icontains genera UPPER(nombre) LIKE '%...%', que solo un índice trigram acelera
+    ('idx_eventos_nombre_trgm', 'eventos USING gin (UPPER(nombre) gin_trgm_ops)'),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Login', '0002_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='CREATE EXTENSION IF NOT EXISTS pg_trgm;',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ] + [
+        migrations.RunSQL(
+            sql=f'CREATE INDEX IF NOT EXISTS {nombre} ON {definicion};',
+            reverse_sql=f'DROP INDEX IF EXISTS {nombre};',
+        )
+        for nombre, definicion in INDICES
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+# Contador de notificaciones no leídas por usuario (modelo Eventos.NotificacionesNoLeidas).
+# Se inicializa con los datos existentes; desde entonces lo mantienen las vistas.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Login', '0003_indices_filtros_eventos'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+                CREATE TABLE IF NOT EXISTS notificaciones_no_leidas (
+                    id_usuario INT PRIMARY KEY REFERENCES usuarios(id_usuario) ON DELETE CASCADE,
+                    total INT NOT NULL DEFAULT 0
+                );
+                INSERT INTO notificaciones_no_leidas (id_usuario, total)
+                SELECT id_usuario_destino, COUNT(*)
+                FROM notificaciones
+                WHERE leida = FALSE AND id_usuario_destino IS NOT NULL
+                GROUP BY id_usuario_destino
+                ON CONFLICT (id_usuario) DO NOTHING;
+            """,
+            reverse_sql='DROP TABLE IF EXISTS notificaciones_no_leidas;',
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations
+
+# Cupo opcional por evento con lista de espera (ver Eventos/participantes.py).
+# Los lugares ocupados se cuentan en cupos_evento y no en la fila de eventos, para
+# que las inscripciones simultáneas no se encolen detrás del bloqueo del evento.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Login', '0004_notificaciones_no_leidas'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+                ALTER TABLE eventos ADD COLUMN IF NOT EXISTS cupo INT CHECK (cupo >= 0);
+                ALTER TABLE participantes_evento ADD COLUMN IF NOT EXISTS en_espera BOOLEAN NOT NULL DEFAULT FALSE;
+                CREATE TABLE IF NOT EXISTS cupos_evento (
+                    id_evento INT PRIMARY KEY REFERENCES eventos(id_evento) ON DELETE CASCADE,
+                    ocupados INT NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_participantes_evento_espera
+                    ON participantes_evento (id_evento, id_participacion) WHERE en_espera;
+            """,
+            reverse_sql="""
+                DROP INDEX IF EXISTS idx_participantes_evento_espera;
+                DROP TABLE IF EXISTS cupos_evento;
+                ALTER TABLE participantes_evento DROP COLUMN IF EXISTS en_espera;
+                ALTER TABLE eventos DROP COLUMN IF EXISTS cupo;
+            """,
+        ),
+    ]
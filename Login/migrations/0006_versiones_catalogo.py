@@ -0,0 +1,24 @@
+from django.db import migrations
+
+# Versión de los catálogos cacheados en memoria por cada proceso (ver Eventos/catalogos.py).
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Login', '0005_cupos_evento'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+                CREATE TABLE IF NOT EXISTS versiones_catalogo (
+                    nombre VARCHAR(50) PRIMARY KEY,
+                    version BIGINT NOT NULL DEFAULT 0
+                );
+                INSERT INTO versiones_catalogo (nombre, version) VALUES ('eventos', 0)
+                ON CONFLICT (nombre) DO NOTHING;
+            """,
+            reverse_sql='DROP TABLE IF EXISTS versiones_catalogo;',
+        ),
+    ]
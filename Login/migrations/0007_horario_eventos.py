@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# Duración de los eventos y su ventana horaria como rango (ver Eventos/horarios.py).
+# Los índices GiST (btree_gist permite combinar el lugar/ministerio con el rango)
+# responden "eventos del mismo lugar o ministerio que se cruzan con esta ventana"
+# sin recorrer la tabla.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Login', '0006_versiones_catalogo'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+                CREATE EXTENSION IF NOT EXISTS btree_gist;
+                ALTER TABLE eventos ADD COLUMN IF NOT EXISTS duracion INT NOT NULL DEFAULT 120
+                    CHECK (duracion BETWEEN 1 AND 1440);
+                ALTER TABLE eventos ADD COLUMN IF NOT EXISTS horario TSRANGE
+                    GENERATED ALWAYS AS (
+                        tsrange(fecha + hora, fecha + hora + duracion * INTERVAL '1 minute', '[)')
+                    ) STORED;
+                CREATE INDEX IF NOT EXISTS idx_eventos_lugar_horario
+                    ON eventos USING gist (lower(btrim(lugar)), horario)
+                    WHERE btrim(lugar) <> '';
+                CREATE INDEX IF NOT EXISTS idx_eventos_ministerio_horario
+                    ON eventos USING gist (id_ministerio, horario);
+            """,
+            reverse_sql="""
+                DROP INDEX IF EXISTS idx_eventos_ministerio_horario;
+                DROP INDEX IF EXISTS idx_eventos_lugar_horario;
+                ALTER TABLE eventos DROP COLUMN IF EXISTS horario;
+                ALTER TABLE eventos DROP COLUMN IF EXISTS duracion;
+            """,
+        ),
+    ]
@@ -0,0 +1,57 @@
+from django.db import migrations
+
+# Los lugares de un evento con cupo pasan de un contador (cupos_evento) a una fila
+# por plaza (ver Eventos/participantes.py): las inscripciones toman plazas distintas
+# con SKIP LOCKED en lugar de hacer fila detrás del lock del contador. Las plazas de
+# los eventos que ya tienen cupo se crean con sus confirmados sentados.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Login', '0007_horario_eventos'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+                CREATE TABLE IF NOT EXISTS plazas_evento (
+                    id_evento INT NOT NULL REFERENCES eventos(id_evento) ON DELETE CASCADE,
+                    numero INT NOT NULL,
+                    id_participacion INT UNIQUE
+                        REFERENCES participantes_evento(id_participacion) ON DELETE SET NULL,
+                    PRIMARY KEY (id_evento, numero)
+                );
+                CREATE INDEX IF NOT EXISTS idx_plazas_evento_libres
+                    ON plazas_evento (id_evento, numero) WHERE id_participacion IS NULL;
+
+                WITH confirmados AS (
+                    SELECT p.id_evento, p.id_participacion,
+                           row_number() OVER (PARTITION BY p.id_evento ORDER BY p.id_participacion) AS numero
+                    FROM participantes_evento p JOIN eventos e USING (id_evento)
+                    WHERE e.cupo IS NOT NULL AND NOT p.en_espera
+                ), plazas AS (
+                    SELECT e.id_evento, generate_series(1, GREATEST(e.cupo, COUNT(c.id_participacion))) AS numero
+                    FROM eventos e LEFT JOIN confirmados c USING (id_evento)
+                    WHERE e.cupo IS NOT NULL
+                      AND NOT EXISTS (SELECT 1 FROM plazas_evento x WHERE x.id_evento = e.id_evento)
+                    GROUP BY e.id_evento, e.cupo
+                )
+                INSERT INTO plazas_evento (id_evento, numero, id_participacion)
+                SELECT pl.id_evento, pl.numero, c.id_participacion
+                FROM plazas pl LEFT JOIN confirmados c USING (id_evento, numero);
+
+                DROP TABLE IF EXISTS cupos_evento;
+            """,
+            reverse_sql="""
+                CREATE TABLE IF NOT EXISTS cupos_evento (
+                    id_evento INT PRIMARY KEY REFERENCES eventos(id_evento) ON DELETE CASCADE,
+                    ocupados INT NOT NULL DEFAULT 0
+                );
+                INSERT INTO cupos_evento (id_evento, ocupados)
+                SELECT id_evento, COUNT(id_participacion) FROM plazas_evento GROUP BY id_evento
+                ON CONFLICT (id_evento) DO NOTHING;
+                DROP TABLE IF EXISTS plazas_evento;
+            """,
+        ),
+    ]
@@ -0,0 +1,48 @@
+"""
+Registro en memoria de la tabla ``rol``.
+
+La tabla tiene muy pocas filas y casi nunca cambia, así que se carga una sola
+vez por proceso y las verificaciones de permisos no consultan la base de datos.
+Se invalida explícitamente con ``invalidar_roles()`` (o automáticamente al
+guardar/eliminar un Rol desde el ORM).
+"""
+import threading
+
+from .models import Rol
+
+_lock = threading.Lock()
+_roles_por_nombre = None
+
+
+def _cargar_roles():
+    global _roles_por_nombre
+    with _lock:
+        if _roles_por_nombre is None:
+            _roles_por_nombre = dict(Rol.objects.values_list('rol', 'id_rol'))
+        return _roles_por_nombre
+
+
+def obtener_id_rol(nombre_rol):
+    """Devuelve el id_rol para el nombre de rol del token, o None si no existe."""
+    if not nombre_rol:
+        return None
+    roles = _roles_por_nombre
+    if roles is None:
+        roles = _cargar_roles()
+    return roles.get(nombre_rol)
+
+
+def invalidar_roles():
+    global _roles_por_nombre
+    with _lock:
+        _roles_por_nombre = None
+
+
+def rol_permitido(usuario, roles_permitidos=None):
+    """
+    Verifica el rol del usuario autenticado (``request.usuario``).
+    Sin ``roles_permitidos`` basta con que el rol exista.
+    """
+    if usuario is None or usuario.id_rol is None:
+        return False
+    return roles_permitidos is None or usuario.id_rol in roles_permitidos
@@ -1,3 +1,207 @@
-from django.test import TestCase
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
 
-# Create your tests here.
+import jwt
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from backend.pruebas import PruebaAPI, crear_eventos, crear_usuario, crear_usuarios, token_de
+from Cursos.models import AsistenciaCurso, Calificacion, Curso, Rubrica, Tarea
+from Devocionales.models import Devocionales
+from Eventos.models import Notificaciones
+from Ministerio.models import Ministerio
+
+
+class AutenticacionTests(PruebaAPI):
+    """El middleware solo decodifica el token; token_requerido decide si la vista lo exige."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.pastor = crear_usuario(id_rol=1, prefijo='pastor')
+        cls.lider = crear_usuario()
+
+    def firmar(self, payload):
+        return jwt.encode(payload, settings.SECRET_KEY, algorithm='HS256')
+
+    def con_token(self, metodo, url, token, **kwargs):
+        return getattr(self.client, metodo)(url, HTTP_AUTHORIZATION=f'Bearer {token}', **kwargs)
+
+    def test_token_invalido_o_expirado_responde_401_solo_donde_se_exige(self):
+        vencimiento = datetime.now(timezone.utc) - timedelta(minutes=1)
+        expirado = self.firmar({'id_usuario': self.lider.id_usuario, 'rol': 'Lider', 'exp': vencimiento})
+        for token, error in (('no-es-un-token', 'Token inválido'), (expirado, 'Token expirado')):
+            with self.subTest(error=error):
+                respuesta = self.con_token('get', '/Eventos/mis_eventos/', token)
+                self.assertEqual(respuesta.status_code, 401)
+                self.assertEqual(respuesta.json()['error'], error)
+                # El listado público lo atiende como anónimo
+                respuesta = self.con_token('get', '/Eventos/eventos_todos/', token)
+                self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self.client.get('/Eventos/mis_eventos/').status_code, 400)
+
+    def test_permisos_por_id_rol(self):
+        datos = {'nombre': 'Ciclo 2025', 'descripcion': 'Primer semestre'}
+        respuesta = self.con_token('post', '/Ciclos/crear_ciclo/', token_de(self.lider), data=datos)
+        self.assertEqual(respuesta.status_code, 403)
+        respuesta = self.con_token('post', '/Ciclos/crear_ciclo/', token_de(self.pastor), data=datos)
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+
+        # Un nombre de rol que no está en la tabla no da permisos aunque se parezca
+        falso = self.firmar({'id_usuario': self.lider.id_usuario, 'rol': 'pastor'})
+        respuesta = self.con_token('post', '/Ciclos/crear_ciclo/', falso, data=datos)
+        self.assertEqual(respuesta.status_code, 403)
+
+
+class IndicesConsultasTests(PruebaAPI):
+    """
+    Los índices de bd.sql cubren las consultas que hacen las vistas: cada prueba
+    captura el SQL real de una petición y pide su plan. Con pocas filas el
+    planificador prefiere recorrer la tabla, así que se desactiva el seq scan: si
+    aun así no aparece el índice, no sirve.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.pastor = crear_usuario(id_rol=1, prefijo='pastor')
+        cls.usuario, otro = crear_usuarios(2)
+        ministerios = Ministerio.objects.bulk_create([
+            Ministerio(nombre=f'Ministerio {i}', id_lider1=otro) for i in range(8)
+        ])
+        cls.ministerio = ministerios[0]
+        # Filas repartidas entre ministerios y estados para que cada filtro sea selectivo.
+        # Con solo unos cientos, recorrer entero un índice b-tree cuesta menos que el
+        # GIN de trigramas
+        for ministerio in ministerios:
+            for id_estado in range(1, 7):
+                crear_eventos(60, ministerio, otro, id_estado)
+        eventos = crear_eventos(10, cls.ministerio, cls.usuario)
+        crear_eventos(1, cls.ministerio, otro, nombre='Retiro de jóvenes')
+        Notificaciones.objects.bulk_create([
+            Notificaciones(
+                id_evento=evento, id_usuario_remitente=otro, id_usuario_destino=destino,
+                tipo='aprobacion', mensaje='Mensaje'
+            )
+            for evento in eventos for destino in (cls.usuario, otro, cls.pastor)
+        ])
+
+        cls.curso = Curso.objects.create(
+            nombre='Discipulado', fecha_inicio=date(2025, 1, 6), fecha_fin=date(2025, 6, 30),
+            hora_inicio=time(19, 0), hora_fin=time(21, 0), id_usuario=otro
+        )
+        # bulk_create no llama a Rubrica.save(), que valida la suma contra la base
+        criterio = Rubrica.objects.bulk_create([
+            Rubrica(id_curso=cls.curso, nombre_criterio='Tareas', porcentaje=Decimal('100')),
+        ])[0]
+        tareas = Tarea.objects.bulk_create([
+            Tarea(id_curso=cls.curso, id_criterio=criterio, titulo=f'Tarea {i}', fecha_entrega=date(2025, 3, 1))
+            for i in range(5)
+        ])
+        personas = [cls.usuario.id_persona, otro.id_persona, cls.pastor.id_persona]
+        Calificacion.objects.bulk_create([
+            Calificacion(id_tarea=tarea, id_persona=persona, nota=Decimal('8'))
+            for tarea in tareas for persona in personas
+        ])
+        AsistenciaCurso.objects.bulk_create([
+            AsistenciaCurso(id_curso=cls.curso, id_persona=persona, fecha=date(2025, 3, dia), presente=True)
+            for dia in range(1, 11) for persona in personas
+        ])
+        Devocionales.objects.bulk_create([
+            Devocionales(
+                id_usuario=cls.pastor, mes=mes, año=año, titulo=f'Devocional {mes}',
+                texto_biblico='Salmo 23', reflexion='Reflexión', contenido_calendario='{}'
+            )
+            for año in (2024, 2025) for mes in ('enero', 'febrero', 'marzo', 'abril')
+        ])
+        with connection.cursor() as cursor:
+            # Las filas nuevas quedan en la lista pendiente del GIN, que se recorre entera,
+            # hasta que autovacuum la vuelca; aquí no hay VACUUM dentro de la transacción
+            cursor.execute("SELECT gin_clean_pending_list('idx_eventos_nombre_trgm')")
+            for tabla in ('eventos', 'notificaciones', 'calificacion', 'asistencia_curso', 'devocionales'):
+                cursor.execute(f'ANALYZE {tabla}')
+
+    def assertVistaUsaIndice(self, indice, patron, peticion):
+        """
+        Hace la petición, toma la primera consulta capturada que coincide con
+        ``patron`` y verifica que su plan recorra ``indice``.
+        """
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = peticion()
+        self.assertLess(respuesta.status_code, 400, respuesta.content)
+        sql = [q['sql'] for q in consultas.captured_queries if re.search(patron, q['sql'])]
+        self.assertTrue(sql, f'Ninguna consulta coincide con {patron!r}')
+
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('EXPLAIN ' + sql[0])
+            plan = '\n'.join(fila for fila, in cursor.fetchall())
+        self.assertIn(indice, plan)
+        self.assertRegex(plan, r'Index (Only )?Scan|Bitmap Index Scan')
+
+    def listado(self, url, usuario=None, **params):
+        return lambda: self.get(url, usuario or self.usuario, **params)
+
+    def test_mis_eventos(self):
+        self.assertVistaUsaIndice(
+            'idx_eventos_usuario', r'FROM "eventos"', self.listado('/Eventos/mis_eventos/')
+        )
+
+    def test_eventos_por_ministerio(self):
+        self.assertVistaUsaIndice(
+            'idx_eventos_ministerio_estado_fecha', r'FROM "eventos"',
+            self.listado(f'/Eventos/eventos_ministerio/{self.ministerio.id_ministerio}/', limit=20),
+        )
+
+    def test_eventos_por_fecha(self):
+        self.assertVistaUsaIndice(
+            'idx_eventos_fecha_hora', r'FROM "eventos"', self.listado('/Eventos/eventos_todos/', limit=20)
+        )
+
+    def test_eventos_por_estado(self):
+        self.assertVistaUsaIndice(
+            'idx_eventos_estado_fecha', r'FROM "eventos"',
+            self.listado('/Eventos/eventos_todos/', id_estado=1, limit=20),
+        )
+
+    def test_eventos_por_nombre(self):
+        self.assertVistaUsaIndice(
+            'idx_eventos_nombre_trgm', r'FROM "eventos"', self.listado('/Eventos/eventos_todos/', q='retiro')
+        )
+
+    def test_notificaciones_no_leidas(self):
+        self.assertVistaUsaIndice(
+            'idx_notificaciones_destino_leida_fecha', r'FROM "notificaciones"',
+            self.listado('/Eventos/notificaciones/', leida='true', limit=20),
+        )
+
+    def test_calificaciones_de_persona(self):
+        url = f'/Cursos/calcular_calificacion/{self.curso.id_curso}/{self.usuario.id_persona_id}/'
+        self.assertVistaUsaIndice('idx_calificacion_persona_tarea', r'FROM "calificacion"', self.listado(url))
+
+    def test_asistencia_de_persona(self):
+        datos = {
+            'id_curso': self.curso.id_curso, 'fecha': '2025-03-01',
+            'asistencias': [{'id_persona': self.usuario.id_persona_id, 'presente': False}],
+        }
+        self.assertVistaUsaIndice(
+            'idx_asistencia_curso_curso_persona_fecha', r'^SELECT .* FROM "asistencia_curso" .* FOR UPDATE',
+            lambda: self.post('/Cursos/registrar_asistencia_curso/', datos, self.usuario,
+                              content_type='application/json'),
+        )
+
+    def test_devocionales_del_mes(self):
+        datos = {'mes': 'marzo', 'año': 2025, 'titulo': 'Marzo'}
+        self.assertVistaUsaIndice(
+            'idx_devocionales_mes_anio', r'^SELECT .* FROM "devocionales" .* FOR UPDATE',
+            lambda: self.post('/Devocionales/crear_devocionales/', datos, self.pastor,
+                              content_type='application/json'),
+        )
+
+    def test_historial_devocionales(self):
+        self.assertVistaUsaIndice(
+            'idx_devocionales_fecha_creacion', r'FROM "devocionales" .*ORDER BY',
+            self.listado('/Devocionales/historial/'),
+        )
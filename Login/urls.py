@@ -6,9 +6,11 @@ En esta aplicación, se definen las URLs para las vistas relacionadas con la aut
 Las URLs son:
 - 'login/': Vista para iniciar sesión.
 - 'logout/': Vista para cerrar sesión.
+- 'conexiones/': Estadísticas de las conexiones a la base de datos del proceso.
 """
 
 urlpatterns = [
     path('login/', IniciarSesionView.as_view(), name='iniciar_sesion'),
     path('logout/', CerrarSesionView.as_view(), name='cerrar_sesion'),
+    path('conexiones/', EstadoConexionesView.as_view(), name='estado_conexiones'),
 ]
\ No newline at end of file
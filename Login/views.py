@@ -5,17 +5,24 @@ from django.http import JsonResponse
 from django.views import View
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
+from django.db import transaction
 from django.contrib.auth.hashers import check_password, make_password
 from django.contrib.auth import logout
+from backend.instrumentacion import estadisticas_bloqueos
+from .conexiones import estadisticas_conexiones
+from .middleware import token_requerido
 from .models import Usuario
+from .roles import rol_permitido
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
 class IniciarSesionView(View):
     def generate_token(self, usuario):
         payload = {
             'id_usuario': usuario.id_usuario,
             'nombre_usuario': usuario.usuario,
             'rol': usuario.id_rol.rol,
+            'id_rol': usuario.id_rol.id_rol,
         }
         token = jwt.encode(payload, settings.SECRET_KEY, algorithm='HS256')
         return token
@@ -57,6 +64,7 @@ class IniciarSesionView(View):
             return JsonResponse({'error': str(e)}, status=500)
         
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
 class CerrarSesionView(View):
     def post(self, request, *args, **kwargs):
         try:
@@ -73,17 +81,11 @@ class CerrarSesionView(View):
             return JsonResponse({'error': str(e)}, status=500)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class CambiarContraseniaView(View):
     def post(self, request, id_usuario, *args, **kwargs):
         try:
-            token = request.headers.get('Authorization')
-            if not token:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            token_id_usuario = payload.get('id_usuario')
-
-            if id_usuario != token_id_usuario:
+            if id_usuario != request.usuario.id_usuario:
                 return JsonResponse({'error': 'No autorizado'}, status=401)
 
             nueva_contrasenia = request.POST.get('nueva_contrasenia')
@@ -96,12 +98,21 @@ class CambiarContraseniaView(View):
 
             return JsonResponse({'mensaje': 'Contraseña cambiada exitosamente'}, status=200)
 
-        except jwt.ExpiredSignatureError:
-            return JsonResponse({'error': 'Token expirado'}, status=401)
-
-        except jwt.InvalidTokenError:
-            return JsonResponse({'error': 'Token inválido'}, status=401)
-
         except Usuario.DoesNotExist:
             return JsonResponse({'error': 'Usuario no encontrado'}, status=404)
 
+@method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
+class EstadoConexionesView(View):
+    def get(self, request, *args, **kwargs):
+        try:
+            # Solo el Pastor puede consultar el estado de las conexiones
+            if not rol_permitido(request.usuario, [1]):
+                return JsonResponse({'error': 'No tiene permisos para ver esta información'}, status=403)
+
+            # Junto a las conexiones, la espera por bloqueos de cada vista
+            return JsonResponse({**estadisticas_conexiones(), 'bloqueos': estadisticas_bloqueos()})
+
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
@@ -1,3 +1,19 @@
-from django.test import TestCase
+from backend.pruebas import PruebaAPI, crear_usuario, crear_usuarios
+from Ministerio.models import Ministerio
 
-# Create your tests here.
+
+class ConsultasListadosMiembrosTests(PruebaAPI):
+    def test_personas_con_usuario(self):
+        pastor = crear_usuario(id_rol=1, prefijo='pastor')
+
+        def sembrar(cantidad):
+            lideres = crear_usuarios(cantidad)
+            Ministerio.objects.bulk_create([
+                Ministerio(nombre=f'Ministerio {lider.pk}', id_lider1=lider, id_lider2=pastor) for lider in lideres
+            ])
+
+        # Usuarios con persona y rol + ministerios con sus líderes
+        respuestas = self.assertConsultasConstantes(2, '/Miembros/personas_usuario/', sembrar, pastor)
+        personas = respuestas[-1].json()['personas_con_usuario']
+        self.assertEqual(len(personas), 44)
+        self.assertEqual(len(next(p for p in personas if p['usuario']['id_usuario'] == pastor.pk)['ministerios']), 43)
@@ -1,42 +1,25 @@
 from django.shortcuts import render
 from Ministerio.models import Ministerio
-import jwt
-from django.conf import settings
 from django.http import JsonResponse
 from django.views import View
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-from Login.models import Persona, Rol, Usuario
+from django.db import transaction
+from backend.replica import usar_replica
+from Login.middleware import token_requerido
+from Login.roles import rol_permitido
+from Login.models import Persona, Usuario
 from datetime import datetime
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class ListarPersonasView(View):
     def get(self, request, *args, **kwargs):
         try:
-            # Obtener token del encabezado Authorization
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-                
-            # Extraer el token si viene con el prefijo Bearer
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
-            else:
-                token = auth_header
-
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                rol_usuario = payload.get('rol')
-                
-                # Verificar si el rol está permitido (solo roles 1 y 2)
-                rol_id = Rol.objects.filter(rol=rol_usuario).first()
-                if not rol_id or rol_id.id_rol not in [1, 2]:
-                    return JsonResponse({'error': 'No tiene permisos para ver la lista de personas'}, status=403)
-                    
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            # Verificar si el rol está permitido (solo roles 1 y 2)
+            if not rol_permitido(request.usuario, [1, 2]):
+                return JsonResponse({'error': 'No tiene permisos para ver la lista de personas'}, status=403)
             
             # Obtener todas las personas
             personas = Persona.objects.all().order_by('id_persona')            
@@ -67,31 +50,14 @@ class ListarPersonasView(View):
             return JsonResponse({'error': str(e)}, status=500)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
+@method_decorator(usar_replica, name='dispatch')
 class ListarPersonasConUsuarioView(View):
     def get(self, request, *args, **kwargs):
         try:
-            # Verificación del token (igual que antes)
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-                
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
-            else:
-                token = auth_header
-
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                rol_usuario = payload.get('rol')
-                
-                rol_id = Rol.objects.filter(rol=rol_usuario).first()
-                if not rol_id or rol_id.id_rol not in [1, 2]:
-                    return JsonResponse({'error': 'No tiene permisos para ver la lista de personas'}, status=403)
-                    
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            if not rol_permitido(request.usuario, [1, 2]):
+                return JsonResponse({'error': 'No tiene permisos para ver la lista de personas'}, status=403)
             
             # Obtener todos los usuarios con sus personas relacionadas
             usuarios = Usuario.objects.select_related('id_persona', 'id_rol').all()
@@ -163,33 +129,14 @@ class ListarPersonasConUsuarioView(View):
             return JsonResponse({'error': str(e)}, status=500)
         
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class DetallePersonaView(View):
     def get(self, request, id_persona, *args, **kwargs):
         try:
-            # Obtener token del encabezado Authorization
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-                
-            # Extraer el token si viene con el prefijo Bearer
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
-            else:
-                token = auth_header
-
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                rol_usuario = payload.get('rol')
-                
-                # Verificar si el rol está permitido (solo roles 1 y 2)
-                rol_id = Rol.objects.filter(rol=rol_usuario).first()
-                if not rol_id or rol_id.id_rol not in [1, 2]:
-                    return JsonResponse({'error': 'No tiene permisos para ver detalles de personas'}, status=403)
-                    
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            # Verificar si el rol está permitido (solo roles 1 y 2)
+            if not rol_permitido(request.usuario, [1, 2]):
+                return JsonResponse({'error': 'No tiene permisos para ver detalles de personas'}, status=403)
             
             # Obtener la persona específica
             try:
@@ -230,36 +177,16 @@ class DetallePersonaView(View):
             return JsonResponse({'error': str(e)}, status=500)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class ActualizarPersonaView(View):
     def post(self, request, id_persona, *args, **kwargs):
         try:
-            # Obtener token del encabezado Authorization
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-                
-            # Extraer el token si viene con el prefijo Bearer
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
-            else:
-                token = auth_header
-
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                rol_usuario = payload.get('rol')
-                
-                # Verificar si el rol está permitido (solo roles 1 y 2)
-                rol_id = Rol.objects.filter(rol=rol_usuario).first()
-                if not rol_id or rol_id.id_rol not in [1, 2]:
-                    return JsonResponse({'error': 'No tiene permisos para actualizar personas'}, status=403)
-                    
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            # Verificar si el rol está permitido (solo roles 1 y 2)
+            if not rol_permitido(request.usuario, [1, 2]):
+                return JsonResponse({'error': 'No tiene permisos para actualizar personas'}, status=403)
             
             # Iniciar transacción
-            from django.db import transaction
             with transaction.atomic():
                 try:
                     persona = Persona.objects.get(id_persona=id_persona)
@@ -339,33 +266,14 @@ class ActualizarPersonaView(View):
             return JsonResponse({'error': str(e)}, status=500)
         
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class ListarPersonasSinUsuarioView(View):
     def get(self, request, *args, **kwargs):
         try:
-            # Obtener token del encabezado Authorization
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-                
-            # Extraer el token si viene con el prefijo Bearer
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
-            else:
-                token = auth_header
-
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                rol_usuario = payload.get('rol')
-                
-                # Verificar si el rol está permitido (solo roles 1 y 2)
-                rol_id = Rol.objects.filter(rol=rol_usuario).first()
-                if not rol_id or rol_id.id_rol not in [1, 2]:
-                    return JsonResponse({'error': 'No tiene permisos para ver la lista de personas'}, status=403)
-                    
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            # Verificar si el rol está permitido (solo roles 1 y 2)
+            if not rol_permitido(request.usuario, [1, 2]):
+                return JsonResponse({'error': 'No tiene permisos para ver la lista de personas'}, status=403)
             
             # Obtener todas las personas que NO tienen usuario asociado
             personas_sin_usuario = Persona.objects.exclude(
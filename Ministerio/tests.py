@@ -1,3 +1,19 @@
-from django.test import TestCase
+from backend.pruebas import PruebaAPI, crear_usuario, crear_usuarios
+from .models import Ministerio
 
-# Create your tests here.
+
+class ConsultasListadosMinisterioTests(PruebaAPI):
+    def test_listar_ministerios(self):
+        usuario = crear_usuario()
+
+        def sembrar(cantidad):
+            lideres = crear_usuarios(2 * cantidad)
+            Ministerio.objects.bulk_create([
+                Ministerio(nombre=f'Ministerio {i}', id_lider1=lideres[2 * i], id_lider2=lideres[2 * i + 1])
+                for i in range(cantidad)
+            ])
+
+        respuestas = self.assertConsultasConstantes(1, '/Ministerio/listarministerios/', sembrar, usuario)
+        ministerios = respuestas[-1].json()['ministerios']
+        self.assertEqual(len(ministerios), 43)
+        self.assertIsNotNone(ministerios[-1]['lider2']['nombres'])
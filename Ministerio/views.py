@@ -1,11 +1,12 @@
 import os
 from django.shortcuts import render
-import jwt
-from django.conf import settings
 from django.http import JsonResponse
 from django.views import View
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
+from backend.replica import usar_replica
+from Login.middleware import token_requerido
+from Login.roles import rol_permitido
 from Login.models import Persona, Usuario, Rol
 from Ministerio.models import Ministerio
 from django.db import transaction
@@ -14,40 +15,25 @@ import traceback
 from django.db.models import Q 
 
 import os
-import jwt
 import traceback
 from django.db import transaction
 from django.http import JsonResponse
 from django.views import View
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-from django.conf import settings
 from django.contrib.auth.hashers import make_password
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class CrearMinisterioView(View):
     def post(self, request, *args, **kwargs):
         try:
             # 1. Validación del token
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-                
-            token = auth_header.split('Bearer ')[1] if 'Bearer ' in auth_header else auth_header
-
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                rol_usuario = payload.get('rol')
-                id_usuario_actual = payload.get('id_usuario')
-                
-                rol_id = Rol.objects.filter(rol=rol_usuario).first()
-                if not rol_id or rol_id.id_rol not in [1, 2]:
-                    return JsonResponse({'error': 'No tiene permisos para crear ministerios'}, status=403)
-                    
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            id_usuario_actual = request.usuario.id_usuario
+            
+            if not rol_permitido(request.usuario, [1, 2]):
+                return JsonResponse({'error': 'No tiene permisos para crear ministerios'}, status=403)
 
             # 2. Validar campos obligatorios
             nombre_ministerio = request.POST.get('nombre')
@@ -239,29 +225,16 @@ class CrearMinisterioView(View):
             return JsonResponse({'error': str(e), 'detalle': error_trace}, status=500)
         
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
+@method_decorator(usar_replica, name='dispatch')
 class ListarMinisteriosView(View):
     def get(self, request, *args, **kwargs):
         try:
             # 1. Validación del token
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-                
-            token = auth_header.split('Bearer ')[1] if 'Bearer ' in auth_header else auth_header
-
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                rol_usuario = payload.get('rol')
-                
-                # Verificar permisos (puedes ajustar los roles permitidos)
-                rol_id = Rol.objects.filter(rol=rol_usuario).first()
-                if not rol_id:
-                    return JsonResponse({'error': 'Rol no válido'}, status=403)
-                    
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            # Verificar permisos (puedes ajustar los roles permitidos)
+            if not rol_permitido(request.usuario):
+                return JsonResponse({'error': 'Rol no válido'}, status=403)
 
             # 2. Obtener todos los ministerios con información de líderes
             ministerios = Ministerio.objects.select_related(
@@ -315,29 +288,16 @@ class ListarMinisteriosView(View):
             return JsonResponse({'error': str(e)}, status=500)
         
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class EditarMinisterioView(View):
     def post(self, request, id_ministerio, *args, **kwargs):
         try:
             # 1. Validación del token
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-                
-            token = auth_header.split('Bearer ')[1] if 'Bearer ' in auth_header else auth_header
-
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                rol_usuario = payload.get('rol')
-                id_usuario_actual = payload.get('id_usuario')
-                
-                rol_id = Rol.objects.filter(rol=rol_usuario).first()
-                if not rol_id or rol_id.id_rol not in [1, 2]:
-                    return JsonResponse({'error': 'No tiene permisos para editar ministerios'}, status=403)
-                    
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            id_usuario_actual = request.usuario.id_usuario
+            
+            if not rol_permitido(request.usuario, [1, 2]):
+                return JsonResponse({'error': 'No tiene permisos para editar ministerios'}, status=403)
 
             # 2. Obtener el ministerio a editar
             try:
@@ -563,39 +523,16 @@ class EditarMinisterioView(View):
             error_trace = traceback.format_exc()
             return JsonResponse({'error': str(e), 'detalle': error_trace}, status=500)
         
-def obtener_usuario_id(request):
-    auth_header = request.headers.get('Authorization')
-    if not auth_header:
-        raise Exception('Token no proporcionado')
-    
-    token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
-    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-    return payload.get('id_usuario')
-
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class ListarMinisteriosUsuarioView(View):
     def get(self, request, usuario_id, *args, **kwargs):
         try:
             # 1. Validación del token
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-                
-            token = auth_header.split('Bearer ')[1] if 'Bearer ' in auth_header else auth_header
-
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                rol_usuario = payload.get('rol')
-                
-                # Verificar permisos (puedes ajustar los roles permitidos)
-                rol_id = Rol.objects.filter(rol=rol_usuario).first()
-                if not rol_id:
-                    return JsonResponse({'error': 'Rol no válido'}, status=403)
-                    
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            # Verificar permisos (puedes ajustar los roles permitidos)
+            if not rol_permitido(request.usuario):
+                return JsonResponse({'error': 'Rol no válido'}, status=403)
 
             # 2. Obtener todos los ministerios del usuario (como líder1 o líder2)
             ministerios = Ministerio.objects.select_related(
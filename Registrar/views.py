@@ -1,26 +1,20 @@
 from django.shortcuts import render
-import jwt
 from django.db import transaction
-from django.conf import settings
 from django.http import JsonResponse
 from django.views import View
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.hashers import make_password
-from Login.models import Usuario, Rol, Persona
+from Login.middleware import token_requerido
+from Login.roles import rol_permitido
+from Login.models import Usuario, Persona
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class CambiarContraseniaView(View):
     def post(self, request, id_usuario, *args, **kwargs):
         try:
-            token = request.headers.get('Authorization')
-            if not token:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            token_id_usuario = payload.get('id_usuario')
-
-            if id_usuario != token_id_usuario:
+            if id_usuario != request.usuario.id_usuario:
                 return JsonResponse({'error': 'No autorizado'}, status=401)
 
             nueva_contrasenia = request.POST.get('nueva_contrasenia')
@@ -33,12 +27,6 @@ class CambiarContraseniaView(View):
 
             return JsonResponse({'mensaje': 'Contraseña cambiada exitosamente'}, status=200)
 
-        except jwt.ExpiredSignatureError:
-            return JsonResponse({'error': 'Token expirado'}, status=401)
-
-        except jwt.InvalidTokenError:
-            return JsonResponse({'error': 'Token inválido'}, status=401)
-
         except Usuario.DoesNotExist:
             return JsonResponse({'error': 'Usuario no encontrado'}, status=404)
 
@@ -46,33 +34,14 @@ class CambiarContraseniaView(View):
             return JsonResponse({'error': str(e)}, status=500)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class RegistrarUsuarioView(View):
     def post(self, request, *args, **kwargs):
         try:
-            # Obtener token del encabezado Authorization
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=400)
-            
-            # Extraer el token si viene con el prefijo Bearer
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
-            else:
-                token = auth_header
-            
-            # Decodificar el token directamente
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                rol_usuario = payload.get('rol')
-                
-                # Verificar si el rol está permitido (solo roles 1 y 2)
-                rol_id = Rol.objects.filter(rol=rol_usuario).first()
-                if not rol_id or rol_id.id_rol not in [1, 2]:
-                    return JsonResponse({'error': 'No tiene permisos para registrar personas'}, status=403)
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            # Verificar si el rol está permitido (solo roles 1 y 2)
+            if not rol_permitido(request.usuario, [1, 2]):
+                return JsonResponse({'error': 'No tiene permisos para registrar personas'}, status=403)
             
             # Check required fields
             required_fields = ['nombres', 'apellidos']  # Removed 'numero_cedula'
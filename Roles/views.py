@@ -4,39 +4,25 @@ from django.utils.decorators import method_decorator
 from django.views import View
 from django.contrib.auth.hashers import make_password
 from django.db import transaction
-import jwt
-from django.conf import settings
 import json
 import traceback
 from django.views.decorators.csrf import csrf_exempt
+from Login.middleware import token_requerido
+from Login.roles import rol_permitido
 from Login.models import Persona, Rol, Usuario
 from Ministerio.models import Ministerio
 from django.db.models import Q
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class AsignarPastoresView(View):
     def post(self, request, *args, **kwargs):
         try:
             # 1. Validación del token
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=401)
-                
-            token = auth_header.split('Bearer ')[1] if 'Bearer ' in auth_header else auth_header
-
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                rol_usuario = payload.get('rol')
-                
-                # Solo administradores (rol 1) pueden asignar pastores
-                rol_id = Rol.objects.filter(rol=rol_usuario).first()
-                if not rol_id or rol_id.id_rol != 1:
-                    return JsonResponse({'error': 'No tiene permisos para esta acción'}, status=403)
-                    
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            # Solo administradores (rol 1) pueden asignar pastores
+            if not rol_permitido(request.usuario, [1]):
+                return JsonResponse({'error': 'No tiene permisos para esta acción'}, status=403)
 
             # 2. Parsear el JSON del body
             try:
@@ -154,29 +140,15 @@ class AsignarPastoresView(View):
 from django.db.models import Q
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+@method_decorator(token_requerido, name='dispatch')
 class AsignarLideresMinisterioView(View):
     def post(self, request, *args, **kwargs):
         try:
             # 1. Validación del token (se mantiene igual)
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return JsonResponse({'error': 'Token no proporcionado'}, status=401)
-                
-            token = auth_header.split('Bearer ')[1] if 'Bearer ' in auth_header else auth_header
-
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                rol_usuario = payload.get('rol')
-                
-                # Solo administradores (rol 1) pueden asignar líderes
-                rol_id = Rol.objects.filter(rol=rol_usuario).first()
-                if not rol_id or rol_id.id_rol != 1:
-                    return JsonResponse({'error': 'No tiene permisos para esta acción'}, status=403)
-                    
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({'error': 'Token expirado'}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({'error': 'Token inválido'}, status=401)
+            # Solo administradores (rol 1) pueden asignar líderes
+            if not rol_permitido(request.usuario, [1]):
+                return JsonResponse({'error': 'No tiene permisos para esta acción'}, status=403)
 
             # 2. Parsear los datos del formulario con validación adicional
             try:
@@ -0,0 +1,162 @@
+"""
+Instrumentación de SQL por petición.
+
+Para una muestra de las peticiones (SQL_MUESTREO, de 0 a 1) cuenta las consultas,
+el tiempo total en la base de datos y las consultas repetidas. El resultado se
+envía en el encabezado ``Server-Timing`` y en una línea de log JSON por petición;
+si una misma consulta se repite más de SQL_UMBRAL_REPETIDAS veces se registra una
+advertencia (patrón N+1).
+
+También mide la espera por bloqueos pedidos explícitamente: advisory locks
+(``pg_advisory_xact_lock``) y ``SELECT ... FOR UPDATE/SHARE``. En el proyecto
+esas sentencias solo buscan filas por clave, así que su duración es casi toda
+espera: una vista con mucho tiempo acumulado ahí es un punto de encolamiento.
+El acumulado por vista del proceso se consulta con ``estadisticas_bloqueos()``
+y se registra una advertencia si una petición supera SQL_UMBRAL_BLOQUEO_MS.
+
+El tiempo de INSERT, UPDATE y DELETE se informa aparte como ``dml``: incluye la
+espera por los locks de fila implícitos, pero también la ejecución, y desde el
+cliente no se pueden separar (para eso está ``log_lock_waits`` de Postgres).
+"""
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Las listas "IN (%s, %s, ...)" de distinto largo se cuentan como la misma consulta
+_LISTA_PARAMETROS = re.compile(r'\((?:%s, )+%s\)')
+
+# Sentencias que solo piden un bloqueo: su duración es la espera (SKIP LOCKED no espera)
+_PIDE_BLOQUEO = re.compile(
+    r'\bFOR (?:NO KEY )?UPDATE\b(?!\s+SKIP LOCKED)|\bFOR (?:KEY )?SHARE\b|\bpg_advisory(?:_xact)?_lock(?:_shared)?\b',
+    re.IGNORECASE,
+)
+# Escrituras: su duración mezcla ejecución y espera por locks de fila implícitos
+_DML = re.compile(r'^\s*(?:WITH\b.*?\b)?(?:INSERT|UPDATE|DELETE)\b', re.IGNORECASE | re.DOTALL)
+
+_lock_bloqueos = threading.Lock()
+_bloqueos_por_vista = {}
+
+
+def _acumular_bloqueo(vista, ms):
+    with _lock_bloqueos:
+        datos = _bloqueos_por_vista.setdefault(vista, {'peticiones': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        datos['peticiones'] += 1
+        datos['total_ms'] += ms
+        datos['max_ms'] = max(datos['max_ms'], ms)
+
+
+def estadisticas_bloqueos():
+    """Espera por bloqueos explícitos por vista (peticiones muestreadas de este proceso), de mayor a menor."""
+    with _lock_bloqueos:
+        filas = sorted(_bloqueos_por_vista.items(), key=lambda item: item[1]['total_ms'], reverse=True)
+        return {
+            vista: {
+                'peticiones': datos['peticiones'],
+                'total_ms': round(datos['total_ms'], 1),
+                'promedio_ms': round(datos['total_ms'] / datos['peticiones'], 1),
+                'max_ms': round(datos['max_ms'], 1),
+            }
+            for vista, datos in filas
+        }
+
+
+class _RegistroConsultas:
+    def __init__(self):
+        self.total = 0
+        self.duracion = 0.0
+        self.formas = Counter()
+        self.con_bloqueo = 0
+        self.bloqueo = 0.0
+        self.dml = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            self.duracion += duracion
+            self.total += 1
+            self.formas[sql] += 1
+            if _PIDE_BLOQUEO.search(sql):
+                self.con_bloqueo += 1
+                self.bloqueo += duracion
+            elif _DML.match(sql):
+                self.dml += duracion
+
+    def repetidas(self, umbral):
+        repetidas = Counter()
+        for sql, veces in self.formas.items():
+            repetidas[_LISTA_PARAMETROS.sub('(...)', sql)] += veces
+        return [(sql, veces) for sql, veces in repetidas.most_common() if veces > umbral]
+
+
+class InstrumentacionSQLMiddleware:
+    def __init__(self, get_response):
+        self.muestreo = settings.SQL_MUESTREO
+        if self.muestreo <= 0:
+            raise MiddlewareNotUsed
+        self.umbral = settings.SQL_UMBRAL_REPETIDAS
+        self.umbral_bloqueo = settings.SQL_UMBRAL_BLOQUEO_MS
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if self.muestreo < 1 and random.random() >= self.muestreo:
+            return self.get_response(request)
+
+        registro = _RegistroConsultas()
+        inicio = time.perf_counter()
+        with ExitStack() as stack:
+            for conexion in connections.all():
+                stack.enter_context(conexion.execute_wrapper(registro))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - inicio) * 1000
+        db_ms = registro.duracion * 1000
+        bloqueo_ms = registro.bloqueo * 1000
+        dml_ms = registro.dml * 1000
+
+        response['Server-Timing'] = (
+            f'db;desc="{registro.total} consultas";dur={db_ms:.1f}, '
+            f'lock;desc="{registro.con_bloqueo} esperas de bloqueo";dur={bloqueo_ms:.1f}, '
+            f'dml;dur={dml_ms:.1f}, total;dur={total_ms:.1f}'
+        )
+
+        match = request.resolver_match
+        vista = match.view_name if match else request.path
+        repetidas = registro.repetidas(self.umbral)
+
+        logger.info(json.dumps({
+            'vista': vista,
+            'metodo': request.method,
+            'estado': response.status_code,
+            'consultas': registro.total,
+            'db_ms': round(db_ms, 1),
+            'bloqueo_ms': round(bloqueo_ms, 1),
+            'dml_ms': round(dml_ms, 1),
+            'total_ms': round(total_ms, 1),
+            'repetidas': len(repetidas),
+        }))
+
+        for sql, veces in repetidas:
+            logger.warning('Posible N+1 en %s: consulta repetida %d veces: %s', vista, veces, sql)
+
+        if registro.con_bloqueo:
+            _acumular_bloqueo(vista, bloqueo_ms)
+            if bloqueo_ms > self.umbral_bloqueo:
+                logger.warning(
+                    'Espera de bloqueos en %s: %.1f ms en %d sentencias que piden bloqueo',
+                    vista, bloqueo_ms, registro.con_bloqueo
+                )
+
+        return response
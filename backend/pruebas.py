@@ -0,0 +1,184 @@
+"""
+Ejecutor y utilidades de pruebas.
+
+Todos los modelos del proyecto son ``managed = False``, así que Django no crea
+sus tablas en la base de pruebas. ``PruebasConEsquema`` carga ``bd.sql`` en
+cada base de pruebas antes de aplicar las migraciones (SQL idempotente sobre
+ese mismo esquema), de modo que las pruebas corren contra el esquema real.
+Las funciones ``crear_*`` siembran los catálogos, usuarios y eventos que usan las
+pruebas.
+
+Se ejecutan contra un Postgres local, por ejemplo::
+
+    DB_HOST=localhost DB_PASSWORD=postgres DB_SSLMODE=disable python manage.py test
+"""
+import datetime
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.models.signals import pre_migrate
+from django.test import TestCase, override_settings
+from django.test.runner import DiscoverRunner
+
+ESQUEMA = settings.BASE_DIR / 'bd.sql'
+
+
+def cargar_esquema(using, **kwargs):
+    """Ejecuta bd.sql en la base ``using`` si todavía no tiene las tablas del proyecto."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if 'eventos' in connection.introspection.table_names(cursor):
+            return
+        cursor.execute(ESQUEMA.read_text(encoding='utf-8'))
+
+
+def agregar_replica_espejo():
+    """
+    Sin DB_REPLICA_HOST no hay alias ``replica``; se agrega como espejo (MIRROR)
+    de ``default`` para que las pruebas del enrutado a la réplica siempre corran.
+    """
+    from backend.replica import REPLICA
+
+    if REPLICA in settings.DATABASES:
+        return
+    settings.DATABASES[REPLICA] = {
+        **settings.DATABASES['default'], 'ATOMIC_REQUESTS': False, 'TEST': {'MIRROR': 'default'},
+    }
+    if 'settings' in connections.__dict__:
+        # El manejador de conexiones ya leyó DATABASES
+        connections.settings[REPLICA] = connections.configure_settings(settings.DATABASES)[REPLICA]
+
+
+class PruebasConEsquema(DiscoverRunner):
+    def setup_databases(self, **kwargs):
+        agregar_replica_espejo()
+        pre_migrate.connect(cargar_esquema, dispatch_uid='pruebas_cargar_esquema')
+        try:
+            return super().setup_databases(**kwargs)
+        finally:
+            pre_migrate.disconnect(dispatch_uid='pruebas_cargar_esquema')
+
+
+# Mismos ids que inserción.sql: las vistas comparan con ellos directamente
+ROLES = {1: 'Pastor', 2: 'Lider'}
+ESTADOS = {1: 'Pendiente', 2: 'Aprobado', 3: 'Rechazado', 4: 'Cancelado', 5: 'Realizado', 6: 'Pospuesto'}
+TIPOS_EVENTO = {1: 'Seminario', 2: 'Movilización', 3: 'Congreso', 4: 'Conferencia', 5: 'Taller'}
+
+
+def crear_catalogos():
+    """Roles, estados y tipos de evento; deja cargados los registros en memoria."""
+    from Eventos.catalogos import invalidar_catalogos, obtener_id_estado
+    from Eventos.models import EstadoEvento, TipoEvento
+    from Login.models import Rol
+    from Login.roles import invalidar_roles, obtener_id_rol
+
+    Rol.objects.bulk_create([Rol(id_rol=id_rol, rol=rol) for id_rol, rol in ROLES.items()])
+    EstadoEvento.objects.bulk_create([
+        EstadoEvento(id_estado=id_estado, nombre=nombre) for id_estado, nombre in ESTADOS.items()
+    ])
+    TipoEvento.objects.bulk_create([
+        TipoEvento(id_tipo_evento=id_tipo, nombre=nombre) for id_tipo, nombre in TIPOS_EVENTO.items()
+    ])
+    with connections['default'].cursor() as cursor:
+        # Los ids explícitos no avanzan las secuencias SERIAL
+        for tabla, columna in (('rol', 'id_rol'), ('estado_evento', 'id_estado'), ('tipo_evento', 'id_tipo_evento')):
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{tabla}', '{columna}'), (SELECT MAX({columna}) FROM {tabla}))"
+            )
+
+    # Se cargan ahora para que las consultas medidas en las pruebas no incluyan la carga
+    invalidar_roles()
+    invalidar_catalogos()
+    obtener_id_rol('Pastor')
+    obtener_id_estado('Aprobado')
+
+
+def crear_usuarios(cantidad, id_rol=2, prefijo='usuario'):
+    from Login.models import Persona, Usuario
+
+    inicio = Usuario.objects.count()
+    personas = Persona.objects.bulk_create([
+        Persona(nombres=f'Nombre {inicio + i}', apellidos=f'Apellido {inicio + i}', numero_cedula=None)
+        for i in range(cantidad)
+    ])
+    return Usuario.objects.bulk_create([
+        Usuario(
+            id_rol_id=id_rol, id_persona=persona, usuario=f'{prefijo}{inicio + i}',
+            contrasenia='!', activo=True
+        )
+        for i, persona in enumerate(personas)
+    ])
+
+
+def crear_usuario(id_rol=2, prefijo='usuario'):
+    return crear_usuarios(1, id_rol, prefijo)[0]
+
+
+def crear_eventos(cantidad, ministerio, usuario, id_estado=2, **campos):
+    """Eventos con fechas repartidas en 2025; ``campos`` reemplaza cualquier valor."""
+    from Eventos.models import Evento
+
+    inicio = Evento.objects.count()
+    return Evento.objects.bulk_create([
+        Evento(**{
+            'nombre': f'Evento {inicio + i}', 'id_ministerio': ministerio, 'descripcion': 'Descripción',
+            'fecha': datetime.date(2025, 1, 1) + datetime.timedelta(days=(inicio + i) % 365),
+            'hora': datetime.time(10, 0), 'lugar': f'Salón {inicio + i}', 'id_usuario': usuario,
+            'id_estado_id': id_estado, 'id_tipo_evento_id': 1, **campos,
+        })
+        for i in range(cantidad)
+    ])
+
+
+def token_de(usuario):
+    """El mismo token que entrega el inicio de sesión."""
+    from Login.models import Usuario
+    from Login.views import IniciarSesionView
+
+    usuario = Usuario.objects.select_related('id_rol').get(pk=usuario.pk)
+    return IniciarSesionView().generate_token(usuario)
+
+
+@override_settings(CATALOGOS_REVALIDAR=3600, SQL_MUESTREO=0, DB_REPLICA_LAG_CHECK=3600)
+class PruebaAPI(TestCase):
+    """
+    Base de las pruebas de vistas: catálogos sembrados y peticiones con token.
+    La réplica espejo se da por no disponible, así que las vistas con
+    ``usar_replica`` leen de ``default`` y sus consultas se cuentan ahí.
+    """
+
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpTestData(cls):
+        crear_catalogos()
+
+    def setUp(self):
+        from backend import replica
+
+        replica._estado.update(disponible=False, verificado_en=time.monotonic())
+
+    def autorizacion(self, usuario):
+        return {'HTTP_AUTHORIZATION': f'Bearer {token_de(usuario)}'} if usuario else {}
+
+    def get(self, url, usuario=None, **params):
+        return self.client.get(url, params, **self.autorizacion(usuario))
+
+    def post(self, url, datos=None, usuario=None, **kwargs):
+        return self.client.post(url, datos or {}, **self.autorizacion(usuario), **kwargs)
+
+    def assertConsultasConstantes(self, consultas, url, sembrar, usuario=None, volumenes=(3, 40), **params):
+        """
+        Siembra ``volumenes`` filas (acumuladas) con ``sembrar(n)`` y verifica que
+        la petición haga siempre ``consultas`` consultas. Devuelve las respuestas.
+        """
+        respuestas = []
+        encabezados = self.autorizacion(usuario)
+        for volumen in volumenes:
+            sembrar(volumen)
+            with self.assertNumQueries(consultas):
+                respuesta = self.client.get(url, params, **encabezados)
+            self.assertEqual(respuesta.status_code, 200, respuesta.content)
+            respuestas.append(respuesta)
+        return respuestas
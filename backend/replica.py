@@ -0,0 +1,153 @@
+"""
+Réplica de lectura opcional (alias ``replica`` en DATABASES).
+
+Solo las vistas marcadas con ``usar_replica`` leen de la réplica; el resto del
+tráfico y todas las escrituras van a ``default``. Se vuelve al primario cuando:
+- la réplica no está configurada o no responde,
+- su retraso de replicación supera ``DB_REPLICA_MAX_LAG`` segundos,
+- el usuario escribió hace menos de ``DB_REPLICA_PIN_SECONDS`` segundos
+  (para que vea sus propios cambios).
+
+La marca de escritura reciente viaja en una cookie firmada con el id del
+usuario, así que la respeta cualquier worker sin caché compartida. Es
+SameSite=None porque el frontend se sirve desde otro dominio
+(CORS_ALLOW_CREDENTIALS).
+"""
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+REPLICA = 'replica'
+METODOS_SEGUROS = ('GET', 'HEAD', 'OPTIONS')
+
+_leer_de_replica = ContextVar('leer_de_replica', default=False)
+
+_lock = threading.Lock()
+_estado = {'disponible': False, 'verificado_en': None}
+
+_SQL_RETRASO = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+COOKIE_ESCRITURA = 'replica_escritura'
+_SAL_ESCRITURA = 'backend.replica.escritura'
+
+
+def replica_configurada():
+    return REPLICA in settings.DATABASES
+
+
+def replica_disponible():
+    """Indica si la réplica responde y está al día; se verifica cada DB_REPLICA_LAG_CHECK segundos."""
+    if not replica_configurada():
+        return False
+
+    ahora = time.monotonic()
+    verificado_en = _estado['verificado_en']
+    if verificado_en is not None and ahora - verificado_en < settings.DB_REPLICA_LAG_CHECK:
+        return _estado['disponible']
+
+    with _lock:
+        # Otro hilo pudo haber verificado mientras se esperaba el lock
+        verificado_en = _estado['verificado_en']
+        if verificado_en is not None and ahora - verificado_en < settings.DB_REPLICA_LAG_CHECK:
+            return _estado['disponible']
+
+        try:
+            with connections[REPLICA].cursor() as cursor:
+                cursor.execute(_SQL_RETRASO)
+                retraso = float(cursor.fetchone()[0])
+            disponible = retraso <= settings.DB_REPLICA_MAX_LAG
+            if not disponible:
+                logger.warning('Réplica con %.1fs de retraso, se lee del primario', retraso)
+        except DatabaseError as e:
+            logger.warning('Réplica no disponible, se lee del primario: %s', e)
+            connections[REPLICA].close()
+            disponible = False
+
+        _estado['disponible'] = disponible
+        _estado['verificado_en'] = time.monotonic()
+        return disponible
+
+
+def escritura_reciente(request):
+    """Indica si el usuario de la petición escribió hace menos de DB_REPLICA_PIN_SECONDS."""
+    usuario = getattr(request, 'usuario', None)
+    if usuario is None:
+        return False
+    marca = request.get_signed_cookie(
+        COOKIE_ESCRITURA, default=None, salt=_SAL_ESCRITURA, max_age=settings.DB_REPLICA_PIN_SECONDS
+    )
+    return marca == str(usuario.id_usuario)
+
+
+def marcar_escritura(response, usuario):
+    response.set_signed_cookie(
+        COOKIE_ESCRITURA, str(usuario.id_usuario), salt=_SAL_ESCRITURA,
+        max_age=settings.DB_REPLICA_PIN_SECONDS, httponly=True, secure=True, samesite='None',
+    )
+
+
+def usar_replica(view_func):
+    """Envía las lecturas de la vista a la réplica cuando es seguro (usar con ``method_decorator``)."""
+    @wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        if escritura_reciente(request) or not replica_disponible():
+            return view_func(request, *args, **kwargs)
+
+        token = _leer_de_replica.set(True)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _leer_de_replica.reset(token)
+    return _wrapped
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return REPLICA if _leer_de_replica.get() else None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Ambos alias contienen los mismos datos
+        if {obj1._state.db, obj2._state.db} <= {'default', REPLICA}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return False if db == REPLICA else None
+
+
+class LecturaTrasEscrituraMiddleware:
+    """
+    Tras una escritura exitosa, fija las lecturas del usuario al primario durante
+    DB_REPLICA_PIN_SECONDS mediante la cookie firmada ``replica_escritura``.
+    """
+
+    def __init__(self, get_response):
+        if not replica_configurada():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        usuario = getattr(request, 'usuario', None)
+        if usuario is not None and request.method not in METODOS_SEGUROS and response.status_code < 400:
+            marcar_escritura(response, usuario)
+
+        return response
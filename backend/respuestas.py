@@ -0,0 +1,40 @@
+"""
+Respuesta JSON rápida para los listados grandes.
+
+Con ``orjson`` instalado, la estructura (dicts, listas, textos, números) se
+serializa en C. Las fechas, horas y datetimes pasan por
+``DjangoJSONEncoder.default`` (``OPT_PASSTHROUGH_DATETIME``) para conservar su
+formato exacto: milisegundos en lugar de microsegundos y "Z" para UTC. Sin
+``orjson`` se usa ``json`` con ``DjangoJSONEncoder``; la salida es la misma en
+ambos casos (``manage.py medir_serializacion`` compara el costo).
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+if orjson is not None:
+    _OPCIONES = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+# Decimal, UUID, timedelta y fechas con el mismo formato que JsonResponse
+_por_defecto = DjangoJSONEncoder().default
+
+
+def a_json(datos):
+    """Serializa ``datos`` a bytes UTF-8."""
+    if orjson is not None:
+        return orjson.dumps(datos, default=_por_defecto, option=_OPCIONES)
+    return json.dumps(datos, cls=DjangoJSONEncoder).encode()
+
+
+class RespuestaJSON(HttpResponse):
+    """Equivalente a ``JsonResponse`` (solo para dict) usando ``a_json``."""
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=a_json(data), **kwargs)
@@ -51,6 +51,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'backend.instrumentacion.InstrumentacionSQLMiddleware',  # Server-Timing y detección de N+1
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Para servir archivos estáticos
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -59,6 +60,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'Login.middleware.JWTAutenticacionMiddleware',  # Decodifica el JWT una vez por petición
+    'backend.replica.LecturaTrasEscrituraMiddleware',  # Lecturas al primario tras escribir
 ]
 
 # CORS configuration
@@ -87,6 +90,39 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Rutas en las que el middleware JWT ignora el encabezado Authorization
+JWT_RUTAS_PUBLICAS = [
+    '/Login/login/',
+    '/Login/logout/',
+    '/admin/',
+    STATIC_URL,
+    '/media/',
+]
+
+# Paginación por cursor de los listados de eventos (?limit=)
+EVENTOS_PAGINA_DEFECTO = 50
+EVENTOS_PAGINA_MAX = 200
+
+# Segundos entre revisiones de la versión de los catálogos en memoria (tipos y estados de evento)
+CATALOGOS_REVALIDAR = 5
+
+# Segundos que un mes del calendario de eventos permanece en caché (se invalida al modificar eventos)
+CALENDARIO_TIMEOUT = 3600
+
+# Meses de índices de horarios (Eventos/horarios.py) que cada proceso guarda en memoria
+HORARIOS_MESES_EN_MEMORIA = 24
+
+# Notificaciones en tiempo real (SSE, requiere servir con ASGI: ver Procfile). El broker en
+# memoria solo reparte dentro de un proceso; con WEB_CONCURRENCY > 1 usar Eventos.difusion.BrokerPostgres
+NOTIFICACIONES_BROKER = os.environ.get('NOTIFICACIONES_BROKER', 'Eventos.difusion.BrokerMemoria')
+SSE_HEARTBEAT = int(os.environ.get('SSE_HEARTBEAT', '15'))  # segundos entre comentarios de keep-alive
+SSE_REINTENTO_MS = 5000  # espera sugerida al navegador antes de reconectar
+SSE_COLA_MAX = 100  # mensajes pendientes por conexión antes de pedir resincronizar
+SSE_TICKET_SEGUNDOS = 60  # validez del ticket para abrir el flujo (?ticket=)
+
+# Los avisos a líderes y pastores se crean al confirmar la transacción del cambio de estado
+NOTIFICACIONES_DIFERIDAS = True
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -105,6 +141,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'backend.wsgi.application'
 
+# Las tablas no las administra Django: el ejecutor carga bd.sql en la base de pruebas
+TEST_RUNNER = 'backend.pruebas.PruebasConEsquema'
+
 # Database configuration
 DATABASES = {
     'default': {
@@ -115,14 +154,59 @@ DATABASES = {
         'HOST': os.environ.get('DB_HOST'), 
         'PORT': os.environ.get('DB_PORT', '5432'),
         'OPTIONS': {
-            'sslmode': 'require',
+            'sslmode': os.environ.get('DB_SSLMODE', 'require'),  # 'disable' para un Postgres local (pruebas)
             'connect_timeout': 60,
         },
-        'CONN_MAX_AGE': 0,
+        # Sin conexiones persistentes: la API se sirve con ASGI (ver Procfile), donde
+        # cada petición corre en un hilo de sync_to_async y Django nunca cierra las
+        # conexiones que quedan en esos hilos. La reutilización la da el pool (DB_POOL);
+        # DB_CONN_MAX_AGE > 0 solo tiene sentido sirviendo con WSGI (runserver)
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '0')),
+        # Verifica la conexión antes de reutilizarla (en modo pool, al prestarla)
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'True').lower() == 'true',
+        # Las vistas de solo lectura y las que abren su propio transaction.atomic()
+        # se excluyen con transaction.non_atomic_requests (sin BEGIN/COMMIT ni savepoints de más)
         'ATOMIC_REQUESTS': True,
     }
 }
 
+# Pool de conexiones de psycopg 3 (psycopg[pool]), activado en el Procfile. El pool
+# se crea de forma perezosa en cada worker de uvicorn (--workers), así que no se
+# comparten conexiones entre procesos. Django devuelve la conexión al pool al
+# terminar cada petición, también con ASGI.
+if os.environ.get('DB_POOL', 'False').lower() == 'true':
+    DATABASES['default']['CONN_MAX_AGE'] = 0  # Django no admite pool con conexiones persistentes
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '1')),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '4')),
+        'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', '300')),
+        'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', '1800')),
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+    }
+
+# Réplica de lectura opcional para los listados pesados (ver backend/replica.py)
+if os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST': os.environ.get('DB_REPLICA_HOST'),
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'ATOMIC_REQUESTS': False,  # Evita abrir la réplica en cada petición
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['backend.replica.ReplicaRouter']
+DB_REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG', '5'))  # segundos de retraso tolerados
+DB_REPLICA_LAG_CHECK = float(os.environ.get('DB_REPLICA_LAG_CHECK', '10'))  # cada cuánto se mide el retraso
+DB_REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', '10'))  # lecturas al primario tras escribir
+
+# Instrumentación de SQL por petición (ver backend/instrumentacion.py)
+SQL_MUESTREO = float(os.environ.get('SQL_MUESTREO', '1' if DEBUG else '0.1'))  # fracción de peticiones medidas
+SQL_UMBRAL_REPETIDAS = int(os.environ.get('SQL_UMBRAL_REPETIDAS', '5'))  # repeticiones antes de advertir N+1
+SQL_UMBRAL_BLOQUEO_MS = float(os.environ.get('SQL_UMBRAL_BLOQUEO_MS', '100'))  # ms de espera por bloqueos antes de advertir
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -177,6 +261,10 @@ LOGGING = {
             'handlers': ['console'],
             'level': 'DEBUG' if DEBUG else 'INFO',
         },
+        'backend.instrumentacion': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
     },
 }
 
@@ -0,0 +1,144 @@
+import json
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+
+from Eventos.models import Evento
+from Login.middleware import UsuarioToken
+from . import replica
+from .instrumentacion import _DML, _PIDE_BLOQUEO
+from .pruebas import PruebaAPI, crear_usuario
+from .respuestas import a_json
+from .replica import (
+    COOKIE_ESCRITURA, REPLICA, LecturaTrasEscrituraMiddleware, ReplicaRouter, escritura_reciente, usar_replica,
+)
+
+
+class ReplicaTests(PruebaAPI):
+    """El alias ``replica`` es un espejo de ``default`` (ver backend.pruebas.agregar_replica_espejo)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.usuario = crear_usuario(id_rol=1)
+        cls.principal = UsuarioToken(cls.usuario.id_usuario, 'Pastor', 1)
+
+    def setUp(self):
+        super().setUp()
+        # Se mide el retraso real del espejo (0 s)
+        replica._estado['verificado_en'] = None
+
+    def peticion(self, metodo='get', cookies=None):
+        request = getattr(RequestFactory(), metodo)('/')
+        request.usuario = self.principal
+        request.COOKIES.update(cookies or {})
+        return request
+
+    def marcar(self, usuario=None):
+        """Cookies que deja una escritura exitosa de ``usuario``."""
+        request = self.peticion('post')
+        request.usuario = usuario or self.principal
+        respuesta = LecturaTrasEscrituraMiddleware(lambda r: HttpResponse())(request)
+        return {nombre: cookie.value for nombre, cookie in respuesta.cookies.items()}
+
+    def test_router_lee_del_primario_fuera_de_usar_replica(self):
+        self.assertIsNone(ReplicaRouter().db_for_read(Evento))
+        self.assertEqual(Evento.objects.all().db, 'default')
+        self.assertIsNone(ReplicaRouter().db_for_write(Evento))
+
+    def test_usar_replica_envia_las_lecturas_a_la_replica(self):
+        vista = usar_replica(lambda request: Evento.objects.all().db)
+        self.assertEqual(vista(self.peticion()), REPLICA)
+
+    def test_escrituras_siempre_al_primario(self):
+        vista = usar_replica(lambda request: ReplicaRouter().db_for_write(Evento))
+        self.assertIsNone(vista(self.peticion()))
+
+    def test_escritura_exitosa_deja_la_cookie_firmada(self):
+        cookies = self.marcar()
+        self.assertIn(COOKIE_ESCRITURA, cookies)
+        self.assertTrue(escritura_reciente(self.peticion(cookies=cookies)))
+
+    def test_lecturas_y_errores_no_marcan(self):
+        middleware = LecturaTrasEscrituraMiddleware(lambda r: HttpResponse(status=400))
+        self.assertNotIn(COOKIE_ESCRITURA, middleware(self.peticion('post')).cookies)
+        middleware = LecturaTrasEscrituraMiddleware(lambda r: HttpResponse())
+        self.assertNotIn(COOKIE_ESCRITURA, middleware(self.peticion('get')).cookies)
+
+    def test_cookie_de_otro_usuario_o_alterada_no_fija(self):
+        otro = UsuarioToken(self.usuario.id_usuario + 1, 'Lider', 2)
+        self.assertFalse(escritura_reciente(self.peticion(cookies=self.marcar(otro))))
+        self.assertFalse(escritura_reciente(self.peticion(cookies={COOKIE_ESCRITURA: str(self.usuario.id_usuario)})))
+
+    def test_fijado_tras_escribir_lee_del_primario(self):
+        vista = usar_replica(lambda request: Evento.objects.all().db)
+        self.assertEqual(vista(self.peticion(cookies=self.marcar())), 'default')
+
+    def test_vista_con_usar_replica_consulta_la_replica(self):
+        encabezados = self.autorizacion(self.usuario)
+        with CaptureQueriesContext(connections['default']) as primario, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            respuesta = self.client.get('/Miembros/personas_usuario/', **encabezados)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(any('FROM "usuarios"' in q['sql'] for q in replica.captured_queries))
+        self.assertFalse(any('FROM "usuarios"' in q['sql'] for q in primario.captured_queries))
+
+        self.client.cookies.load(self.marcar())
+        with CaptureQueriesContext(connections[REPLICA]) as replica:
+            respuesta = self.client.get('/Miembros/personas_usuario/', **encabezados)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertFalse(any('FROM "usuarios"' in q['sql'] for q in replica.captured_queries))
+
+
+class RespuestaJSONTests(SimpleTestCase):
+    def test_mismo_formato_que_django_json_encoder(self):
+        datos = {
+            'fecha': date(2025, 6, 1),
+            'hora': time(10, 30),
+            'hora_fraccion': time(10, 30, 5, 123456),
+            'utc': datetime(2025, 6, 1, 10, 30, 5, 123456, tzinfo=timezone.utc),
+            'local': datetime(2025, 6, 1, 10, 30, tzinfo=timezone(timedelta(hours=-5))),
+            'ingenua': datetime(2025, 6, 1, 10, 30, 5, 999),
+            'duracion': timedelta(minutes=90),
+            'decimal': Decimal('10.50'),
+            'uuid': uuid.UUID(int=1),
+            'anidado': [{'texto': 'Salón ñ', 'numero': 1, 'nulo': None}],
+        }
+        # Mismos textos; solo cambian espacios y escapes de caracteres no ASCII
+        self.assertEqual(json.loads(a_json(datos)), json.loads(json.dumps(datos, cls=DjangoJSONEncoder)))
+
+
+class InstrumentacionTests(SimpleTestCase):
+    def test_separa_esperas_de_bloqueo_de_escrituras(self):
+        piden_bloqueo = [
+            "SELECT pg_advisory_xact_lock(hashtext('horario_eventos:2025-06-01'))",
+            'SELECT numero FROM plazas_evento WHERE id_evento = 1 FOR UPDATE',
+            'SELECT pg_advisory_xact_lock_shared(1, 1)',
+            'SELECT "tipo_evento"."id_tipo_evento" FROM "tipo_evento" WHERE id_tipo_evento = 1 FOR NO KEY UPDATE',
+        ]
+        escrituras = [
+            'INSERT INTO participantes_evento (id_evento) VALUES (1)',
+            '  UPDATE "eventos" SET "cupo" = 2 WHERE "eventos"."id_evento" = 1',
+            'DELETE FROM plazas_evento WHERE id_evento = 1',
+            'WITH promovidos AS (UPDATE participantes_evento SET en_espera = FALSE) SELECT * FROM promovidos',
+            'WITH libres AS (SELECT numero FROM plazas_evento FOR UPDATE SKIP LOCKED) UPDATE plazas_evento SET numero = 1',
+        ]
+        lecturas = [
+            'SELECT "eventos"."fecha_actualizacion" FROM "eventos"',
+            "SELECT 'INSERT' AS accion FROM bitacora",
+            'SELECT numero FROM plazas_evento WHERE id_evento = 1 LIMIT 1 FOR UPDATE SKIP LOCKED',
+        ]
+        for sql in piden_bloqueo:
+            self.assertTrue(_PIDE_BLOQUEO.search(sql), sql)
+        for sql in escrituras + lecturas:
+            self.assertFalse(_PIDE_BLOQUEO.search(sql), sql)
+        for sql in escrituras:
+            self.assertTrue(_DML.match(sql), sql)
+        for sql in piden_bloqueo + lecturas:
+            self.assertFalse(_DML.match(sql), sql)
@@ -1,3 +1,8 @@
+-- Extensiones: trigramas para la búsqueda por nombre de eventos, btree_gist para
+-- los índices de horario (ver Login/migrations/0003 y 0007)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
 -- Tabla de roles de usuario
 CREATE TABLE rol (
     id_rol SERIAL PRIMARY KEY,
@@ -35,6 +40,7 @@ CREATE TABLE usuarios (
     FOREIGN KEY (id_rol) REFERENCES rol(id_rol) ON DELETE CASCADE,
     FOREIGN KEY (id_persona) REFERENCES personas(id_persona) ON DELETE CASCADE
 );
+CREATE INDEX idx_usuarios_persona ON usuarios (id_persona);
 
 -- Ministerio (necesita usuarios para líderes)
 CREATE TABLE ministerio (
@@ -46,6 +52,8 @@ CREATE TABLE ministerio (
     id_lider1 INT REFERENCES usuarios(id_usuario) ON DELETE SET NULL,
     id_lider2 INT REFERENCES usuarios(id_usuario) ON DELETE SET NULL
 );
+CREATE INDEX idx_ministerio_lider1 ON ministerio (id_lider1);
+CREATE INDEX idx_ministerio_lider2 ON ministerio (id_lider2);
 
 -- Tipos de evento (antes que eventos)
 CREATE TABLE tipo_evento (
@@ -76,11 +84,23 @@ CREATE TABLE eventos (
     id_tipo_evento INT,
     fecha_creacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     fecha_actualizacion TIMESTAMP,
+    cupo INT CHECK (cupo >= 0), -- NULL = sin límite (ver Eventos/participantes.py)
+    duracion INT NOT NULL DEFAULT 120 CHECK (duracion BETWEEN 1 AND 1440), -- minutos
+    -- Ventana horaria para detectar cruces (ver Eventos/horarios.py)
+    horario TSRANGE GENERATED ALWAYS AS (tsrange(fecha + hora, fecha + hora + duracion * INTERVAL '1 minute', '[)')) STORED,
     FOREIGN KEY (id_ministerio) REFERENCES ministerio(id_ministerio) ON DELETE CASCADE,
     FOREIGN KEY (id_usuario) REFERENCES usuarios(id_usuario) ON DELETE CASCADE,
     FOREIGN KEY (id_estado) REFERENCES estado_evento(id_estado) ON DELETE SET DEFAULT,
     FOREIGN KEY (id_tipo_evento) REFERENCES tipo_evento(id_tipo_evento) ON DELETE SET NULL
 );
+CREATE INDEX idx_eventos_usuario ON eventos (id_usuario);
+CREATE INDEX idx_eventos_ministerio_estado_fecha ON eventos (id_ministerio, id_estado, fecha DESC, hora DESC);
+CREATE INDEX idx_eventos_fecha_hora ON eventos (fecha DESC, hora DESC);
+CREATE INDEX idx_eventos_estado_fecha ON eventos (id_estado, fecha DESC, hora DESC);
+CREATE INDEX idx_eventos_tipo_evento ON eventos (id_tipo_evento);
+CREATE INDEX idx_eventos_nombre_trgm ON eventos USING gin (UPPER(nombre) gin_trgm_ops);
+CREATE INDEX idx_eventos_lugar_horario ON eventos USING gist (lower(btrim(lugar)), horario) WHERE btrim(lugar) <> '';
+CREATE INDEX idx_eventos_ministerio_horario ON eventos USING gist (id_ministerio, horario);
 
 -- Motivos de aprobación/rechazo de eventos
 CREATE TABLE motivos_evento (
@@ -93,6 +113,7 @@ CREATE TABLE motivos_evento (
     FOREIGN KEY (id_evento) REFERENCES eventos(id_evento) ON DELETE CASCADE,
     FOREIGN KEY (id_usuario) REFERENCES usuarios(id_usuario) ON DELETE CASCADE
 );
+CREATE INDEX idx_motivos_evento_evento ON motivos_evento (id_evento);
 
 -- Participantes de eventos
 CREATE TABLE participantes_evento (
@@ -101,10 +122,21 @@ CREATE TABLE participantes_evento (
     id_usuario INT NOT NULL,
     fecha_registro TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     asistencia BOOLEAN DEFAULT NULL,
+    en_espera BOOLEAN NOT NULL DEFAULT FALSE,
     FOREIGN KEY (id_evento) REFERENCES eventos(id_evento) ON DELETE CASCADE,
     FOREIGN KEY (id_usuario) REFERENCES usuarios(id_usuario) ON DELETE CASCADE,
     UNIQUE (id_evento, id_usuario)
 );
+CREATE INDEX idx_participantes_evento_espera ON participantes_evento (id_evento, id_participacion) WHERE en_espera;
+
+-- Una fila por lugar de los eventos con cupo; confirmado = con plaza (ver Eventos/participantes.py)
+CREATE TABLE plazas_evento (
+    id_evento INT NOT NULL REFERENCES eventos(id_evento) ON DELETE CASCADE,
+    numero INT NOT NULL,
+    id_participacion INT UNIQUE REFERENCES participantes_evento(id_participacion) ON DELETE SET NULL,
+    PRIMARY KEY (id_evento, numero)
+);
+CREATE INDEX idx_plazas_evento_libres ON plazas_evento (id_evento, numero) WHERE id_participacion IS NULL;
 
 -- Notificaciones
 CREATE TABLE notificaciones (
@@ -119,6 +151,14 @@ CREATE TABLE notificaciones (
     accion_tomada BOOLEAN, -- TRUE=aprobada, FALSE=rechazada, NULL=pendiente
     motivo_rechazo TEXT
 );
+CREATE INDEX idx_notificaciones_destino_leida_fecha ON notificaciones (id_usuario_destino, leida, fecha_creacion DESC);
+CREATE INDEX idx_notificaciones_evento ON notificaciones (id_evento);
+
+-- Contador de notificaciones no leídas por usuario (ver Eventos/notificaciones.py)
+CREATE TABLE notificaciones_no_leidas (
+    id_usuario INT PRIMARY KEY REFERENCES usuarios(id_usuario) ON DELETE CASCADE,
+    total INT NOT NULL DEFAULT 0
+);
 
 -- Tabla de ciclos
 CREATE TABLE ciclo (
@@ -140,6 +180,7 @@ CREATE TABLE curso (
     id_usuario INT NOT NULL,
     FOREIGN KEY (id_usuario) REFERENCES usuarios(id_usuario) ON DELETE CASCADE
 );
+CREATE INDEX idx_curso_ciclo ON curso (id_ciclo);
 
 -- Participantes de cursos
 CREATE TABLE curso_participante (
@@ -162,6 +203,7 @@ CREATE TABLE asistencia_curso (
     FOREIGN KEY (id_curso) REFERENCES curso(id_curso) ON DELETE CASCADE,
     FOREIGN KEY (id_persona) REFERENCES personas(id_persona) ON DELETE CASCADE
 );
+CREATE INDEX idx_asistencia_curso_curso_persona_fecha ON asistencia_curso (id_curso, id_persona, fecha);
 
 -- Rúbricas de evaluación
 CREATE TABLE rubrica (
@@ -171,6 +213,7 @@ CREATE TABLE rubrica (
     porcentaje NUMERIC(5,2) NOT NULL CHECK (porcentaje >= 0 AND porcentaje <= 100),
     FOREIGN KEY (id_curso) REFERENCES curso(id_curso) ON DELETE CASCADE
 );
+CREATE INDEX idx_rubrica_curso ON rubrica (id_curso);
 
 -- Tareas de cursos
 CREATE TABLE tarea (
@@ -183,6 +226,7 @@ CREATE TABLE tarea (
     FOREIGN KEY (id_curso) REFERENCES curso(id_curso) ON DELETE CASCADE,
     FOREIGN KEY (id_criterio) REFERENCES rubrica(id_rubrica) ON DELETE CASCADE
 );
+CREATE INDEX idx_tarea_curso ON tarea (id_curso);
 
 -- Calificaciones de tareas
 CREATE TABLE calificacion (
@@ -194,6 +238,7 @@ CREATE TABLE calificacion (
     FOREIGN KEY (id_persona) REFERENCES personas(id_persona) ON DELETE CASCADE,
     UNIQUE (id_tarea, id_persona)
 );
+CREATE INDEX idx_calificacion_persona_tarea ON calificacion (id_persona, id_tarea);
 
 -- Devocionales
 CREATE TABLE devocionales (
@@ -209,3 +254,13 @@ CREATE TABLE devocionales (
     fecha_creacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     fecha_actualizacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
+CREATE INDEX idx_devocionales_mes_anio ON devocionales (mes, año);
+CREATE INDEX idx_devocionales_fecha_creacion ON devocionales (fecha_creacion DESC);
+
+-- Versión de los datos cacheados por proceso: catálogos (ver Eventos/catalogos.py)
+-- y meses del calendario, "calendario:AAAA-MM" (ver Eventos/calendario.py)
+CREATE TABLE versiones_catalogo (
+    nombre VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO versiones_catalogo (nombre, version) VALUES ('eventos', 0);